@@ -1,7 +1,12 @@
 from flask import Flask
 from config import Config
-from .job_manager import JobManager
+from .job_manager import EVENT_BUS, JobManager, parse_tool_limits
+from .job_store import SQLiteJobStore
 from .routes.routes import main
+from .routes.nmap import parser as nmap_parser
+from .modules.dns.cache import get_dns_cache
+from .modules.shodan import client as shodan_client
+from .modules.shodan import cache as shodan_cache
 from pathlib import Path
 
 def create_app():
@@ -9,7 +14,81 @@ def create_app():
     app.config.from_object(Config)
     base_dir = Path(__file__).resolve().parent
     report_dir = (base_dir / ".." / "reports" / "output").resolve()
-    app.jobmanager = JobManager(report_dir=str(report_dir))
+    shared = app.config["SHARED_STATE"] and app.config["JOBS_STORE"] == "sqlite"
+    store = None
+    if app.config["JOBS_STORE"] == "sqlite":
+        db_path = app.config["JOBS_DB_PATH"] or str(report_dir.parent / "jobs.sqlite3")
+        # decode/files los conecta el JobManager (bind) antes de la recuperación
+        store = SQLiteJobStore(
+            db_path,
+            hot_size=app.config["JOBS_HOT_SIZE"],
+            max_age_days=app.config["JOBS_RETENTION_DAYS"] or None,
+            max_count=app.config["JOBS_RETENTION_COUNT"] or None,
+            shared=shared,
+        )
+    jm = JobManager(
+        max_workers=app.config["JOBS_MAX_TOOLS"],
+        report_dir=str(report_dir),
+        max_jobs=app.config["JOBS_MAX_RUNNING"],
+        max_queue=app.config["JOBS_MAX_QUEUE"],
+        tool_limits=parse_tool_limits(app.config["JOBS_TOOL_LIMITS"]),
+        events_capacity=app.config["JOBS_EVENTS_CAPACITY"],
+        events_spill=app.config["JOBS_EVENTS_SPILL"],
+        store=store,
+        tool_defaults={
+            "nmap_max_procs": app.config["NMAP_MAX_PROCS"],
+            "nmap_shard_prefix": app.config["NMAP_SHARD_PREFIX"],
+            "nmap_discovery": app.config["NMAP_DISCOVERY"],
+            "nmap_fp_cache": app.config["NMAP_FP_CACHE_PATH"] or str(report_dir.parent / "fingerprints.sqlite3"),
+            "nmap_fp_ttl": app.config["NMAP_FP_CACHE_TTL"] * 3600,
+            "import_max_procs": app.config["INGEST_MAX_PROCS"],
+            "tcp_sweep_ports": app.config["TCP_SWEEP_PORTS"],
+            "tcp_sweep_concurrency": app.config["TCP_SWEEP_CONCURRENCY"],
+            "tcp_sweep_per_host": app.config["TCP_SWEEP_PER_HOST"],
+            "tcp_sweep_host_rate": app.config["TCP_SWEEP_HOST_RATE"],
+            "tcp_sweep_timeout": app.config["TCP_SWEEP_TIMEOUT"],
+            "dns_resolvers": app.config["DNS_RESOLVERS"],
+            "dns_timeout": app.config["DNS_TIMEOUT"],
+            "dns_retries": app.config["DNS_RETRIES"],
+            "dns_concurrency": app.config["DNS_CONCURRENCY"],
+            "shodan_concurrency": app.config["SHODAN_BATCH_CONCURRENCY"],
+            "shodan_max_pages": app.config["SHODAN_MAX_PAGES"],
+        },
+    )
+    app.jobmanager = jm
+    nmap_parser.set_default_backend(app.config["NMAP_PARSER"])
+    get_dns_cache().configure(
+        max_entries=app.config["DNS_CACHE_SIZE"],
+        max_ttl=app.config["DNS_CACHE_MAX_TTL"],
+        negative_ttl=app.config["DNS_CACHE_NEG_TTL"],
+    )
+    shodan_client.configure(
+        app.config["SHODAN_SEARCH_URL"],
+        pool_size=app.config["SHODAN_POOL_SIZE"],
+        max_concurrency=app.config["SHODAN_MAX_CONCURRENCY"],
+        retries=app.config["SHODAN_RETRIES"],
+        backoff=app.config["SHODAN_BACKOFF"],
+        connect_timeout=app.config["SHODAN_CONNECT_TIMEOUT"],
+        read_timeout=app.config["SHODAN_READ_TIMEOUT"],
+    )
+    shodan_cache.configure(
+        ttl=app.config["SHODAN_CACHE_TTL"],
+        max_entries=app.config["SHODAN_CACHE_SIZE"],
+        path=app.config["SHODAN_CACHE_PATH"] or None,
+    )
+    EVENT_BUS.configure(maxsize=app.config["EVENTS_QUEUE_SIZE"], policy=app.config["EVENTS_OVERFLOW"])
+
+    # Bus de eventos entre workers: misma base de datos + sockets Unix de aviso
+    if shared:
+        from .event_relay import start_event_relay
+        app.event_relay = start_event_relay(db_path, app.config["SHARED_STATE_DIR"])
+
+    # Feed SSE asíncrono para muchos dashboards (mismo EVENT_BUS y JobManager)
+    if app.config["ASYNC_EVENTS_PORT"]:
+        from .async_events import start_async_events
+        app.async_events = start_async_events(jm, app.config["ASYNC_EVENTS_HOST"],
+                                              app.config["ASYNC_EVENTS_PORT"],
+                                              origins=app.config["ASYNC_EVENTS_ORIGINS"])
 
     app.register_blueprint(main)
     return app
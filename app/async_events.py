@@ -0,0 +1,224 @@
+"""
+Servidor SSE asíncrono (asyncio) para el feed de eventos de jobs.
+
+El endpoint /events de Flask ocupa un hilo WSGI por pestaña abierta. Este
+servidor corre en un hilo propio dentro del mismo proceso (mismo EVENT_BUS y
+mismo JobManager) y mantiene miles de conexiones SSE ociosas en un único
+event loop:
+
+- Una sola suscripción al bus (firehose) por servidor; un hilo puente pasa los
+  eventos al loop por lotes y allí se reparten por topic a cada conexión.
+- Misma semántica que /events: ?job_id=, ?topic=status, Last-Event-ID.
+- GET /stats devuelve el nº de conexiones abiertas (lo usa el test de carga).
+- Sin autenticación: escucha en 127.0.0.1 por defecto y solo envía cabeceras
+  CORS a los orígenes configurados (ninguno por defecto).
+
+Solo depende de la stdlib (HTTP/1.1 mínimo: GET, sin keep-alive de peticiones).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import queue
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from app.job_manager import (
+    EVENT_BUS, EventBus, Event, SubscriptionClosed,
+    OVERFLOW_DROP_OLDEST, TOPIC_ALL, TOPIC_STATUS, job_topic,
+)
+
+KEEPALIVE_SECS = 15.0
+CONN_QUEUE_SIZE = 256          # eventos pendientes por conexión (se descarta el más antiguo)
+BRIDGE_BATCH = 512             # eventos máximos por salto hilo → loop
+
+SSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream; charset=utf-8\r\n"
+    b"Cache-Control: no-cache, no-transform\r\n"
+    b"Connection: close\r\n"
+    b"X-Accel-Buffering: no\r\n"
+)
+
+
+def _http_response(status: str, body: bytes, ctype: str = "application/json") -> bytes:
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+class AsyncEventServer:
+    """Servidor SSE asyncio alimentado por un EventBus (por defecto EVENT_BUS)."""
+
+    def __init__(self, jobmanager, host: str = "127.0.0.1", port: int = 5001,
+                 bus: Optional[EventBus] = None, origins: Union[str, Iterable[str], None] = None) -> None:
+        self.jm = jobmanager
+        self.host = host
+        self.port = port
+        if isinstance(origins, str):
+            origins = origins.split(",")
+        self.origins = {o.strip().rstrip("/") for o in origins or () if o.strip()}
+        self.bus = bus or EVENT_BUS
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.conns: Dict[str, Set[asyncio.Queue]] = {}   # topic -> colas de conexión
+        self.open = 0
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    # -------- Arranque --------
+    def start(self) -> threading.Thread:
+        """Arranca el loop en un hilo daemon y espera a que escuche."""
+        t = threading.Thread(target=self._thread_main, name="async-events", daemon=True)
+        t.start()
+        self.ready.wait(timeout=5)
+        return t
+
+    def _thread_main(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except OSError as ex:
+            # p.ej. puerto ocupado por otro worker de gunicorn: Flask sigue sirviendo /events
+            self.error = ex
+            self.ready.set()
+
+    async def _serve(self) -> None:
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=4096)
+        threading.Thread(target=self._bridge, name="async-events-bridge", daemon=True).start()
+        self.ready.set()
+        async with server:
+            await server.serve_forever()
+
+    # -------- Puente bus (hilos) → loop --------
+    def _bridge(self) -> None:
+        # Cola grande y sin fusión: el reparto y los descartes por conexión se hacen en el loop
+        sub = self.bus.subscribe(TOPIC_ALL, maxsize=BRIDGE_BATCH * 64, policy=OVERFLOW_DROP_OLDEST)
+        while True:
+            try:
+                batch = [sub.get(timeout=KEEPALIVE_SECS)]
+            except queue.Empty:
+                continue
+            except SubscriptionClosed:
+                return
+            while len(batch) < BRIDGE_BATCH:
+                try:
+                    batch.append(sub.get_nowait())
+                except queue.Empty:
+                    break
+            self.loop.call_soon_threadsafe(self._dispatch, batch)
+
+    def _dispatch(self, batch) -> None:
+        for ev in batch:
+            for topic in EventBus.topics_for(ev):
+                for q in self.conns.get(topic, ()):
+                    if q.full():
+                        q.get_nowait()
+                    q.put_nowait(ev)
+
+    # -------- HTTP --------
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, Dict[str, str]]:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = (lines[0].split(" ", 2) + ["", ""])[:3]
+        headers = {}
+        for line in lines[1:]:
+            k, sep, v = line.partition(":")
+            if sep:
+                headers[k.strip().lower()] = v.strip()
+        if method != "GET":
+            raise ValueError(method)
+        return target, headers
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                target, headers = await self._read_request(reader)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    asyncio.TimeoutError, ValueError):
+                writer.write(_http_response("400 Bad Request", b'{"error": "bad request"}'))
+                return
+            url = urlsplit(target)
+            if url.path == "/stats":
+                body = json.dumps({"connections": self.open,
+                                   "topics": {t: len(qs) for t, qs in self.conns.items()}})
+                writer.write(_http_response("200 OK", body.encode()))
+            elif url.path == "/events":
+                await self._stream(writer, parse_qs(url.query), headers)
+            else:
+                writer.write(_http_response("404 Not Found", b'{"error": "not found"}'))
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    def _cors(self, headers: Dict[str, str]) -> bytes:
+        # Solo orígenes configurados; nunca '*': el feed lleva resultados de escaneos
+        origin = headers.get("origin", "")
+        if origin and origin.rstrip("/") in self.origins:
+            return f"Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n".encode("latin-1")
+        return b""
+
+    async def _stream(self, writer: asyncio.StreamWriter, args: Dict[str, list], headers: Dict[str, str]) -> None:
+        job_filter = (args.get("job_id") or [None])[0]
+        if job_filter:
+            topic = job_topic(job_filter)
+        else:
+            topic = TOPIC_STATUS if (args.get("topic") or [None])[0] == TOPIC_STATUS else TOPIC_ALL
+        last_seq = None
+        raw_last = headers.get("last-event-id") or (args.get("last_event_id") or [None])[0]
+        if job_filter and raw_last:
+            try:
+                last_seq = int(raw_last)
+            except ValueError:
+                last_seq = None
+
+        q: asyncio.Queue = asyncio.Queue(maxsize=CONN_QUEUE_SIZE)
+        self.conns.setdefault(topic, set()).add(q)
+        self.open += 1
+        try:
+            writer.write(SSE_HEADERS + self._cors(headers) + b"\r\n" + b"retry: 3000\n: ping\n\n")
+
+            # Replay (igual que /events): lo posterior a Last-Event-ID o los últimos 50
+            sent = 0
+            if job_filter:
+                job = await self.loop.run_in_executor(None, self.jm.get, job_filter)
+                if job:
+                    # since() puede leer el volcado de disco: fuera del loop
+                    if last_seq is not None:
+                        replay = await self.loop.run_in_executor(None, job.events.since, last_seq)
+                    else:
+                        replay = job.events.tail(50)
+                    writer.write(b"".join(ev.encode() for ev in replay))
+                    sent = replay[-1].seq if replay else (last_seq or 0)
+            await writer.drain()
+
+            while True:
+                try:
+                    ev: Event = await asyncio.wait_for(q.get(), timeout=KEEPALIVE_SECS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                if job_filter and ev.seq is not None and ev.seq <= sent:
+                    continue
+                writer.write(ev.frame or ev.encode())
+                await writer.drain()
+        finally:
+            self.open -= 1
+            subs = self.conns.get(topic)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    self.conns.pop(topic, None)
+
+
+def start_async_events(jobmanager, host: str = "127.0.0.1", port: int = 5001,
+                       origins: Union[str, Iterable[str], None] = None) -> AsyncEventServer:
+    """Crea y arranca el servidor SSE asíncrono en segundo plano."""
+    server = AsyncEventServer(jobmanager, host=host, port=port, origins=origins)
+    server.start()
+    return server
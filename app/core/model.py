@@ -1,11 +1,55 @@
 # app/core/model.py
-from dataclasses import dataclass, field, asdict
-from typing import List, Optional, Dict
+from dataclasses import dataclass, field, asdict, fields
+from typing import Any, List, Optional, Dict, Tuple
 import json
 import hashlib
 
-@dataclass
-class PortInfo:
+
+class _Record:
+    """
+    Lectura tipo dict (h["ip"], h.get("ports"), {**h}) sobre dataclasses con
+    __slots__: rules, exportadores y plantillas siguen funcionando igual con
+    activos en memoria o recargados de disco (dicts), sin copiar los datos.
+    """
+    __slots__ = ()
+    _keys: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._keys else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialización en una pasada (sin el deepcopy de asdict)."""
+        return {k: _plain(getattr(self, k)) for k in self._keys}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, _Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def to_jsonable(obj: Any) -> Any:
+    """default= para json.dumps: Asset/PortInfo → dict; el resto, str()."""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    return str(obj)
+
+
+@dataclass(slots=True)
+class PortInfo(_Record):
     port: str
     state: str
     service: str = ""
@@ -13,8 +57,8 @@ class PortInfo:
     product: str = ""
     version: str = ""
 
-@dataclass
-class Asset:
+@dataclass(slots=True)
+class Asset(_Record):
     ip: str
     hostname: str = ""
     os: Optional[str] = None
@@ -23,6 +67,20 @@ class Asset:
     def host_id(self) -> str:
         return hashlib.sha256(self.ip.encode()).hexdigest()[:16]
 
+PortInfo._keys = tuple(f.name for f in fields(PortInfo))
+Asset._keys = tuple(f.name for f in fields(Asset))
+
+# Resultados de herramientas con la forma {"assets": [Asset como dict]}
+ASSET_SOURCES = ("nmap", "tcp_sweep", "nmap_import")
+
+
+def iter_result_assets(results: Dict) -> List[Dict]:
+    """Hosts de todas las fuentes de activos presentes en job.results."""
+    out: List[Dict] = []
+    for src in ASSET_SOURCES:
+        out.extend((results.get(src) or {}).get("assets") or [])
+    return out
+
 @dataclass
 class Finding:
     id: str
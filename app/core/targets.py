@@ -0,0 +1,303 @@
+# app/core/targets.py
+"""
+Expansión de objetivos compartida por los plugins (dns_reverse, nmap, tcp_sweep).
+
+Una especificación mezcla, separados por espacios o comas:
+    10.0.0.5            IP suelta (IPv4 o IPv6)
+    10.0.0.0/16         CIDR
+    10.0.0.10-10.0.3.7  rango completo
+    10.0.1-3.*          rango por octetos estilo nmap (también 10.0.0.1-50)
+    host.example        hostname (no se resuelve aquí)
+    host.example/24     hostname con prefijo (sintaxis de nmap; se pasa tal cual)
+    fe80::1%eth0        IPv6 con zona (se pasa tal cual, como los hostnames)
+    !10.0.0.128/25      exclusión (cualquiera de las formas anteriores)
+
+Las direcciones se guardan como rangos de enteros [inicio, fin] ordenados y
+fusionados, con las exclusiones ya restadas: el tamaño en memoria depende del
+número de rangos, no del de direcciones. El recuento es O(1) y las direcciones
+se generan bajo demanda (addresses/chunks); shards() y to_nmap() las vuelven a
+escribir como objetivos de nmap.
+"""
+from __future__ import annotations
+
+import bisect
+import ipaddress
+import re
+import socket
+from itertools import islice, product
+from typing import Iterator, List, Optional, Tuple
+
+Range = Tuple[int, int]
+
+_OCTETS = re.compile(r"^[\d*-]+(\.[\d*-]+){3}$")
+# Parece una IP (solo dígitos y puntos, o con ':', que no aparece en hostnames): si no es válida es un error
+_IP_LIKE = re.compile(r"^(?:[\d.]+|.*:.*)$")
+
+
+def _octet_range(part: str) -> Range:
+    if part == "*":
+        return 0, 255
+    lo, sep, hi = part.partition("-")
+    a = int(lo) if lo else 0
+    b = (int(hi) if hi else 255) if sep else a
+    if not 0 <= a <= b <= 255:
+        raise ValueError(f"Octeto no válido: {part}")
+    return a, b
+
+
+def _parse_token(tok: str, hosts_only: bool) -> Tuple[int, List[Range]]:
+    """
+    Devuelve (versión IP, rangos) de un objetivo; (0, []) si se pasa tal cual
+    como nombre (hostname, hostname/prefijo, IPv6 con zona). Lanza ValueError
+    si tiene forma de IP, CIDR o rango pero no es válido.
+    """
+    try:
+        ip = ipaddress.ip_address(tok)
+    except ValueError:
+        pass
+    else:
+        # La zona (%eth0) no cabe en un entero: se conserva el texto original
+        if getattr(ip, "scope_id", None):
+            return 0, []
+        return ip.version, [(int(ip), int(ip))]
+    if "/" in tok:
+        addr, _, bits = tok.partition("/")
+        if not _IP_LIKE.match(addr):
+            # hostname/prefijo: nmap lo expande tras resolver; aquí se pasa como nombre
+            if bits.isdigit() and int(bits) <= 128 and addr:
+                return 0, []
+            raise ValueError(f"Objetivo no válido: {tok}")
+        try:
+            net = ipaddress.ip_network(tok, strict=False)
+        except ValueError:
+            raise ValueError(f"CIDR no válido: {tok}") from None
+        if getattr(net.network_address, "scope_id", None):
+            return 0, []
+        first, last = int(net.network_address), int(net.broadcast_address)
+        # Mismo criterio que ip_network.hosts(): sin red/broadcast (IPv6: sin la anycast de router)
+        if hosts_only and net.version == 4 and net.prefixlen < 31:
+            first, last = first + 1, last - 1
+        elif hosts_only and net.version == 6 and net.prefixlen < 127:
+            first += 1
+        return net.version, [(first, last)]
+    if "-" in tok and not _OCTETS.match(tok):
+        lo, _, hi = tok.partition("-")
+        try:
+            a, b = ipaddress.ip_address(lo), ipaddress.ip_address(hi)
+        except ValueError:
+            if _IP_LIKE.match(lo) or _IP_LIKE.match(hi):
+                raise ValueError(f"Rango no válido: {tok}") from None
+            return 0, []
+        if a.version != b.version or a > b:
+            raise ValueError(f"Rango no válido: {tok}")
+        return a.version, [(int(a), int(b))]
+    if _OCTETS.match(tok):
+        parts = [_octet_range(p) for p in tok.split(".")]
+        # Los octetos finales completos (0-255) caben en un único rango: 10.*.*.* es 1 rango, no 65536
+        j = 3
+        while j > 0 and parts[j] == (0, 255):
+            j -= 1
+        shift = 8 * (3 - j)
+        lo, hi = parts[j]
+        ranges = []
+        for combo in product(*(range(x, y + 1) for x, y in parts[:j])):
+            base = 0
+            for o in combo:
+                base = (base << 8) | o
+            base <<= 8 * (4 - j)
+            ranges.append((base | (lo << shift), base | (hi << shift) | ((1 << shift) - 1)))
+        return 4, ranges
+    if _IP_LIKE.match(tok):
+        raise ValueError(f"Dirección no válida: {tok}")
+    return 0, []
+
+
+def _merge(ranges: List[Range]) -> List[Range]:
+    out: List[Range] = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1] + 1:
+            if b > out[-1][1]:
+                out[-1] = (out[-1][0], b)
+        else:
+            out.append((a, b))
+    return out
+
+
+def _subtract(ranges: List[Range], holes: List[Range]) -> List[Range]:
+    """ranges − holes (ambos fusionados y ordenados)."""
+    out: List[Range] = []
+    i = 0
+    for a, b in ranges:
+        while i < len(holes) and holes[i][1] < a:
+            i += 1
+        j = i
+        while a <= b and j < len(holes) and holes[j][0] <= b:
+            ha, hb = holes[j]
+            if ha > a:
+                out.append((a, ha - 1))
+            a = max(a, hb + 1)
+            j += 1
+        if a <= b:
+            out.append((a, b))
+    return out
+
+
+def _v4(n: int) -> str:
+    return socket.inet_ntoa(n.to_bytes(4, "big"))
+
+
+def _v6(n: int) -> str:
+    return socket.inet_ntop(socket.AF_INET6, n.to_bytes(16, "big"))
+
+
+def _v4_tokens(a: int, b: int) -> List[str]:
+    """Rango IPv4 → objetivos de nmap: CIDR para los bloques alineados, 'a.b.c.x-y' para el resto."""
+    out: List[str] = []
+
+    def _partial(x: int, y: int) -> str:
+        size = y - x + 1
+        if size == 1:
+            return _v4(x)
+        if size & (size - 1) == 0 and x % size == 0:
+            return f"{_v4(x)}/{32 - size.bit_length() + 1}"
+        return f"{_v4(x)}-{y & 0xFF}"
+
+    block_end = a | 0xFF
+    if a & 0xFF or b < block_end:
+        out.append(_partial(a, min(b, block_end)))
+        a = min(b, block_end) + 1
+    if a > b:
+        return out
+    full_end = b if b & 0xFF == 0xFF else (b & ~0xFF) - 1
+    if full_end >= a:
+        out.extend(str(n) for n in ipaddress.summarize_address_range(
+            ipaddress.IPv4Address(a), ipaddress.IPv4Address(full_end)))
+        a = full_end + 1
+    if a <= b:
+        out.append(_partial(a, b))
+    return out
+
+
+def _v6_tokens(a: int, b: int) -> List[str]:
+    return [str(n.network_address) if n.prefixlen == 128 else str(n)
+            for n in ipaddress.summarize_address_range(ipaddress.IPv6Address(a), ipaddress.IPv6Address(b))]
+
+
+class TargetSet:
+    """Objetivos ya normalizados (ver parse_targets)."""
+    __slots__ = ("v4", "v6", "names", "address_count")
+
+    def __init__(self, v4: List[Range], v6: List[Range], names: List[str]) -> None:
+        self.v4 = v4
+        self.v6 = v6
+        self.names = names
+        self.address_count = sum(b - a + 1 for a, b in v4) + sum(b - a + 1 for a, b in v6)
+
+    @property
+    def count(self) -> int:
+        """Direcciones + hostnames (sin expandir nada)."""
+        return self.address_count + len(self.names)
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __contains__(self, item: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(item)
+        except ValueError:
+            return item in self.names
+        if getattr(ip, "scope_id", None):
+            return item in self.names
+        ranges = self.v4 if ip.version == 4 else self.v6
+        i = bisect.bisect_right(ranges, (int(ip), float("inf"))) - 1
+        return i >= 0 and ranges[i][0] <= int(ip) <= ranges[i][1]
+
+    def addresses(self) -> Iterator[str]:
+        """IPs una a una, en orden, sin materializar la lista."""
+        for a, b in self.v4:
+            for n in range(a, b + 1):
+                yield _v4(n)
+        for a, b in self.v6:
+            for n in range(a, b + 1):
+                yield _v6(n)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.addresses()
+        yield from self.names
+
+    def chunks(self, size: int) -> Iterator[List[str]]:
+        """Objetivos (IPs y luego hostnames) en listas de hasta `size`."""
+        it = iter(self)
+        while True:
+            chunk = list(islice(it, max(1, size)))
+            if not chunk:
+                return
+            yield chunk
+
+    def to_nmap(self) -> str:
+        """Los mismos objetivos como argumento de nmap (rangos compactos, exclusiones aplicadas)."""
+        tokens: List[str] = []
+        for a, b in self.v4:
+            tokens.extend(_v4_tokens(a, b))
+        for a, b in self.v6:
+            tokens.extend(_v6_tokens(a, b))
+        return " ".join(tokens + self.names)
+
+    def shards(self, prefix: int = 24, batch: int = 64) -> Iterator[str]:
+        """
+        Reparte los objetivos en shards independientes para nmap:
+        - IPv4: bloques /prefix; los trozos pequeños (IPs sueltas, restos de
+          exclusiones) se agrupan hasta sumar un bloque o `batch` objetivos.
+        - IPv6 y hostnames: grupos de `batch` objetivos.
+        """
+        size = 1 << (32 - prefix)
+        cur: List[str] = []
+        cur_size = 0
+        for a, b in self.v4:
+            while a <= b:
+                end = min(b, a | (size - 1))
+                n = end - a + 1
+                if cur and (cur_size + n > size or len(cur) >= batch):
+                    yield " ".join(cur)
+                    cur, cur_size = [], 0
+                cur.extend(_v4_tokens(a, end))
+                cur_size += n
+                a = end + 1
+        if cur:
+            yield " ".join(cur)
+        loose: List[str] = []
+        for a, b in self.v6:
+            loose.extend(_v6_tokens(a, b))
+        loose.extend(self.names)
+        for i in range(0, len(loose), batch):
+            yield " ".join(loose[i:i + batch])
+
+
+def parse_targets(spec: str, *, exclude: Optional[str] = None, hosts_only: bool = True) -> TargetSet:
+    """
+    Normaliza `spec` (y las exclusiones de `exclude`, mismo formato) a un TargetSet.
+    hosts_only=True quita la dirección de red y broadcast de los CIDR (como
+    ip_network.hosts()); para pasárselo a nmap conviene False (nmap las incluye).
+    Lanza ValueError si un objetivo con forma de IP/rango no es válido.
+    """
+    ranges = {4: [], 6: []}
+    holes = {4: [], 6: []}
+    names: dict = {}
+    excluded_names = set()
+    toks = [(t, False) for t in str(spec or "").replace(",", " ").split()]
+    toks += [(t.lstrip("!"), True) for t in str(exclude or "").replace(",", " ").split()]
+    for tok, excluded in toks:
+        if tok.startswith("!"):
+            tok, excluded = tok[1:], True
+        if not tok:
+            continue
+        version, rs = _parse_token(tok, hosts_only and not excluded)
+        if version:
+            (holes if excluded else ranges)[version].extend(rs)
+        elif excluded:
+            excluded_names.add(tok.lower())
+        else:
+            names.setdefault(tok, None)
+    v4 = _subtract(_merge(ranges[4]), _merge(holes[4]))
+    v6 = _subtract(_merge(ranges[6]), _merge(holes[6]))
+    return TargetSet(v4, v6, [n for n in names if n.lower() not in excluded_names])
@@ -0,0 +1,230 @@
+"""
+Relay de eventos entre procesos (varios workers de gunicorn en el mismo host).
+
+Cada proceso conserva su EventBus local; el relay añade:
+- Escritor: los eventos publicados localmente se insertan por lotes en una tabla
+  SQLite (WAL) compartida, en un hilo aparte para no frenar a quien emite.
+- Timbre: tras cada lote se envía un datagrama a los sockets Unix del resto de
+  procesos (uno por proceso en SHARED_STATE_DIR) para que lean sin esperar.
+- Lector: cada proceso lee las filas nuevas de otros orígenes y las entrega
+  en su bus local (EventBus.deliver), sin volver a reenviarlas.
+Si se pierde un timbre, el lector consulta igualmente cada poll_interval.
+
+La tabla guarda también (job_id, seq) de cada evento: un worker que no ejecuta
+un job recupera de ahí su historial (events), p.ej. para el replay SSE tras
+una reconexión que cae en otro worker. Solo cubre los últimos retention_secs.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.model import to_jsonable
+from app.job_manager import EVENT_BUS, Event, EventBus
+
+log = logging.getLogger(__name__)
+
+# Espera entre reintentos de un lote que no se pudo escribir (crece hasta el máximo)
+RETRY_MIN_SECS = 0.1
+RETRY_MAX_SECS = 5.0
+
+
+class SQLiteEventRelay:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bus_events (
+        id      INTEGER PRIMARY KEY AUTOINCREMENT,
+        origin  TEXT NOT NULL,
+        created REAL NOT NULL,
+        record  TEXT NOT NULL,
+        job_id  TEXT,
+        seq     INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS bus_events_created ON bus_events(created);
+    """
+    INDEXES = "CREATE INDEX IF NOT EXISTS bus_events_job ON bus_events(job_id, seq);"
+
+    def __init__(self, db_path: str, sock_dir: str, *, bus: Optional[EventBus] = None,
+                 poll_interval: float = 1.0, retention_secs: float = 600.0,
+                 batch: int = 256) -> None:
+        self.db_path = str(db_path)
+        self.sock_dir = Path(sock_dir)
+        self.bus = bus or EVENT_BUS
+        self.poll_interval = poll_interval
+        self.retention_secs = retention_secs
+        self.batch = batch
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.outbox: queue.Queue = queue.Queue()
+        self.sock_path = self.sock_dir / f"{os.getpid()}-{uuid.uuid4().hex[:6]}.sock"
+        self.sock: Optional[socket.socket] = None
+        self.stopped = threading.Event()
+
+    # -------- Arranque --------
+    def start(self) -> "SQLiteEventRelay":
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.sock_dir.mkdir(parents=True, exist_ok=True)
+        db = self._connect()
+        db.executescript(self.SCHEMA)
+        # Tablas creadas antes de guardar job_id/seq
+        cols = {r[1] for r in db.execute("PRAGMA table_info(bus_events)")}
+        for col, kind in (("job_id", "TEXT"), ("seq", "INTEGER")):
+            if col not in cols:
+                db.execute(f"ALTER TABLE bus_events ADD COLUMN {col} {kind}")
+        db.executescript(self.INDEXES)
+        # Solo interesan los eventos que se publiquen a partir de ahora
+        last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM bus_events").fetchone()[0]
+        db.close()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(str(self.sock_path))
+        self.sock.settimeout(self.poll_interval)
+
+        threading.Thread(target=self._writer, name="relay-writer", daemon=True).start()
+        threading.Thread(target=self._reader, args=(last_id,), name="relay-reader", daemon=True).start()
+        self.bus.relay = self
+        return self
+
+    def send(self, event: Event) -> None:
+        """Lo llama EventBus.publish para cada evento local (no bloquea)."""
+        self.outbox.put(event)
+
+    def events(self, job_id: str, limit: int = 500) -> List[Event]:
+        """
+        Últimos `limit` eventos de un job publicados por cualquier proceso, en
+        orden de seq. Los eventos más antiguos que retention_secs ya no están.
+        """
+        db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT record FROM (SELECT record, seq FROM bus_events WHERE job_id = ? "
+                "ORDER BY seq DESC LIMIT ?) ORDER BY seq", (job_id, max(1, limit))).fetchall()
+        finally:
+            db.close()
+        out = []
+        for (record,) in rows:
+            ev = Event.from_record(json.loads(record))
+            ev.encode()
+            out.append(ev)
+        return out
+
+    def stop(self) -> None:
+        """Para los hilos (tras escribir lo pendiente) y desengancha el relay del bus."""
+        if self.bus.relay is self:
+            self.bus.relay = None
+        self.stopped.set()
+        self.outbox.put(None)
+
+    # -------- Internals --------
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _writer(self) -> None:
+        db = self._connect()
+        last_prune = time.time()
+        while True:
+            events: List[Event] = [self.outbox.get()]
+            while len(events) < self.batch:
+                try:
+                    events.append(self.outbox.get_nowait())
+                except queue.Empty:
+                    break
+            stop = events[-1] is None
+            events = [e for e in events if e is not None]
+            if not events:
+                break
+            records = [(json.dumps(e.to_record(), ensure_ascii=False, default=to_jsonable),
+                        e.meta.get("job_id"), e.seq) for e in events]
+            # Un lote no se descarta nunca: si SQLite falla (bloqueo, disco...) se
+            # registra y se reintenta con espera creciente, reabriendo la conexión
+            delay = RETRY_MIN_SECS
+            while True:
+                now = time.time()
+                try:
+                    with db:
+                        db.executemany("INSERT INTO bus_events (origin, created, record, job_id, seq) "
+                                       "VALUES (?, ?, ?, ?, ?)",
+                                       [(self.origin, now, *r) for r in records])
+                    break
+                except sqlite3.Error:
+                    log.exception("Relay: no se pudo escribir un lote de %d eventos; reintento en %.1fs",
+                                  len(records), delay)
+                    time.sleep(delay)
+                    delay = min(RETRY_MAX_SECS, delay * 2)
+                    try:
+                        db.close()
+                        db = self._connect()
+                    except sqlite3.Error:
+                        pass
+            self._ring()
+            if stop:
+                break
+            if now - last_prune > 60:
+                last_prune = now
+                try:
+                    with db:
+                        db.execute("DELETE FROM bus_events WHERE created < ?", (now - self.retention_secs,))
+                except sqlite3.Error:
+                    log.exception("Relay: falló la purga de eventos antiguos")
+        db.close()
+
+    def _ring(self) -> None:
+        """Avisa al resto de procesos de que hay eventos nuevos."""
+        for path in self.sock_dir.glob("*.sock"):
+            if path == self.sock_path:
+                continue
+            try:
+                self.sock.sendto(b"!", str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Proceso muerto: su socket ya no escucha
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+    def _reader(self, last_id: int) -> None:
+        db = self._connect()
+        while not self.stopped.is_set():
+            try:
+                self.sock.recv(64)
+            except socket.timeout:
+                pass
+            except OSError:
+                time.sleep(self.poll_interval)
+            try:
+                rows = db.execute(
+                    "SELECT id, origin, record FROM bus_events WHERE id > ? ORDER BY id",
+                    (last_id,)).fetchall()
+            except sqlite3.Error:
+                log.exception("Relay: no se pudieron leer eventos nuevos")
+                continue
+            for row_id, origin, record in rows:
+                last_id = row_id
+                if origin == self.origin:
+                    continue
+                ev = Event.from_record(json.loads(record))
+                ev.encode()
+                self.bus.deliver(ev)
+        db.close()
+        self.sock.close()
+        try:
+            self.sock_path.unlink()
+        except OSError:
+            pass
+
+
+def start_event_relay(db_path: str, sock_dir: str, **kwargs) -> SQLiteEventRelay:
+    """Crea el relay, lo engancha a EVENT_BUS y arranca sus hilos."""
+    return SQLiteEventRelay(db_path, sock_dir, **kwargs).start()
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import os
+import json
 import uuid
+import logging
 import queue
 import threading
 import inspect
-from dataclasses import dataclass, field, asdict
+from collections import OrderedDict, deque
+from itertools import count, islice
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Registro de plugins (nmap, local_enum, dns_reverse, etc.)
 from app.plugins import get_available_tools
@@ -15,6 +21,12 @@ from app.plugins import get_available_tools
 # Exportadores (JSONL + HTML)
 from app.modules.reporting.export import export_to_jsonl, export_to_html
 
+# Almacén de jobs (memoria o SQLite con LRU caliente)
+from app.core.model import to_jsonable
+from app.job_store import FINISHED_STATUSES, JobStore, MemoryJobStore
+
+log = logging.getLogger(__name__)
+
 
 # =========================
 #   Eventos y EventBus
@@ -22,41 +34,426 @@ from app.modules.reporting.export import export_to_jsonl, export_to_html
 
 class Event:
     """Evento simple para publicar en el bus y reemitir por SSE."""
-    def __init__(self, kind: str, payload: dict, meta: Optional[dict] = None):
+    def __init__(self, kind: str, payload: dict, meta: Optional[dict] = None,
+                 seq: Optional[int] = None):
         self.kind = kind
         self.payload = payload
         self.meta = meta or {}
+        self.seq = seq          # nº de secuencia dentro del job (lo asigna EventLog)
+        self.frame: Optional[bytes] = None   # trama SSE pre-codificada (ver encode)
+
+    def encode(self) -> bytes:
+        """
+        Devuelve la trama SSE del evento (id/event/data) ya codificada en bytes.
+        Se construye una sola vez y se comparte entre todos los suscriptores.
+        """
+        frame = self.frame
+        if frame is None:
+            job_id = self.meta.get("job_id")
+            payload = self.payload
+            if job_id and "job_id" not in payload:
+                payload = {**payload, "job_id": job_id}
+            data = json.dumps(payload, ensure_ascii=False, default=to_jsonable)
+            # id = seq del evento en su job: el navegador lo devuelve en Last-Event-ID al reconectar
+            id_line = f"id: {self.seq}\n" if self.seq is not None else ""
+            frame = self.frame = f"{id_line}event: {self.kind}\ndata: {data}\n\n".encode("utf-8")
+        return frame
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "kind": self.kind, "payload": self.payload, "meta": self.meta}
+
+    @classmethod
+    def from_record(cls, rec: Dict[str, Any]) -> "Event":
+        return cls(rec.get("kind", "message"), rec.get("payload") or {}, rec.get("meta"), rec.get("seq"))
+
+
+class EventLog:
+    """
+    Registro de eventos de un job en un buffer circular de capacidad fija.
+    - Cada evento recibe un nº de secuencia monotónico (1, 2, 3...).
+    - tail(k) y since(seq) cuestan O(k), da igual lo largo que sea el job.
+    - Opcionalmente vuelca TODOS los eventos a un JSONL (spill_path) para poder
+      servir secuencias que ya salieron del buffer; se indexa un offset cada
+      INDEX_EVERY eventos para no tener que leer el fichero desde el principio.
+    """
+    INDEX_EVERY = 1024
+
+    def __init__(self, capacity: int = 500, spill_path: Optional[str] = None,
+                 last_seq: int = 0, offsets: Optional[List[int]] = None) -> None:
+        self.buf: deque[Event] = deque(maxlen=max(1, capacity))
+        self.spill_path = spill_path
+        self.last_seq = last_seq
+        self.offsets: List[int] = list(offsets or [])   # offsets[i] = byte donde empieza seq i*INDEX_EVERY+1
+        self.lock = threading.Lock()
+        # Fichero de volcado abierto una sola vez (en append) hasta close()
+        self._fh = None
+
+    def append(self, event: Event) -> int:
+        with self.lock:
+            self.last_seq += 1
+            event.seq = self.last_seq
+            self.buf.append(event)
+            if self.spill_path:
+                self._spill(event)
+            return event.seq
+
+    def tail(self, k: int) -> List[Event]:
+        """Últimos k eventos (orden cronológico)."""
+        with self.lock:
+            out = list(islice(reversed(self.buf), max(0, k)))
+        out.reverse()
+        return out
+
+    def since(self, seq: int, limit: Optional[int] = None) -> List[Event]:
+        """Eventos con secuencia > seq (del buffer y, si hace falta, del volcado a disco)."""
+        with self.lock:
+            missing = self.last_seq - seq
+            if missing <= 0:
+                return []
+            first_seq = self.last_seq - len(self.buf) + 1
+            if seq + 1 >= first_seq or not self.spill_path:
+                out = list(islice(reversed(self.buf), min(missing, len(self.buf))))
+                out.reverse()
+                return out[:limit] if limit is not None else out
+            if self._fh is not None:
+                self._fh.flush()    # lo escrito hasta ahora, visible para la lectura
+        return self._read_spill(seq, missing if limit is None else min(missing, limit))
+
+    def close(self) -> None:
+        """Cierra el volcado a disco (job terminado); un append posterior lo reabre."""
+        with self.lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def index_spill(self) -> None:
+        """Reconstruye offsets leyendo el volcado (jobs persistidos sin índice)."""
+        if not self.spill_path or self.offsets:
+            return
+        offsets: List[int] = []
+        try:
+            with open(self.spill_path, "rb") as f:
+                pos = 0
+                for n, line in enumerate(f):
+                    if n % self.INDEX_EVERY == 0:
+                        offsets.append(pos)
+                    pos += len(line)
+        except OSError:
+            return
+        with self.lock:
+            self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.buf))
+
+    # -------- Internals --------
+    def _spill(self, event: Event) -> None:
+        # Llamado con self.lock adquirido
+        line = (json.dumps(event.to_record(), ensure_ascii=False, default=to_jsonable) + "\n").encode("utf-8")
+        f = self._fh
+        if f is None:
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            f = self._fh = open(self.spill_path, "ab")
+        if (event.seq - 1) % self.INDEX_EVERY == 0:
+            self.offsets.append(f.tell())
+        f.write(line)
+
+    def _read_spill(self, seq: int, count: int) -> List[Event]:
+        block = seq // self.INDEX_EVERY
+        out: List[Event] = []
+        try:
+            with open(self.spill_path, "rb") as f:
+                if block < len(self.offsets):
+                    f.seek(self.offsets[block])
+                    current = block * self.INDEX_EVERY
+                else:
+                    current = 0
+                for line in f:
+                    current += 1
+                    if current <= seq:
+                        continue
+                    out.append(Event.from_record(json.loads(line)))
+                    if len(out) >= count:
+                        break
+        except (OSError, ValueError):
+            pass
+        return out
+
+
+# Topics del bus
+TOPIC_ALL = "*"                 # firehose: todos los eventos de todos los jobs
+TOPIC_STATUS = "status"         # solo cambios de estado/progreso (listados de jobs)
+STATUS_KINDS = {"job_created", "status", "progress", "finished"}
+
+
+def job_topic(job_id: str) -> str:
+    """Topic con los eventos de un único job."""
+    return f"job:{job_id}"
+
+
+# Políticas de desbordamiento de las colas de suscriptor
+OVERFLOW_DROP_OLDEST = "drop_oldest"   # se descarta el evento más antiguo pendiente
+OVERFLOW_COALESCE = "coalesce"         # progress/status del mismo job se fusionan; si aun así no cabe, drop_oldest
+OVERFLOW_DISCONNECT = "disconnect"     # se cierra la suscripción (el cliente SSE reconecta)
+OVERFLOW_POLICIES = {OVERFLOW_DROP_OLDEST, OVERFLOW_COALESCE, OVERFLOW_DISCONNECT}
+COALESCE_KINDS = {"progress", "status"}
+
+
+class SubscriptionClosed(Exception):
+    """La suscripción se cerró (p.ej. por desbordamiento con política 'disconnect')."""
+
+
+class Subscription:
+    """
+    Cola acotada de un suscriptor del bus. Misma interfaz de lectura que queue.Queue
+    (get/get_nowait lanzan queue.Empty) y put() no bloquea nunca al publicador:
+    si el consumidor va lento se aplica la política de desbordamiento.
+    Con 'coalesce', un progress/status nuevo sustituye al pendiente del mismo job
+    (el consumidor lento recibe el estado, no la historia).
+    """
+    def __init__(self, topic: str, maxsize: int = 256, policy: str = OVERFLOW_COALESCE) -> None:
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento desconocida: {policy}")
+        self.topic = topic
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.pending: "OrderedDict[Any, Event]" = OrderedDict()
+        self.keys = count()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, event: Event) -> bool:
+        """Encola sin bloquear. Devuelve False si la suscripción está (o queda) cerrada."""
+        with self.cond:
+            if self.closed:
+                return False
+            key: Any = None
+            if self.policy == OVERFLOW_COALESCE and event.kind in COALESCE_KINDS:
+                key = (event.kind, event.meta.get("job_id"))
+                if self.pending.pop(key, None) is not None:
+                    self.dropped += 1
+            if key is None:
+                key = next(self.keys)
+            if len(self.pending) >= self.maxsize:
+                if self.policy == OVERFLOW_DISCONNECT:
+                    self.closed = True
+                    self.pending.clear()
+                    self.cond.notify_all()
+                    return False
+                self.pending.popitem(last=False)
+                self.dropped += 1
+            self.pending[key] = event
+            self.cond.notify()
+            return True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Event:
+        with self.cond:
+            if block:
+                self.cond.wait_for(lambda: self.pending or self.closed, timeout)
+            if self.pending:
+                return self.pending.popitem(last=False)[1]
+            if self.closed:
+                raise SubscriptionClosed(self.topic)
+            raise queue.Empty
+
+    def get_nowait(self) -> Event:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        with self.cond:
+            return len(self.pending)
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
 
 
 class EventBus:
-    """Bus en memoria; cada suscriptor recibe una Queue con eventos."""
-    def __init__(self) -> None:
-        self.subs: set[queue.Queue] = set()
+    """
+    Bus en memoria con suscripción por topic; cada suscriptor recibe una
+    Subscription (cola acotada con política de desbordamiento).
+    publish() solo entrega a los suscriptores interesados (O(interesados)):
+    firehose (TOPIC_ALL), el topic del job y, si aplica, TOPIC_STATUS.
+    """
+    def __init__(self, maxsize: int = 256, policy: str = OVERFLOW_COALESCE) -> None:
+        # topic -> tupla de suscripciones (copy-on-write: publish lee sin copiar)
+        self.topics: Dict[str, Tuple[Subscription, ...]] = {}
+        self.maxsize = maxsize
+        self.policy = policy
         self.lock = threading.Lock()
-
-    def subscribe(self) -> queue.Queue:
-        q: queue.Queue = queue.Queue()
+        # Relay opcional entre procesos (app/event_relay.py); None = bus solo local
+        self.relay = None
+
+    def configure(self, *, maxsize: Optional[int] = None, policy: Optional[str] = None) -> None:
+        """Valores por defecto para las nuevas suscripciones (lo llama create_app)."""
+        if policy is not None and policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de desbordamiento desconocida: {policy}")
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if policy is not None:
+            self.policy = policy
+
+    def subscribe(self, topic: str = TOPIC_ALL, *, maxsize: Optional[int] = None,
+                  policy: Optional[str] = None) -> Subscription:
+        sub = Subscription(topic, maxsize or self.maxsize, policy or self.policy)
         with self.lock:
-            self.subs.add(q)
-        return q
+            self.topics[topic] = self.topics.get(topic, ()) + (sub,)
+        return sub
 
-    def unsubscribe(self, q: queue.Queue) -> None:
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.close()
         with self.lock:
-            self.subs.discard(q)
+            subs = tuple(s for s in self.topics.get(sub.topic, ()) if s is not sub)
+            if subs:
+                self.topics[sub.topic] = subs
+            else:
+                self.topics.pop(sub.topic, None)
+
+    @staticmethod
+    def topics_for(event: Event) -> Tuple[str, ...]:
+        job_id = (event.meta or {}).get("job_id")
+        topics = (TOPIC_ALL, job_topic(job_id)) if job_id else (TOPIC_ALL,)
+        if event.kind in STATUS_KINDS:
+            topics += (TOPIC_STATUS,)
+        return topics
 
     def publish(self, event: Event) -> None:
-        with self.lock:
-            subs = list(self.subs)
-        for q in subs:
-            try:
-                q.put(event, block=False)
-            except queue.Full:
-                pass
+        """Entrega local + reenvío al resto de procesos si hay relay."""
+        self.deliver(event)
+        relay = self.relay
+        if relay is not None:
+            relay.send(event)
+
+    def deliver(self, event: Event) -> None:
+        """Entrega solo a los suscriptores de este proceso."""
+        topics = self.topics
+        for topic in self.topics_for(event):
+            for sub in topics.get(topic, ()):
+                sub.put(event)
 
 
 EVENT_BUS = EventBus()
 
 
+# =========================
+#   Planificador de Jobs
+# =========================
+
+class QueueFull(RuntimeError):
+    """La cola de jobs pendientes ha alcanzado su capacidad máxima."""
+
+
+def parse_tool_limits(spec: str) -> Dict[str, int]:
+    """Convierte 'nmap=2,theharvester=1' en {'nmap': 2, 'theharvester': 1}."""
+    limits: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        name, sep, value = part.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            limits[name.strip()] = int(value)
+        except ValueError:
+            continue
+    return limits
+
+
+class JobScheduler:
+    """
+    Planificador global de jobs:
+    - cola FIFO acotada de jobs pendientes (max_queue)
+    - número fijo de hilos que ejecutan jobs (max_jobs)
+    - límite global de herramientas en ejecución compartido por todos los jobs (max_tools)
+    - límites por herramienta (p.ej. {"nmap": 2, "theharvester": 1})
+    Si runner lanza una excepción se registra y se llama a on_error(job, ex).
+    """
+    def __init__(self, runner: Callable[["Job"], None], *, max_jobs: int = 2,
+                 max_queue: int = 100, max_tools: int = 4,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 on_error: Optional[Callable[["Job", Exception], None]] = None) -> None:
+        self.runner = runner
+        self.on_error = on_error
+        self.max_jobs = max(1, max_jobs)
+        self.max_queue = max(1, max_queue)
+        self.max_tools = max(1, max_tools)
+        self.tool_limits = {k: v for k, v in (tool_limits or {}).items() if v > 0}
+        self.pending: deque[Job] = deque()
+        self.cond = threading.Condition()
+        self.tool_slots = threading.BoundedSemaphore(self.max_tools)
+        self.per_tool = {name: threading.BoundedSemaphore(n) for name, n in self.tool_limits.items()}
+        self.workers: List[threading.Thread] = []
+
+    def submit(self, job: "Job") -> int:
+        """Encola el job y devuelve su posición (1 = siguiente). Lanza QueueFull si no cabe."""
+        with self.cond:
+            if len(self.pending) >= self.max_queue:
+                raise QueueFull(f"Cola de jobs llena ({self.max_queue} pendientes)")
+            self.pending.append(job)
+            self._ensure_workers()
+            self.cond.notify()
+            return len(self.pending)
+
+    def depth(self) -> int:
+        with self.cond:
+            return len(self.pending)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Posición 1-based del job en la cola, o None si ya no está pendiente."""
+        with self.cond:
+            for i, j in enumerate(self.pending, start=1):
+                if j.id == job_id:
+                    return i
+        return None
+
+    @contextmanager
+    def tool_slot(self, name: str):
+        """
+        Reserva hueco para ejecutar una herramienta.
+        Orden fijo (límite por tool → límite global) para no retener un hueco
+        global mientras se espera al límite propio de la herramienta.
+        """
+        sem = self.per_tool.get(name)
+        if sem:
+            sem.acquire()
+        try:
+            with self.tool_slots:
+                yield
+        finally:
+            if sem:
+                sem.release()
+
+    # -------- Internals --------
+    def _ensure_workers(self) -> None:
+        # Llamado con self.cond adquirido
+        self.workers = [w for w in self.workers if w.is_alive()]
+        while len(self.workers) < self.max_jobs:
+            w = threading.Thread(target=self._worker, name=f"job-worker-{len(self.workers)}", daemon=True)
+            self.workers.append(w)
+            w.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                job = self.pending.popleft()
+            try:
+                self.runner(job)
+            except Exception as ex:
+                # Nunca dejamos morir el hilo, pero el job no puede quedarse "running"
+                log.exception("Error no controlado ejecutando el job %s", job.id)
+                if self.on_error is not None:
+                    try:
+                        self.on_error(job, ex)
+                    except Exception:
+                        log.exception("No se pudo marcar como fallido el job %s", job.id)
+
+
 # =========================
 #   Modelo de Job
 # =========================
@@ -71,57 +468,121 @@ class Job:
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     results: Dict[str, Any] = field(default_factory=dict)
     errors: Dict[str, str] = field(default_factory=dict)
-    events: List[Event] = field(default_factory=list)  # replay para SSE
+    events: EventLog = field(default_factory=EventLog)  # replay para SSE (buffer circular)
     report_file: Optional[str] = None
     meta: Dict[str, Any] = field(default_factory=dict)
+    # Progreso por herramienta: {"nmap": {"percent": 42.0, "remaining": 120, "eta": "...Z"}}
+    tool_progress: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
+        d = {f.name: getattr(self, f.name) for f in fields(self) if f.name != "events"}
         # No “inundar” con eventos: deja solo los últimos 100
-        d["events"] = [{"kind": e.kind, "payload": e.payload, "meta": e.meta}
-                       for e in self.events[-100:]]
+        d["events"] = [e.to_record() for e in self.events.tail(100)]
+        d["events_seq"] = self.events.last_seq
+        # Posición en la cola del planificador (solo mientras está pendiente)
+        scheduler = getattr(self, "scheduler", None)
+        if scheduler is not None:
+            d["queue"] = {
+                "position": scheduler.position(self.id) if self.status == "queued" else None,
+                "depth": scheduler.depth(),
+            }
         return d
 
+    def to_record(self) -> Dict[str, Any]:
+        """Representación persistible (JSON) del job, con los últimos 100 eventos."""
+        return {
+            "id": self.id, "target": self.target, "tools": self.tools,
+            "status": self.status, "progress": self.progress, "created_at": self.created_at,
+            "results": self.results, "errors": self.errors, "report_file": self.report_file,
+            "meta": self.meta, "tool_progress": self.tool_progress,
+            "events": [e.to_record() for e in self.events.tail(100)],
+            "events_seq": self.events.last_seq,
+            "events_spill": self.events.spill_path,
+            "events_offsets": self.events.offsets,
+        }
+
+    @classmethod
+    def from_record(cls, rec: Dict[str, Any]) -> "Job":
+        data = {k: rec[k] for k in ("id", "target", "tools", "status", "progress", "created_at",
+                                    "results", "errors", "report_file", "meta", "tool_progress")
+                if k in rec}
+        job = cls(**data)
+        events = [Event.from_record(e) for e in rec.get("events") or []]
+        job.events = EventLog(capacity=max(100, len(events)), spill_path=rec.get("events_spill"),
+                              last_seq=rec.get("events_seq") or len(events),
+                              offsets=rec.get("events_offsets"))
+        job.events.buf.extend(events)
+        # Records anteriores al índice persistido: se rehace leyendo el volcado
+        job.events.index_spill()
+        return job
+
 
 # =========================
 #   Gestor de Jobs
 # =========================
 
 class JobManager:
-    def __init__(self, max_workers: int = 4, report_dir: str = "reports/output") -> None:
+    def __init__(self, max_workers: int = 4, report_dir: str = "reports/output", *,
+                 max_jobs: int = 2, max_queue: int = 100,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 store: Optional[JobStore] = None,
+                 events_capacity: int = 500, events_spill: bool = False,
+                 tool_defaults: Optional[Dict[str, Any]] = None) -> None:
+        # max_workers: tope GLOBAL de herramientas ejecutándose a la vez (todos los jobs)
         self.max_workers = max_workers
         self.report_dir = report_dir
-        self.jobs: Dict[str, Job] = {}
+        # Eventos por job: buffer circular + volcado opcional a <report_dir>/events/<job>.jsonl
+        self.events_capacity = events_capacity
+        self.events_spill = events_spill
+        # Opciones por defecto de los plugins (p.ej. nmap_max_procs); el meta del job manda
+        self.tool_defaults = dict(tool_defaults or {})
+        # Almacén de jobs: por defecto en memoria; create_app usa SQLite (ver job_store)
+        self.jobs: JobStore = store or MemoryJobStore()
+        self.jobs.bind(self.load_job, self.job_files)
+        self.jobs.recover()
         self.lock = threading.Lock()
+        self.scheduler = JobScheduler(self._run_job, max_jobs=max_jobs, max_queue=max_queue,
+                                      max_tools=max_workers, tool_limits=tool_limits,
+                                      on_error=self._fail_job)
+
+    def load_job(self, record: Dict[str, Any]) -> Job:
+        """Reconstruye un Job persistido (lo usa el JobStore al cargar de disco)."""
+        job = Job.from_record(record)
+        setattr(job, "report_dir", self.report_dir)
+        return job
+
+    def job_files(self, record: Dict[str, Any]) -> List[str]:
+        """Ficheros que genera un job (los borra el JobStore al aplicar la retención)."""
+        jid = record.get("id") or ""
+        report_dir = (record.get("meta") or {}).get("report_dir") or self.report_dir
+        names = [f"results_{jid}.jsonl", f"report_{jid}.html", f"shodan_{jid}.jsonl"]
+        names += [f"theharvester_{jid[:8]}{ext}" for ext in (".html", ".xml", ".json")]
+        if record.get("report_file"):
+            names.append(record["report_file"])
+        paths = [os.path.join(report_dir, n) for n in dict.fromkeys(names)]
+        if record.get("events_spill"):
+            paths.append(record["events_spill"])
+        # Directorio con los XML subidos a /api/ingest (normalmente ya borrado)
+        if (record.get("meta") or {}).get("import_dir"):
+            paths.append(record["meta"]["import_dir"])
+        return paths
 
     # -------- API pública --------
-    def list_jobs(self) -> List[Job]:
-        with self.lock:
-            return list(self.jobs.values())
+    def list_jobs(self, limit: Optional[int] = 200) -> List[Job]:
+        return self.jobs.list(limit)
 
     def get(self, job_id: str) -> Optional[Job]:
-        with self.lock:
-            return self.jobs.get(job_id)
+        job = self.jobs.get(job_id)
+        if job is not None and not self.jobs.is_local(job):
+            self._load_events(job)
+        return job
 
     def enqueue(self, *, target: str, tools: List[str],
                 meta: Optional[Dict[str, Any]] = None) -> str:
-        """Crea el job, emite 'job_created' (para pintar fila instantánea) y lanza el hilo."""
-        job_id = uuid.uuid4().hex
-        job = Job(id=job_id, target=target, tools=tools, meta=meta or {})
-        setattr(job, "report_dir", self.report_dir)
-        with self.lock:
-            self.jobs[job_id] = job
-
-        # Aviso inmediato para la UI (aparece en tabla al pulsar el botón)
-        self._emit(job, "job_created", {
-            "job_id": job.id,
-            "status": job.status,
-            "tools": job.tools,
-            "progress": job.progress,
-        })
-
-        threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
-        return job_id
+        """Crea el job, emite 'job_created' (para pintar fila instantánea) y lo encola."""
+        job = self.create_job(target=target, tools=tools, meta=meta)
+        self.start_job(job)
+        return job.id
 
 
        # ----- Métodos añadidos para compatibilidad con la UI -----
@@ -133,37 +594,103 @@ class JobManager:
         Devuelve la instancia de Job con un id único.
         """
         job_id = uuid.uuid4().hex
-        meta = {**(meta or {}), "job_id": job_id, "report_dir": self.report_dir}
-        job = Job(id=job_id, target=target, tools=tools, meta=meta or {})
+        meta = {**self.tool_defaults, **(meta or {}), "job_id": job_id, "report_dir": self.report_dir}
+        spill = os.path.join(self.report_dir, "events", f"{job_id}.jsonl") if self.events_spill else None
+        job = Job(id=job_id, target=target, tools=tools, meta=meta or {},
+                  events=EventLog(self.events_capacity, spill_path=spill))
         setattr(job, "report_dir", self.report_dir)
-        with self.lock:
-            self.jobs[job_id] = job
+        setattr(job, "scheduler", self.scheduler)
+        self.jobs.put(job)
         return job
 
     def start_job(self, job: Job) -> None:
         """
-        Arranca la ejecución de un job previamente creado.
-        Emite el evento 'job_created' y lanza la ejecución en un hilo.
+        Encola en el planificador un job previamente creado y emite 'job_created'.
+        Lanza QueueFull si la cola está llena (el job queda marcado como 'rejected').
         """
         # No reiniciar trabajos ya en curso o finalizados
         if job.status != "queued":
             return
-        # Aviso inmediato para la UI
+        # Aviso inmediato para la UI (antes de encolar: un worker libre podría
+        # arrancarlo en el acto y 'status' llegaría antes que 'job_created')
         self._emit(job, "job_created", {
             "job_id": job.id,
             "status": job.status,
             "tools": job.tools,
             "progress": job.progress,
+            "queue_position": self.scheduler.depth() + 1,
         })
-        threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+        try:
+            self.scheduler.submit(job)
+        except QueueFull:
+            job.status = "rejected"
+            self._emit(job, "status", {"status": job.status})
+            job.events.close()
+            self.jobs.save(job)
+            raise
 
     # -------- Internals --------
+    def _load_events(self, job: Job) -> None:
+        """
+        Job en curso en otro proceso: su record en disco no lleva eventos; se
+        recuperan del relay (tabla compartida) para que el replay SSE y
+        /api/jobs/<id> funcionen en cualquier worker.
+        """
+        relay = EVENT_BUS.relay
+        if relay is None:
+            return
+        events = relay.events(job.id, self.events_capacity)
+        if not events:
+            return
+        log = EventLog(self.events_capacity, spill_path=job.events.spill_path,
+                       last_seq=max(events[-1].seq or 0, job.events.last_seq))
+        log.buf.extend(events)
+        job.events = log
+
     def _emit(self, job: Job, kind: str, payload: Dict[str, Any]) -> None:
-        """Publica un evento y lo guarda para replay. Añade siempre job_id."""
+        """Publica un evento y lo guarda para replay (asigna seq y trama SSE). Añade siempre job_id."""
         payload.setdefault("job_id", job.id)
         e = Event(kind, payload, meta={"job_id": job.id})
         job.events.append(e)
+        e.encode()          # se serializa UNA vez; el fan-out SSE reutiliza los bytes
         EVENT_BUS.publish(e)
+        # Con almacén compartido entre procesos, el estado visible va al día
+        if kind in STATUS_KINDS:
+            self.jobs.sync(job)
+
+    def _fail_job(self, job: Job, ex: Exception) -> None:
+        """El job falló fuera de las herramientas (lo llama el planificador): queda en 'error'."""
+        if job.status not in FINISHED_STATUSES:
+            job.status = "error"
+            job.errors.setdefault("job", str(ex))
+            self._emit(job, "status", {"status": job.status, "error": str(ex)})
+            self._emit(job, "finished", {"status": job.status})
+        job.events.close()
+        self.jobs.save(job)
+
+    def _tool_emit(self, job: Job, name: str, msg: Any) -> None:
+        """
+        emit() que reciben los plugins. Un dict {"progress": {"percent": ..}} se
+        convierte en evento 'progress' del job; lo demás va como 'log'.
+        """
+        if isinstance(msg, dict) and isinstance(msg.get("progress"), dict):
+            info = msg["progress"]
+            job.tool_progress[name] = info
+            # nmap reinicia el % en cada fase (ping, SYN, -sV...): la barra global no retrocede
+            job.progress = max(job.progress, min(99, self._job_progress(job)))
+            self._emit(job, "progress", {"progress": job.progress, "tool": name,
+                                         "tool_progress": info.get("percent"),
+                                         "remaining": info.get("remaining"),
+                                         "eta": info.get("eta")})
+            return
+        self._emit(job, "log", {"tool": name, "msg": msg})
+
+    @staticmethod
+    def _job_progress(job: Job) -> int:
+        """Progreso global = media del progreso de cada herramienta (0-100)."""
+        total = max(1, len(job.tools))
+        pct = sum(min(100.0, float(p.get("percent") or 0)) for p in job.tool_progress.values())
+        return min(100, int(pct / total))
 
     def _run_tool(self, name: str, job: Job) -> Tuple[str, Any]:
         """Ejecuta un plugin/tool concreto y devuelve (nombre, salida)."""
@@ -176,7 +703,7 @@ class JobManager:
 
         # Construimos kwargs y filtramos según la firma real del runner
         candidate_kwargs = {
-            "emit": lambda m: self._emit(job, "log", {"tool": name, "msg": m}),
+            "emit": lambda m: self._tool_emit(job, name, m),
             "meta": job.meta,
             "target": job.target,  # por si algún runner declara 'target' como kw
         }
@@ -188,7 +715,9 @@ class JobManager:
         if "target" not in kwargs:
             args.append(job.target)
 
-        out = runner(*args, **kwargs)
+        # Respeta el tope global y el límite propio de la herramienta
+        with self.scheduler.tool_slot(name):
+            out = runner(*args, **kwargs)
 
         self._emit(job, "log", {"tool": name, "msg": "fin"})
         return name, out
@@ -202,10 +731,10 @@ class JobManager:
         errors: Dict[str, str] = {}
 
         total = max(1, len(job.tools))
-        done = 0
 
-        # Ejecuta todas las herramientas del job en paralelo
-        with ThreadPoolExecutor(max_workers=min(total, self.max_workers)) as pool:
+        # Ejecuta las herramientas del job en paralelo; la concurrencia real la
+        # limita el planificador (tool_slot), compartido entre todos los jobs
+        with ThreadPoolExecutor(max_workers=total) as pool:
             futures = {pool.submit(self._run_tool, t, job): t for t in job.tools}
 
             for f in as_completed(futures):
@@ -217,9 +746,10 @@ class JobManager:
                     errors[tool_name] = str(ex)
                     self._emit(job, "log", {"tool": tool_name, "msg": f"ERROR: {ex}"})
                 finally:
-                    done += 1
-                    job.progress = int(done * 100 / total)
-                    self._emit(job, "progress", {"progress": job.progress})
+                    job.tool_progress[tool_name] = {"percent": 100.0, "remaining": 0}
+                    job.progress = max(job.progress, self._job_progress(job))
+                    self._emit(job, "progress", {"progress": job.progress, "tool": tool_name,
+                                                 "tool_progress": 100.0})
 
         # Guardar resultados y errores
         job.results, job.errors = results, errors
@@ -247,4 +777,8 @@ class JobManager:
         payload = {"status": job.status}
         if report_name:
             payload["report"] = report_name
-        self._emit(job, "status", payload)
\ No newline at end of file
+        self._emit(job, "status", payload)
+        job.events.close()
+
+        # Persistir: a partir de aquí el job puede salir de RAM
+        self.jobs.save(job)
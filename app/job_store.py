@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.core.model import to_jsonable
+
+# Estados a partir de los cuales un job ya no cambia y puede salir de RAM
+FINISHED_STATUSES = {"done", "error", "rejected", "interrupted"}
+
+
+# =========================
+#   Interfaz
+# =========================
+
+class JobStore(ABC):
+    """
+    Almacén de jobs del JobManager.
+    - put(job):   registra un job nuevo (queda "caliente" en memoria)
+    - save(job):  persiste el estado actual (p.ej. al terminar)
+    - get(id):    devuelve el job completo (cargándolo si hace falta)
+    - list():     jobs en orden de creación (el más antiguo primero)
+    """
+    @abstractmethod
+    def put(self, job) -> None: ...
+
+    @abstractmethod
+    def save(self, job) -> None: ...
+
+    @abstractmethod
+    def get(self, job_id: str): ...
+
+    @abstractmethod
+    def list(self, limit: Optional[int] = None) -> List[Any]: ...
+
+    def bind(self, decode: Callable[[Dict[str, Any]], Any],
+             files: Optional[Callable[[Dict[str, Any]], Iterable[str]]] = None) -> None:
+        """
+        Lo llama el JobManager al recibir el almacén: decode(record) reconstruye
+        un Job persistido y files(record) lista los ficheros del job en disco.
+        """
+        return None
+
+    def is_local(self, job) -> bool:
+        """
+        True si la copia del job de este proceso está completa (eventos
+        incluidos): el job se ejecuta aquí o ya terminó.
+        """
+        return True
+
+    def sync(self, job) -> None:
+        """Publica el estado intermedio (status/progress) a otros procesos, si aplica."""
+        return None
+
+    def prune(self) -> int:
+        return 0
+
+    def recover(self) -> int:
+        return 0
+
+
+class MemoryJobStore(JobStore):
+    """Comportamiento clásico: dict en memoria, sin persistencia ni expulsión."""
+    def __init__(self) -> None:
+        self.jobs: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+
+    def put(self, job) -> None:
+        with self.lock:
+            self.jobs[job.id] = job
+
+    def save(self, job) -> None:
+        self.put(job)
+
+    def get(self, job_id: str):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self, limit: Optional[int] = None) -> List[Any]:
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return jobs[-limit:] if limit else jobs
+
+
+# =========================
+#   SQLite + LRU caliente
+# =========================
+
+class SQLiteJobStore(JobStore):
+    """
+    LRU en memoria de jobs "calientes" respaldado por SQLite.
+    - Los jobs en cola/ejecución nunca se expulsan de RAM.
+    - Los finalizados se persisten y se expulsan cuando el LRU supera hot_size;
+      get() los vuelve a cargar bajo demanda.
+    - Retención configurable por antigüedad (max_age_days) y número (max_count).
+    - shared=True: varios procesos (workers de gunicorn) comparten la base de
+      datos. Cada job tiene un proceso dueño; el resto nunca se fía de su copia
+      en RAM de un job ajeno sin terminar y lo relee de disco, y sync() escribe
+      los cambios de estado/progreso para que los vean los demás.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id          TEXT PRIMARY KEY,
+        created_at  TEXT NOT NULL,
+        updated_at  REAL NOT NULL,
+        status      TEXT NOT NULL,
+        target      TEXT,
+        tools       TEXT,
+        progress    INTEGER,
+        report_file TEXT,
+        owner       TEXT,
+        record      TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS jobs_created ON jobs(created_at);
+    CREATE INDEX IF NOT EXISTS jobs_updated ON jobs(status, updated_at);
+    """
+
+    def __init__(self, path: str, *, decode: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 files: Optional[Callable[[Dict[str, Any]], Iterable[str]]] = None,
+                 hot_size: int = 64, max_age_days: Optional[float] = None,
+                 max_count: Optional[int] = None, shared: bool = False) -> None:
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.decode = decode
+        self.files = files
+        self.hot_size = max(1, hot_size)
+        self.max_age_days = max_age_days
+        self.max_count = max_count
+        self.shared = shared
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.owned: set = set()
+        self.hot: "OrderedDict[str, Any]" = OrderedDict()
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(self.SCHEMA)
+        # Bases de datos creadas antes de existir la columna 'owner'
+        cols = {r[1] for r in self.db.execute("PRAGMA table_info(jobs)")}
+        if "owner" not in cols:
+            self.db.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    # -------- API --------
+    def bind(self, decode, files=None) -> None:
+        self.decode = self.decode or decode
+        self.files = self.files or files
+
+    def put(self, job) -> None:
+        with self.lock:
+            self.owned.add(job.id)
+            self.hot[job.id] = job
+            self.hot.move_to_end(job.id)
+            self._write(job)
+            self._evict()
+
+    def save(self, job) -> None:
+        with self.lock:
+            self._write(job)
+            if job.id in self.hot:
+                self.hot.move_to_end(job.id)
+            if job.status in FINISHED_STATUSES:
+                self.owned.discard(job.id)
+            self._evict()
+        self.prune()
+
+    def sync(self, job) -> None:
+        # Solo lo que cambia durante la ejecución: reserializar el record completo
+        # (results, eventos...) en cada evento de progreso es lo caro
+        if self.shared:
+            with self.lock, self.db:
+                self.db.execute(
+                    "UPDATE jobs SET status = ?, progress = ?, updated_at = ?, "
+                    "record = json_set(record, '$.status', ?, '$.progress', ?, '$.tool_progress', json(?)) "
+                    "WHERE id = ?",
+                    (job.status, job.progress, time.time(), job.status, job.progress,
+                     json.dumps(job.tool_progress, default=to_jsonable), job.id))
+
+    def get(self, job_id: str):
+        with self.lock:
+            job = self.hot.get(job_id)
+            if job is not None and self._trusted(job):
+                self.hot.move_to_end(job_id)
+                return job
+            row = self.db.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                return None
+            job = self.decode(json.loads(row[0]))
+            if self._trusted(job):
+                self.hot[job_id] = job
+                self._evict()
+            return job
+
+    def list(self, limit: Optional[int] = None) -> List[Any]:
+        """
+        Devuelve los jobs en orden de creación. Los que no están en RAM se
+        devuelven como "resumen" (sin results/events) para no cargar todo.
+        """
+        sql = ("SELECT id, created_at, status, target, tools, progress, report_file "
+               "FROM jobs ORDER BY created_at DESC")
+        params: tuple = ()
+        if limit:
+            sql += " LIMIT ?"
+            params = (limit,)
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+            out = []
+            for jid, created_at, status, target, tools, progress, report_file in reversed(rows):
+                job = self.hot.get(jid)
+                if job is None or not self._trusted(job):
+                    job = self.decode({
+                        "id": jid, "created_at": created_at, "status": status,
+                        "target": target, "tools": json.loads(tools or "[]"),
+                        "progress": progress or 0, "report_file": report_file,
+                    })
+                out.append(job)
+            return out
+
+    def prune(self) -> int:
+        """
+        Aplica la retención sobre jobs finalizados: borra la fila y los ficheros
+        del job (informe, JSONL, volcado de eventos...). Devuelve cuántos se borraron.
+        """
+        if not self.max_age_days and not self.max_count:
+            return 0
+        done = tuple(FINISHED_STATUSES)
+        marks = ",".join("?" * len(done))
+        with self.lock:
+            ids: List[str] = []
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                ids += [r[0] for r in self.db.execute(
+                    f"SELECT id FROM jobs WHERE status IN ({marks}) AND updated_at < ?",
+                    (*done, cutoff))]
+            if self.max_count:
+                ids += [r[0] for r in self.db.execute(
+                    f"SELECT id FROM jobs WHERE status IN ({marks}) "
+                    f"ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                    (*done, self.max_count))]
+            ids = list(dict.fromkeys(ids))
+            if not ids:
+                return 0
+            paths: List[str] = []
+            if self.files is not None:
+                for jid in ids:
+                    row = self.db.execute("SELECT record FROM jobs WHERE id = ?", (jid,)).fetchone()
+                    if row:
+                        paths.extend(self.files(json.loads(row[0])))
+            with self.db:
+                self.db.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+            for i in ids:
+                self.hot.pop(i, None)
+        for p in paths:
+            try:
+                if os.path.isdir(p):
+                    shutil.rmtree(p)
+                else:
+                    os.remove(p)
+            except OSError:
+                pass    # ya no existe o no se pudo borrar: la fila ya no existe; un fichero que no se pudo borrar no para la poda
+        return len(ids)
+
+    def recover(self) -> int:
+        """
+        Marca como 'interrupted' los jobs que quedaron a medias en un reinicio.
+        Con varios procesos solo toca los jobs cuyo dueño ya no existe.
+        """
+        with self.lock, self.db:
+            rows = self.db.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+            dead = [(time.time(), jid) for jid, owner in rows if not self._owner_alive(owner)]
+            self.db.executemany(
+                "UPDATE jobs SET status = 'interrupted', updated_at = ?, "
+                "record = json_set(record, '$.status', 'interrupted') WHERE id = ?",
+                dead)
+            return len(dead)
+
+    def _owner_alive(self, owner: Optional[str]) -> bool:
+        if not self.shared or not owner or owner == self.owner:
+            return False
+        host, _, pid = owner.rpartition(":")
+        if host != socket.gethostname():
+            return True     # otro host: no podemos comprobarlo, no lo tocamos
+        try:
+            os.kill(int(pid), 0)
+        except (ValueError, ProcessLookupError):
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def is_local(self, job) -> bool:
+        # Un job ajeno en curso se relee de disco, pero sus eventos no están
+        # ahí (sync() solo escribe estado/progreso)
+        return self._trusted(job)
+
+    def _trusted(self, job) -> bool:
+        # La copia en RAM vale si el job es nuestro o ya no va a cambiar
+        return (not self.shared) or job.id in self.owned or job.status in FINISHED_STATUSES
+
+    # -------- Internals --------
+    def _write(self, job) -> None:
+        record = job.to_record()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO jobs "
+                "(id, created_at, updated_at, status, target, tools, progress, report_file, owner, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.created_at, time.time(), job.status, job.target,
+                 json.dumps(job.tools), job.progress, job.report_file, self.owner,
+                 json.dumps(record, ensure_ascii=False, default=to_jsonable)))
+
+    def _evict(self) -> None:
+        # Llamado con self.lock adquirido. Solo salen de RAM los finalizados
+        # (ya persistidos); los activos se quedan aunque se supere hot_size.
+        if len(self.hot) <= self.hot_size:
+            return
+        for jid in list(self.hot):
+            if len(self.hot) <= self.hot_size:
+                break
+            if self.hot[jid].status in FINISHED_STATUSES:
+                del self.hot[jid]
@@ -0,0 +1,98 @@
+# app/modules/acquisition/fingerprint_cache.py
+"""
+Caché de huellas de servicio (-sV) por (ip, puerto, protocolo).
+
+Se alimenta con los PortInfo abiertos de escaneos anteriores y caduca a las
+`ttl` segundos: mientras una entrada está vigente no hace falta volver a lanzar
+la detección de versiones contra ese puerto (ver nmap_acq.fingerprint_services).
+Una entrada no se renueva al usarse, solo al volver a sondearse: así cada puerto
+se re-verifica al menos una vez por TTL. La contrapartida: si el servicio de un
+puerto vigente cambia, el cambio no se ve hasta que caduca su entrada (de ahí
+que la caché sea opcional, NMAP_FP_CACHE_TTL=0 por defecto).
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.model import Asset
+
+Key = Tuple[str, str, str]   # (ip, port, proto)
+
+
+class FingerprintCache:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS fingerprints (
+        ip       TEXT NOT NULL,
+        port     TEXT NOT NULL,
+        proto    TEXT NOT NULL,
+        service  TEXT,
+        product  TEXT,
+        version  TEXT,
+        seen     REAL NOT NULL,
+        PRIMARY KEY (ip, port, proto)
+    );
+    CREATE INDEX IF NOT EXISTS fingerprints_seen ON fingerprints(seen);
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0) -> None:
+        self.path = str(path)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+
+    def lookup(self, keys: Iterable[Key]) -> Dict[Key, Dict[str, Optional[str]]]:
+        """Entradas vigentes para `keys`: {(ip, port, proto): {"service", "product", "version"}}."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        cutoff = time.time() - self.ttl
+        out: Dict[Key, Dict[str, Optional[str]]] = {}
+        ips = sorted({k[0] for k in keys})
+        wanted = set(keys)
+        with self.lock:
+            # Por lotes de IPs (límite de parámetros de SQLite)
+            for i in range(0, len(ips), 500):
+                chunk = ips[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT ip, port, proto, service, product, version FROM fingerprints "
+                    f"WHERE seen >= ? AND ip IN ({','.join('?' * len(chunk))})", [cutoff, *chunk]).fetchall()
+                for ip, port, proto, service, product, version in rows:
+                    if (ip, port, proto) in wanted:
+                        out[(ip, port, proto)] = {"service": service, "product": product, "version": version}
+        return out
+
+    def store(self, assets: Iterable[Asset]) -> int:
+        """Guarda (o renueva) la huella de cada puerto abierto de `assets`."""
+        now = time.time()
+        rows: List[tuple] = [
+            (a.ip, str(p.port), p.proto or "tcp", p.service, p.product, p.version, now)
+            for a in assets for p in a.ports if p.state == "open"
+        ]
+        if not rows:
+            return 0
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO fingerprints (ip, port, proto, service, product, version, seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute("DELETE FROM fingerprints WHERE seen < ?", (now - 10 * self.ttl,))
+        return len(rows)
+
+
+_CACHES: Dict[str, FingerprintCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_fingerprint_cache(path: str, ttl: float) -> FingerprintCache:
+    """Una instancia por fichero y proceso (la comparten todos los jobs)."""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = _CACHES[path] = FingerprintCache(path, ttl)
+        cache.ttl = ttl
+        return cache
@@ -1,7 +1,27 @@
 # app/modules/acquisition/nmap_acq.py
-from typing import List, Tuple
+import ipaddress
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
 from app.routes.nmap import caller, parser
 from app.core.model import Asset, PortInfo
+from app.core.targets import parse_targets
+
+
+def _to_asset(it: dict) -> Asset:
+    ports = [PortInfo(
+        port=p['port'],
+        state=p['state'],
+        service=p.get('service',''),
+        proto=p.get('proto','tcp'),
+        product=p.get('product',''),
+        version=p.get('version','')
+    ) for p in it.get('ports', [])]
+    return Asset(ip=it['ip'], hostname=it.get('hostname',''), os=it.get('os'), ports=ports)
+
 
 def scan_network_or_host(target: str, options: List[str]) -> Tuple[List[Asset], dict]:
     """
@@ -9,15 +29,412 @@ def scan_network_or_host(target: str, options: List[str]) -> Tuple[List[Asset],
     """
     xml_output, meta = caller.run_nmap(target, options)
     parsed = parser.parse_nmap_xml(xml_output)  # devuelve [{'ip','hostname','ports',?os}]
+    assets: List[Asset] = [_to_asset(it) for it in parsed]
+    return assets, meta
+
+
+def stream_network_or_host(target: str, options: List[str],
+                           on_asset: Optional[Callable[[Asset], None]] = None,
+                           on_progress: Optional[Callable[[dict], None]] = None) -> Tuple[List[Asset], dict]:
+    """
+    Como scan_network_or_host, pero leyendo la salida de Nmap en streaming:
+    cada host se normaliza y se entrega a on_asset en cuanto Nmap lo termina.
+    on_progress recibe el progreso periódico de Nmap (--stats-every).
+    """
     assets: List[Asset] = []
-    for it in parsed:
-        ports = [PortInfo(
-            port=p['port'],
-            state=p['state'],
-            service=p.get('service',''),
-            proto=p.get('proto','tcp'),
-            product=p.get('product',''),
-            version=p.get('version','')
-        ) for p in it.get('ports', [])]
-        assets.append(Asset(ip=it['ip'], hostname=it.get('hostname',''), os=it.get('os'), ports=ports))
-    return assets, meta
\ No newline at end of file
+
+    def _on_host(it: dict) -> None:
+        asset = _to_asset(it)
+        assets.append(asset)
+        if on_asset is not None:
+            on_asset(asset)
+
+    meta = caller.stream_nmap(target, options, on_host=_on_host, on_progress=on_progress)
+    return assets, meta
+
+
+# =========================
+# Escaneo por shards (rangos grandes en paralelo)
+# =========================
+SHARD_PREFIX = 24      # tamaño de cada shard para CIDR IPv4 (/24 = 256 direcciones)
+SHARD_MAX_PROCS = 4    # procesos nmap simultáneos
+SHARD_RETRIES = 1      # reintentos por shard fallido
+
+
+def shard_targets(target: str, prefix: int = SHARD_PREFIX, batch: int = 64) -> List[str]:
+    """
+    Parte un target de nmap en shards independientes (ver TargetSet.shards):
+    - IPv4 en bloques /prefix; IPs sueltas y restos de rangos se agrupan hasta
+      sumar un bloque o `batch` objetivos.
+    - IPv6 y hostnames → agrupados de `batch` en `batch`.
+    Admite la sintaxis de app.core.targets (listas, rangos, exclusiones "!x").
+    Cada shard es un target válido para nmap (varios objetivos separados por espacio).
+    """
+    return list(parse_targets(target, hosts_only=False).shards(prefix, batch))
+
+
+def _ip_key(asset: Asset):
+    try:
+        return (0, int(ipaddress.ip_address(asset.ip)), "")
+    except ValueError:
+        return (1, 0, asset.ip)
+
+
+def _scan_shard(shard: str, options: List[str], retries: int, *,
+                on_asset: Optional[Callable[[Asset], None]] = None,
+                on_progress: Optional[Callable[[dict], None]] = None,
+                slots: Optional[threading.Semaphore] = None) -> dict:
+    """
+    Escanea un shard (reintentando si falla) y devuelve su resumen para meta["shards"].
+    Con `slots`, cada proceso nmap ocupa un hueco del semáforo mientras corre.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        with slots if slots is not None else nullcontext():
+            assets, meta = stream_network_or_host(shard, options, on_asset=on_asset, on_progress=on_progress)
+        if meta.get("returncode") == 0 or attempts > retries:
+            break
+    return {"target": shard, "cmd": meta.get("cmd", ""), "returncode": meta.get("returncode"),
+            "stderr": meta.get("stderr", ""), "attempts": attempts, "hosts": len(assets)}
+
+
+def _merge_meta(results: Dict[str, dict]) -> dict:
+    """Combina los meta de cada shard en uno solo (orden estable por shard)."""
+    shards = [results[k] for k in results]
+    failed = [m["target"] for m in shards if m.get("returncode") != 0]
+    stderr = "\n".join(f"[{m['target']}] {m['stderr']}" for m in shards if m.get("stderr"))
+    return {
+        "cmd": shards[0]["cmd"] if len(shards) == 1 else f"{len(shards)} shards nmap",
+        "returncode": next((m["returncode"] for m in shards if m.get("returncode") != 0), 0),
+        "stderr": stderr[:caller.STDERR_MAX_CHARS],
+        "shards": shards,
+        "failed_shards": failed,
+    }
+
+
+def scan_sharded(target: str, options: List[str], *,
+                 shards: Optional[List[str]] = None,
+                 prefix: int = SHARD_PREFIX, max_procs: int = SHARD_MAX_PROCS,
+                 retries: int = SHARD_RETRIES,
+                 on_asset: Optional[Callable[[Asset], None]] = None,
+                 on_progress: Optional[Callable[[dict], None]] = None,
+                 slots: Optional[threading.Semaphore] = None) -> Tuple[List[Asset], dict]:
+    """
+    Escanea `target` repartido en shards (ver shard_targets) con como mucho
+    `max_procs` procesos nmap a la vez. Cada shard fallido (returncode != 0) se
+    reintenta por separado hasta `retries` veces. `slots` es un semáforo
+    compartido con otra fase que limita además el total de procesos.
+
+    Devuelve (assets, meta): assets ordenados por IP y sin duplicados; meta con
+    el formato de run_nmap más "shards" (detalle por shard) y "failed_shards".
+    on_asset/on_progress se llaman serializados (nunca desde dos hilos a la vez);
+    el progreso es la media de los shards.
+    """
+    shards = shards if shards is not None else shard_targets(target, prefix)
+    if not shards:
+        return [], {"cmd": "", "returncode": 0, "stderr": "", "shards": [], "failed_shards": []}
+
+    lock = threading.Lock()
+    by_ip: Dict[str, Asset] = {}
+    percent: Dict[str, float] = {}
+
+    def _asset(a: Asset) -> None:
+        with lock:
+            by_ip[a.ip] = a
+            if on_asset is not None:
+                on_asset(a)
+
+    def _progress(shard: str, p: dict) -> None:
+        with lock:
+            percent[shard] = p.get("percent") or 0.0
+            if on_progress is not None:
+                on_progress({**p, "percent": round(sum(percent.values()) / len(shards), 2),
+                             "task": f"{p.get('task', '')} ({len(percent)}/{len(shards)} shards)"})
+
+    def _run(shard: str) -> dict:
+        info = _scan_shard(shard, options, retries, on_asset=_asset,
+                           on_progress=(lambda p: _progress(shard, p)) if on_progress else None,
+                           slots=slots)
+        with lock:
+            percent[shard] = 100.0
+        return info
+
+    results: Dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_procs, len(shards)))) as pool:
+        futures = {pool.submit(_run, sh): sh for sh in shards}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+
+    ordered = {sh: results[sh] for sh in shards}
+    return sorted(by_ip.values(), key=_ip_key), _merge_meta(ordered)
+
+
+def retry_failed_shards(assets: List[Asset], meta: dict, options: List[str], **kwargs) -> Tuple[List[Asset], dict]:
+    """
+    Repite solo los shards que fallaron en un scan_sharded anterior y fusiona el
+    resultado con `assets`/`meta` (los hosts nuevos sustituyen a los previos).
+    """
+    failed = meta.get("failed_shards") or []
+    if not failed:
+        return assets, meta
+    new_assets, new_meta = scan_sharded("", options, shards=failed, **kwargs)
+    by_ip = {a.ip: a for a in assets}
+    by_ip.update((a.ip, a) for a in new_assets)
+    redone = {m["target"]: m for m in new_meta["shards"]}
+    merged = {m["target"]: redone.get(m["target"], m) for m in meta.get("shards", [])}
+    return sorted(by_ip.values(), key=_ip_key), _merge_meta(merged)
+
+
+# =========================
+# Pipeline en dos fases: descubrimiento (-sn) → detección de servicios
+# =========================
+DISCOVERY_OPTS = ["-sn"]
+PIPELINE_BATCH = 32         # hosts vivos por proceso de detección de servicios
+PIPELINE_BATCH_WAIT = 2.0   # segundos máximos esperando a completar un lote
+
+
+def scan_pipelined(target: str, options: List[str], *,
+                   discovery_opts: Optional[List[str]] = None,
+                   batch: int = PIPELINE_BATCH, batch_wait: float = PIPELINE_BATCH_WAIT,
+                   prefix: int = SHARD_PREFIX, max_procs: int = SHARD_MAX_PROCS,
+                   retries: int = SHARD_RETRIES,
+                   on_asset: Optional[Callable[[Asset], None]] = None,
+                   on_progress: Optional[Callable[[dict], None]] = None) -> Tuple[List[Asset], dict]:
+    """
+    Escaneo en dos fases solapadas:
+    1. Descubrimiento (`discovery_opts`, por defecto -sn) con scan_sharded; cada
+       host vivo entra en una cola en cuanto nmap lo confirma.
+    2. Workers que consumen la cola en lotes de hasta `batch` IPs (o lo que
+       haya tras `batch_wait` s) y lanzan nmap con `options` + -Pn solo sobre ellas,
+       mientras el descubrimiento sigue en marcha.
+    Las dos fases comparten un semáforo de `max_procs`: nunca hay más de
+    `max_procs` procesos nmap a la vez entre ambas.
+
+    En redes poco pobladas el -sV deja de recorrer direcciones vacías.
+    Devuelve (assets, meta) como scan_sharded: meta["shards"] son los lotes de la
+    fase 2 y meta["discovery"] el meta de la fase 1. Los hosts vivos cuyo lote
+    falle se devuelven igualmente con los datos del descubrimiento.
+    """
+    discovery_opts = list(discovery_opts or DISCOVERY_OPTS)
+    service_opts = options if "-Pn" in options else options + ["-Pn"]
+    workers = max(1, max_procs)
+    slots = threading.BoundedSemaphore(workers)
+    live: queue.Queue = queue.Queue()
+    done_marker = object()
+    lock = threading.Lock()
+    found: Dict[str, Asset] = {}
+    scanned: Dict[str, Asset] = {}
+    batches: List[dict] = []
+    state = {"discovery": 0.0, "checked": 0}
+
+    def _report(task: str) -> None:
+        # Mitad descubrimiento, mitad servicios sobre los hosts vivos conocidos
+        if on_progress is None:
+            return
+        services = state["checked"] * 100.0 / len(found) if found else 0.0
+        on_progress({"task": task, "percent": round((state["discovery"] + services) / 2, 2),
+                     "remaining": None, "etc": None})
+
+    def _found(a: Asset) -> None:
+        with lock:
+            found[a.ip] = a
+        live.put(a.ip)
+
+    def _discovery_progress(p: dict) -> None:
+        with lock:
+            state["discovery"] = p.get("percent") or 0.0
+            _report("Descubrimiento de hosts")
+
+    def _scanned(a: Asset) -> None:
+        with lock:
+            scanned[a.ip] = a
+            if on_asset is not None:
+                on_asset(a)
+
+    def _discover() -> Tuple[List[Asset], dict]:
+        try:
+            return scan_sharded(target, discovery_opts, prefix=prefix, max_procs=max_procs,
+                                retries=retries, on_asset=_found, on_progress=_discovery_progress,
+                                slots=slots)
+        finally:
+            for _ in range(workers):
+                live.put(done_marker)
+
+    def _worker() -> None:
+        while True:
+            first = live.get()
+            if first is done_marker:
+                return
+            ips, finished = [first], False
+            deadline = time.monotonic() + batch_wait
+            while len(ips) < batch:
+                try:
+                    ip = live.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if ip is done_marker:
+                    finished = True
+                    break
+                ips.append(ip)
+            info = _scan_shard(" ".join(ips), service_opts, retries, on_asset=_scanned, slots=slots)
+            with lock:
+                batches.append(info)
+                state["checked"] += len(ips)
+                _report("Detección de servicios")
+            if finished:
+                return
+
+    with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+        discovery = pool.submit(_discover)
+        for fut in [pool.submit(_worker) for _ in range(workers)]:
+            fut.result()
+        _, discovery_meta = discovery.result()
+
+    assets = sorted({**found, **scanned}.values(), key=_ip_key)
+    batches.sort(key=lambda m: _ip_key(Asset(ip=m["target"].split()[0])))
+    if batches:
+        meta = _merge_meta({m["target"]: m for m in batches})
+    else:
+        meta = {"cmd": discovery_meta.get("cmd", ""), "returncode": 0, "stderr": "",
+                "shards": [], "failed_shards": []}
+    if discovery_meta.get("returncode"):
+        meta["returncode"] = discovery_meta["returncode"]
+    meta["discovery"] = {**discovery_meta, "hosts": len(found)}
+    return assets, meta
+
+
+# =========================
+# Detección de versiones con caché de huellas (ver fingerprint_cache)
+# =========================
+VERSION_OPTS = {"-sV", "--version-light", "--version-all", "--version-trace"}
+VERSION_OPTS_WITH_VALUE = {"--version-intensity"}
+PORT_OPTS_WITH_VALUE = {"-p", "--top-ports", "--exclude-ports"}
+
+
+def fingerprint_cacheable(options: List[str]) -> bool:
+    """La caché solo sustituye a -sV; -A/-sC/--script necesitan el escaneo completo."""
+    return "-sV" in options and not any(
+        o in ("-A", "-sC") or o.startswith("--script") for o in options)
+
+
+def quick_scan_options(options: List[str]) -> List[str]:
+    """Las mismas opciones sin detección de versiones (solo puertos abiertos)."""
+    out, skip = [], False
+    for o in options:
+        if skip:
+            skip = False
+            continue
+        if o in VERSION_OPTS_WITH_VALUE:
+            skip = True
+            continue
+        if o not in VERSION_OPTS:
+            out.append(o)
+    return out
+
+
+def _service_scan_options(options: List[str], port_spec: str) -> List[str]:
+    out, skip = [], False
+    for o in options:
+        if skip:
+            skip = False
+            continue
+        if o in PORT_OPTS_WITH_VALUE:
+            skip = True
+            continue
+        if (o.startswith("-p") and len(o) > 2) or o in ("-F", "-sn", "-Pn"):
+            continue
+        out.append(o)
+    return out + ["-Pn", "-p", port_spec]
+
+
+def _port_spec(ports: List[PortInfo]) -> str:
+    tcp = sorted({int(p.port) for p in ports if (p.proto or "tcp") == "tcp"})
+    udp = sorted({int(p.port) for p in ports if p.proto == "udp"})
+    if not udp:
+        return ",".join(map(str, tcp))
+    parts = ([f"T:{','.join(map(str, tcp))}"] if tcp else []) + [f"U:{','.join(map(str, udp))}"]
+    return ",".join(parts)
+
+
+def fingerprint_services(assets: List[Asset], options: List[str], cache, *,
+                         max_procs: int = SHARD_MAX_PROCS, batch: int = PIPELINE_BATCH,
+                         retries: int = SHARD_RETRIES,
+                         on_asset: Optional[Callable[[Asset], None]] = None) -> Tuple[List[Asset], dict]:
+    """
+    Completa servicio/producto/versión de los puertos abiertos de `assets`
+    (resultado de un escaneo sin -sV):
+    - puertos con huella vigente en `cache` → se copian de la caché;
+    - el resto → -sV -Pn -p <puertos> solo contra esos puertos, agrupando hosts
+      con la misma lista de puertos en lotes de `batch`; lo obtenido se guarda
+      en la caché.
+    Modifica y devuelve los mismos Asset. on_asset se llama (serializado) con
+    cada host ya completo.
+    """
+    keys = {(a.ip, str(p.port), p.proto or "tcp") for a in assets for p in a.ports if p.state == "open"}
+    hits = cache.lookup(keys)
+    by_ip = {a.ip: a for a in assets}
+    groups: Dict[str, List[str]] = {}
+    ready: List[Asset] = []
+    for a in assets:
+        missing = []
+        for p in a.ports:
+            if p.state != "open":
+                continue
+            fp = hits.get((a.ip, str(p.port), p.proto or "tcp"))
+            if fp is None:
+                missing.append(p)
+            else:
+                p.service = fp["service"] or p.service
+                p.product, p.version = fp["product"], fp["version"]
+        if missing:
+            groups.setdefault(_port_spec(missing), []).append(a.ip)
+        else:
+            ready.append(a)
+
+    lock = threading.Lock()
+    done: set = set()
+
+    def _deliver(a: Asset) -> None:
+        if a.ip not in done:
+            done.add(a.ip)
+            if on_asset is not None:
+                on_asset(a)
+
+    def _merge(scanned: Asset) -> None:
+        with lock:
+            base = by_ip.get(scanned.ip)
+            if base is None:
+                return
+            fresh = {(p.port, p.proto): p for p in scanned.ports}
+            for p in base.ports:
+                new = fresh.get((p.port, p.proto))
+                if new is not None:
+                    p.service, p.product, p.version = new.service or p.service, new.product, new.version
+            base.hostname = base.hostname or scanned.hostname
+            base.os = base.os or scanned.os
+            cache.store([scanned])
+            _deliver(base)
+
+    with lock:
+        for a in ready:
+            _deliver(a)
+
+    work = [(spec, ips[i:i + batch]) for spec, ips in groups.items() for i in range(0, len(ips), batch)]
+    scans: List[dict] = []
+    if work:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_procs, len(work)))) as pool:
+            futures = [pool.submit(_scan_shard, " ".join(ips), _service_scan_options(options, spec),
+                                   retries, on_asset=_merge) for spec, ips in work]
+            for fut in futures:
+                scans.append(fut.result())
+    # Hosts cuyo -sV falló: se entregan con lo que dio el escaneo rápido
+    with lock:
+        for a in assets:
+            _deliver(a)
+
+    meta = _merge_meta({m["target"]: m for m in scans}) if scans else {
+        "cmd": "", "returncode": 0, "stderr": "", "shards": [], "failed_shards": []}
+    meta["fingerprint_cache"] = {"ports": len(keys), "hits": len(hits), "misses": len(keys) - len(hits),
+                                 "hosts_probed": sum(len(ips) for _, ips in work)}
+    return assets, meta
@@ -0,0 +1,96 @@
+# app/modules/acquisition/nmap_import.py
+"""
+Importación de ficheros XML de nmap ya existentes (-oX), sin volver a escanear.
+
+Cada fichero (plano o .gz) se parsea en un proceso aparte (ProcessPoolExecutor)
+con el parser incremental de app.routes.nmap.parser, así que el coste es el de
+leer disco y no el de escanear. Los procesos se crean con forkserver, no con
+fork: el servidor tiene hilos (planificador, relay, SQLite) y un hijo de fork
+podría heredar un lock cogido; el worker solo recibe una ruta y devuelve dicts. El resultado tiene la misma forma que el de
+scan_network_or_host: lista de Asset + meta.
+"""
+import gzip
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.model import Asset
+from app.modules.acquisition.nmap_acq import _ip_key, _to_asset
+from app.routes.nmap import parser
+
+IMPORT_MAX_PROCS = max(1, min(4, os.cpu_count() or 1))
+# forkserver solo existe en POSIX; en otros sistemas, spawn
+MP_CONTEXT = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_nmap_xml(path: str):
+    """Abre un XML de nmap en binario, descomprimiendo al vuelo si es gzip."""
+    fh = open(path, "rb")
+    if fh.read(2) == GZIP_MAGIC:
+        fh.close()
+        return gzip.open(path, "rb")
+    fh.seek(0)
+    return fh
+
+
+def parse_file(path: str, backend: Optional[str] = None) -> Tuple[str, List[dict], Optional[str]]:
+    """
+    Parsea un fichero completo (se ejecuta en el proceso worker).
+    Devuelve (path, hosts como dicts, error o None).
+    """
+    hosts: List[dict] = []
+    try:
+        with open_nmap_xml(path) as fh:
+            for host in parser.iter_nmap_hosts(fh, backend=backend, strict=True):
+                hosts.append(host)
+    except parser.PARSE_ERRORS as ex:
+        # XML truncado: se conservan los hosts completos leídos hasta el error
+        return path, hosts, f"XML inválido: {ex}"
+    except (OSError, EOFError) as ex:
+        return path, hosts, str(ex)
+    return path, hosts, None
+
+
+def import_files(paths: List[str], *, max_procs: int = IMPORT_MAX_PROCS, backend: Optional[str] = None,
+                 on_file: Optional[Callable[[str, int, Optional[str]], None]] = None) -> Tuple[List[Asset], dict]:
+    """
+    Importa `paths` en paralelo. Si un host aparece en varios ficheros se queda
+    el del último fichero de la lista (normalmente el escaneo más reciente).
+    on_file(path, hosts, error) se llama al terminar cada fichero.
+    """
+    backend = parser.resolve_backend(backend)
+    # Prioridad de cada fichero: su última posición en `paths` (gana la mayor)
+    order = {p: i for i, p in enumerate(paths)}
+    counts: Dict[str, int] = {}
+    failed: Dict[str, str] = {}
+    # Los hosts se fusionan según llega cada fichero: nunca se guardan todos los
+    # ficheros a la vez ni dos copias de cada host
+    by_ip: Dict[str, Tuple[int, Asset]] = {}
+    if paths:
+        with ProcessPoolExecutor(max_workers=max(1, min(max_procs, len(paths))),
+                                 mp_context=multiprocessing.get_context(MP_CONTEXT)) as pool:
+            futures = [pool.submit(parse_file, p, backend) for p in dict.fromkeys(paths)]
+            for fut in as_completed(futures):
+                path, hosts, error = fut.result()
+                rank = order[path]
+                counts[path] = len(hosts)
+                for it in hosts:
+                    asset = _to_asset(it)
+                    prev = by_ip.get(asset.ip)
+                    if prev is None or prev[0] <= rank:
+                        by_ip[asset.ip] = (rank, asset)
+                if error:
+                    failed[path] = error
+                if on_file is not None:
+                    on_file(path, counts[path], error)
+
+    meta = {
+        "cmd": f"nmap_import {len(paths)} fichero(s)",
+        "returncode": 1 if failed else 0,
+        "stderr": "\n".join(f"{os.path.basename(p)}: {e}" for p, e in failed.items()),
+        "files": [{"path": p, "hosts": counts.get(p, 0), "error": failed.get(p)} for p in paths],
+        "backend": backend,
+    }
+    return sorted((a for _, a in by_ip.values()), key=_ip_key), meta
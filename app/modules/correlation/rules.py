@@ -2,10 +2,7 @@
 from __future__ import annotations
 from typing import Dict, Any, List
 
-def _each_host(nmap: Dict[str, Any]) -> List[Dict[str, Any]]:
-    if not nmap or "assets" not in nmap:
-        return []
-    return nmap["assets"]
+from app.core.model import iter_result_assets
 
 def run_rules(results: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -14,14 +11,14 @@ def run_rules(results: Dict[str, Any]) -> Dict[str, Any]:
     """
     findings: List[Dict[str, Any]] = []
 
-    nmap = results.get("nmap")
+    hosts = iter_result_assets(results)   # nmap, tcp_sweep, ...
     local = results.get("local_enum") or {}
 
     # ---- Regla 1: SSH con password habilitada y 22/tcp expuesto
     ssh_cfg = (local.get("ssh_config_audit") or {})
     ssh_pw = ssh_cfg.get("PasswordAuthentication")
     if ssh_pw in ("yes", "true"):
-        for h in _each_host(nmap):
+        for h in hosts:
             for p in h.get("ports", []):
                 if str(p.get("port")) == "22" and (p.get("state") in ("open", None)):
                     findings.append({
@@ -34,7 +31,7 @@ def run_rules(results: Dict[str, Any]) -> Dict[str, Any]:
 
     # ---- Regla 2: Servicios inseguros (telnet/ftp) abiertos
     INSECURE = {"23": "telnet", "21": "ftp"}
-    for h in _each_host(nmap):
+    for h in hosts:
         for p in h.get("ports", []):
             port = str(p.get("port"))
             if port in INSECURE and (p.get("state") in ("open", None)):
@@ -79,9 +76,9 @@ def run_rules(results: Dict[str, Any]) -> Dict[str, Any]:
         })
         # ---- Regla 6: Hostname descubierto por PTR con puertos abiertos
     ptrs = (results.get("dns_reverse") or {}).get("ptrs") or []
-    if nmap and ptrs:
+    if hosts and ptrs:
         ip_to_ptr = {p["ip"]: p.get("ptr") for p in ptrs if p.get("ptr")}
-        for h in _each_host(nmap):
+        for h in hosts:
             ip = h.get("ip")
             if not ip or ip not in ip_to_ptr:
                 continue
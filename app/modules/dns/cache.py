@@ -0,0 +1,129 @@
+# app/modules/dns/cache.py
+"""
+Caché DNS compartida por todo el proceso (todos los jobs y plugins).
+
+Guarda respuestas por (nombre, tipo) durante el TTL de sus registros, acotado
+entre `min_ttl` y `max_ttl`. Las respuestas negativas (NXDOMAIN o sin datos)
+se guardan con el TTL negativo del SOA de autoridad (RFC 2308), limitado por
+`negative_ttl`. Los timeouts y SERVFAIL no se guardan. Cuando se llega a
+`max_entries` se descarta la entrada usada hace más tiempo (LRU).
+
+La usan AsyncResolver.query (PTR del plugin dns_reverse) y las búsquedas de
+hostnames (AsyncResolver.lookup / resolve_host; el fichero hosts y getaddrinfo
+no pasan por ella).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+MAX_ENTRIES = 100_000
+MIN_TTL = 0
+MAX_TTL = 86400
+NEGATIVE_TTL = 300
+
+Key = Tuple[str, int]
+# (caduca_en, rcode, registros)
+Entry = Tuple[float, str, List[Tuple[int, int, str]]]
+
+
+class DNSCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, *, min_ttl: float = MIN_TTL,
+                 max_ttl: float = MAX_TTL, negative_ttl: float = NEGATIVE_TTL) -> None:
+        self.max_entries = max(1, max_entries)
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self._data: "OrderedDict[Key, Entry]" = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def configure(self, **kwargs) -> None:
+        with self.lock:
+            for k, v in kwargs.items():
+                if v is not None:
+                    setattr(self, k, v)
+            self.max_entries = max(1, self.max_entries)
+            self._trim()
+
+    def get(self, name: str, qtype: int) -> Optional[Tuple[str, List[Tuple[int, int, str]]]]:
+        """(rcode, registros) vigentes o None. Los TTL devueltos son los restantes."""
+        key = (name.rstrip(".").lower(), qtype)
+        now = time.monotonic()
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, rcode, records = entry
+            if expires <= now:
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            if rcode != "ok" or not records:
+                self.negative_hits += 1
+        left = int(expires - now)
+        return rcode, [(rtype, min(ttl, left), data) for rtype, ttl, data in records]
+
+    def put(self, name: str, qtype: int, rcode: str, records: List[Tuple[int, int, str]],
+            authority: Optional[List[Tuple[int, int, str]]] = None) -> float:
+        """Guarda una respuesta; devuelve el TTL aplicado (0 = no se guarda)."""
+        if rcode == "ok" and records:
+            ttl = min(t for _, t, _ in records)
+            ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        elif rcode in ("ok", "nxdomain"):
+            ttl = self.negative_ttl
+            for rtype, soa_ttl, data in authority or ():
+                if rtype == 6:   # SOA: min(TTL del registro, campo minimum)
+                    ttl = min(ttl, soa_ttl, int(data.rsplit(" ", 1)[-1]))
+                    break
+        else:
+            return 0
+        if ttl <= 0:
+            return 0
+        key = (name.rstrip(".").lower(), qtype)
+        with self.lock:
+            self._data[key] = (time.monotonic() + ttl, rcode, list(records))
+            self._data.move_to_end(key)
+            self._trim()
+        return ttl
+
+    def _trim(self) -> None:
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_CACHE = DNSCache()
+
+
+def get_dns_cache() -> DNSCache:
+    """Instancia única del proceso (create_app la configura desde config)."""
+    return _CACHE
@@ -0,0 +1,553 @@
+# app/modules/dns/resolver.py
+"""
+Resolutor DNS asíncrono (asyncio + UDP) para consultas masivas.
+
+Construye los mensajes DNS a mano (RFC 1035) y los envía por UDP a los
+servidores configurados, sin pasar por el resolutor del sistema: cada consulta
+tiene su propio timeout y reintentos (rotando servidor), caben miles en vuelo
+sobre unos pocos sockets y no se toca ningún estado global del proceso
+(socket.setdefaulttimeout, hilos, etc.). Una respuesta truncada (TC) se repite
+por TCP.
+
+Contra el envenenamiento de caché, una respuesta solo se acepta si llega del
+servidor consultado, al puerto origen de la consulta, con su id y con la misma
+pregunta (nombre y tipo); cada socket UDP se retira tras CHANNEL_MAX_QUERIES
+consultas, así que el puerto origen (aleatorio, lo elige el kernel) también
+cambia. Con `cache` (normalmente get_dns_cache()) las respuestas se reutilizan
+entre consultas y jobs según su TTL.
+
+Uso típico:
+    resolver = AsyncResolver(["192.0.2.53"], timeout=1.5, retries=2)
+    results = await resolver.reverse_many(ips, on_result=...)
+"""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import os
+import random
+import socket
+import struct
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.modules.dns.cache import DNSCache, get_dns_cache
+
+DNS_PORT = 53
+TIMEOUT = 1.5
+RETRIES = 2
+CONCURRENCY = 1000
+MAX_CNAME_HOPS = 8
+CHANNEL_MAX_QUERIES = 16    # consultas por socket UDP antes de cambiar de puerto origen
+RESOLV_CONF = "/etc/resolv.conf"
+HOSTS_FILE = "/etc/hosts"
+
+# Tipos y clases de registro
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_SOA = 6
+QTYPE_PTR = 12
+QTYPE_AAAA = 28
+QCLASS_IN = 1
+
+RCODES = {0: "ok", 1: "formerr", 2: "servfail", 3: "nxdomain", 4: "notimp", 5: "refused"}
+
+_RNG = random.SystemRandom()
+_HEADER = struct.Struct("!HHHHHH")
+_RR = struct.Struct("!HHIH")
+
+
+class DNSError(Exception):
+    """Mensaje DNS mal formado."""
+
+
+@dataclass(slots=True)
+class Answer:
+    """Respuesta a una consulta: rcode ("ok", "nxdomain", "timeout"…) y registros (tipo, ttl, dato)."""
+    name: str
+    qtype: int
+    rcode: str
+    records: List[Tuple[int, int, str]] = field(default_factory=list)
+    cached: bool = False
+
+    def values(self, qtype: Optional[int] = None) -> List[str]:
+        qtype = self.qtype if qtype is None else qtype
+        return [data for rtype, _, data in self.records if rtype == qtype]
+
+
+# =========================
+# Formato de mensaje (RFC 1035)
+# =========================
+def ptr_name(ip: str) -> str:
+    """'192.0.2.1' → '1.2.0.192.in-addr.arpa' (también IPv6 → ip6.arpa; la zona %eth0 se ignora)."""
+    return ipaddress.ip_address(ip.split("%", 1)[0]).reverse_pointer
+
+
+def encode_name(name: str) -> bytes:
+    out = bytearray()
+    for label in name.rstrip(".").split("."):
+        if not label:
+            continue
+        raw = label.encode("idna") if not label.isascii() else label.encode("ascii")
+        if len(raw) > 63:
+            raise DNSError(f"Etiqueta demasiado larga: {label}")
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    return bytes(out)
+
+
+def build_query(qid: int, name: str, qtype: int) -> bytes:
+    """Consulta estándar con recursión deseada (RD)."""
+    return _HEADER.pack(qid, 0x0100, 1, 0, 0, 0) + encode_name(name) + struct.pack("!HH", qtype, QCLASS_IN)
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Lee un nombre (con compresión) y devuelve (nombre, offset tras el nombre)."""
+    labels: List[str] = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DNSError("Nombre truncado")
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DNSError("Puntero truncado")
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            if jumps > 64:
+                raise DNSError("Bucle de compresión")
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    return ".".join(labels), (end if end is not None else offset)
+
+
+def read_question(data: bytes) -> Optional[Tuple[int, int, str, int]]:
+    """(id, flags, nombre, tipo) de la primera pregunta de un mensaje; None si está mal formado."""
+    try:
+        qid, flags, qd = struct.unpack_from("!HHH", data)
+        if qd < 1:
+            return None
+        name, offset = _read_name(data, _HEADER.size)
+        qtype = struct.unpack_from("!H", data, offset)[0]
+    except (struct.error, DNSError):
+        return None
+    return qid, flags, name, qtype
+
+
+def wire_name(name: str) -> str:
+    """Nombre tal y como viaja en la pregunta (IDNA, minúsculas), para comparar respuestas."""
+    return _read_name(encode_name(name), 0)[0].lower()
+
+
+def _matches(data: bytes, qid: int, wname: str, qtype: int) -> bool:
+    """¿Es `data` una respuesta (QR) a esta misma consulta (id, nombre en formato wire_name y tipo)?"""
+    q = read_question(data)
+    return (q is not None and q[0] == qid and bool(q[1] & 0x8000)
+            and q[2].lower() == wname and q[3] == qtype)
+
+
+def parse_response(data: bytes) -> Tuple[int, int, str, List[Tuple[int, int, str]], List[Tuple[int, int, str]]]:
+    """
+    Devuelve (id, flags, nombre consultado, respuestas, autoridad).
+    Cada registro es (tipo, ttl, dato); el dato es el nombre para PTR/CNAME/SOA
+    (SOA: "mname minimum") y la dirección para A/AAAA.
+    """
+    if len(data) < _HEADER.size:
+        raise DNSError("Cabecera truncada")
+    qid, flags, qd, an, ns, _ = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    qname = ""
+    for i in range(qd):
+        name, offset = _read_name(data, offset)
+        if i == 0:
+            qname = name
+        offset += 4
+    sections: List[List[Tuple[int, int, str]]] = [[], []]
+    for section, count in ((0, an), (1, ns)):
+        for _ in range(count):
+            _, offset = _read_name(data, offset)
+            if offset + _RR.size > len(data):
+                raise DNSError("Registro truncado")
+            rtype, rclass, ttl, rdlen = _RR.unpack_from(data, offset)
+            offset += _RR.size
+            rdata_at, offset = offset, offset + rdlen
+            if offset > len(data):
+                raise DNSError("RDATA truncado")
+            if rclass != QCLASS_IN:
+                continue
+            if rtype in (QTYPE_PTR, QTYPE_CNAME):
+                value = _read_name(data, rdata_at)[0]
+            elif rtype == QTYPE_A and rdlen == 4:
+                value = socket.inet_ntop(socket.AF_INET, data[rdata_at:offset])
+            elif rtype == QTYPE_AAAA and rdlen == 16:
+                value = socket.inet_ntop(socket.AF_INET6, data[rdata_at:offset])
+            elif rtype == QTYPE_SOA:
+                mname, pos = _read_name(data, rdata_at)
+                _, pos = _read_name(data, pos)
+                if pos + 20 > offset:
+                    raise DNSError("SOA truncado")
+                minimum = struct.unpack_from("!I", data, pos + 16)[0]
+                value = f"{mname} {minimum}"
+            else:
+                continue
+            sections[section].append((rtype, ttl, value))
+    return qid, flags, qname, sections[0], sections[1]
+
+
+def system_nameservers(path: str = RESOLV_CONF) -> List[str]:
+    """Servidores 'nameserver' de resolv.conf (vacío si no hay o no se puede leer)."""
+    servers: List[str] = []
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append(parts[1])
+    except OSError:
+        pass
+    return servers
+
+
+def parse_nameservers(spec) -> List[Tuple[str, int]]:
+    """'1.1.1.1, 9.9.9.9:5353, [::1]:53' (o lista) → [(host, puerto)]; vacío → resolv.conf."""
+    items = spec if isinstance(spec, (list, tuple)) else str(spec or "").replace(",", " ").split()
+    out: List[Tuple[str, int]] = []
+    for item in items or system_nameservers():
+        if isinstance(item, tuple):
+            out.append((item[0], int(item[1])))
+            continue
+        host, port = item, DNS_PORT
+        if item.startswith("["):
+            host, _, rest = item[1:].partition("]")
+            port = int(rest[1:]) if rest.startswith(":") else DNS_PORT
+        elif item.count(":") == 1:
+            host, _, p = item.partition(":")
+            port = int(p)
+        out.append((host, port))
+    return out or [("127.0.0.1", DNS_PORT)]
+
+
+_hosts_cache: Dict[str, object] = {"key": None, "map": {}}
+
+
+def hosts_file(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Nombre (minúsculas) → direcciones según el fichero hosts; se relee solo si cambia."""
+    path = path or HOSTS_FILE
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    key = (path, st.st_mtime_ns, st.st_size)
+    if _hosts_cache["key"] == key:
+        return _hosts_cache["map"]
+    table: Dict[str, List[str]] = {}
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                parts = line.split("#", 1)[0].split()
+                if len(parts) < 2:
+                    continue
+                try:
+                    ipaddress.ip_address(parts[0])
+                except ValueError:
+                    continue
+                for name in parts[1:]:
+                    addrs = table.setdefault(name.lower().rstrip("."), [])
+                    if parts[0] not in addrs:
+                        addrs.append(parts[0])
+    except OSError:
+        return {}
+    _hosts_cache.update(key=key, map=table)
+    return table
+
+
+def _ipv4_first(addrs: Iterable[str]) -> List[str]:
+    addrs = list(dict.fromkeys(addrs))
+    return [a for a in addrs if ":" not in a] + [a for a in addrs if ":" in a]
+
+
+def system_lookup(host: str) -> List[str]:
+    """Resolución del sistema (nsswitch: hosts, DNS con dominios de búsqueda…); bloqueante."""
+    try:
+        infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError):
+        return []
+    return _ipv4_first(info[4][0] for info in infos if info[0] in (socket.AF_INET, socket.AF_INET6))
+
+
+# =========================
+# Transporte UDP
+# =========================
+class _Channel(asyncio.DatagramProtocol):
+    """
+    Socket UDP conectado a un servidor; empareja respuestas por id de consulta
+    y pregunta. Tras CHANNEL_MAX_QUERIES envíos se retira: no acepta consultas
+    nuevas y se cierra al quedar sin pendientes.
+    """
+
+    def __init__(self) -> None:
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.pending: Dict[int, Tuple[str, int, asyncio.Future]] = {}
+        self.sent = 0
+        self.retired = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if len(data) < 2:
+            return
+        qid = int.from_bytes(data[:2], "big")
+        entry = self.pending.get(qid)
+        if entry is None or entry[2].done():
+            return
+        wname, qtype, fut = entry
+        # id correcto pero otra pregunta: respuesta falsificada o tardía, se ignora
+        if _matches(data, qid, wname, qtype):
+            fut.set_result(data)
+
+    def error_received(self, exc) -> None:
+        # ICMP (puerto inalcanzable…): las consultas afectadas caducan por timeout
+        pass
+
+    def connection_lost(self, exc) -> None:
+        for _, _, fut in self.pending.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("Canal DNS cerrado"))
+        self.pending.clear()
+
+    def new_id(self) -> int:
+        while True:
+            qid = _RNG.getrandbits(16)
+            if qid not in self.pending:
+                return qid
+
+    def release(self) -> bool:
+        """Cierra el socket si está retirado y sin consultas pendientes; True si se cerró."""
+        if self.retired and not self.pending and self.transport is not None:
+            self.transport.close()
+            return True
+        return False
+
+
+class AsyncResolver:
+    """
+    Resolutor asíncrono sobre UDP. Un canal (socket) activo por servidor, creado
+    al primer uso dentro del event loop actual y sustituido cada
+    CHANNEL_MAX_QUERIES consultas; close() los libera.
+    Reintentos: `retries` intentos adicionales, cada uno contra el siguiente
+    servidor de la lista y con `timeout` segundos.
+    """
+
+    def __init__(self, nameservers=None, *, timeout: float = TIMEOUT, retries: int = RETRIES,
+                 concurrency: int = CONCURRENCY, cache: Optional[DNSCache] = None) -> None:
+        self.nameservers = parse_nameservers(nameservers)
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.concurrency = max(1, concurrency)
+        self._channels: Dict[Tuple[str, int], _Channel] = {}
+        self._open: set = set()      # todos los canales sin cerrar (activos y retirados)
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        self._next_ns = 0
+
+    async def __aenter__(self) -> "AsyncResolver":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for ch in self._open:
+            if ch.transport is not None:
+                ch.transport.close()
+        self._open.clear()
+        self._channels.clear()
+        self._locks.clear()
+
+    async def _channel(self, server: Tuple[str, int]) -> _Channel:
+        """Canal activo de `server` con un envío ya reservado (se renueva al agotarse)."""
+        ch = self._channels.get(server)
+        if ch is None or ch.sent >= CHANNEL_MAX_QUERIES:
+            # Un solo socket nuevo por servidor aunque muchas consultas lo pidan a la vez
+            async with self._locks.setdefault(server, asyncio.Lock()):
+                ch = self._channels.get(server)
+                if ch is None or ch.sent >= CHANNEL_MAX_QUERIES:
+                    if ch is not None:
+                        # Agotado: deja de aceptar consultas y se cierra al vaciarse
+                        ch.retired = True
+                        if ch.release():
+                            self._open.discard(ch)
+                    loop = asyncio.get_running_loop()
+                    _, ch = await loop.create_datagram_endpoint(_Channel, remote_addr=server)
+                    self._open.add(ch)
+                    self._channels[server] = ch
+        ch.sent += 1
+        return ch
+
+    async def _query_udp(self, server: Tuple[str, int], name: str, qtype: int) -> bytes:
+        ch = await self._channel(server)
+        qid = ch.new_id()
+        fut = asyncio.get_running_loop().create_future()
+        ch.pending[qid] = (wire_name(name), qtype, fut)
+        try:
+            ch.transport.sendto(build_query(qid, name, qtype))
+            return await asyncio.wait_for(fut, self.timeout)
+        finally:
+            ch.pending.pop(qid, None)
+            if ch.release():
+                self._open.discard(ch)
+
+    async def _query_tcp(self, server: Tuple[str, int], name: str, qtype: int) -> bytes:
+        qid = _RNG.getrandbits(16)
+        msg = build_query(qid, name, qtype)
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(*server), self.timeout)
+        try:
+            writer.write(struct.pack("!H", len(msg)) + msg)
+            await writer.drain()
+            size = struct.unpack("!H", await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            data = await asyncio.wait_for(reader.readexactly(size), self.timeout)
+        finally:
+            writer.close()
+        if not _matches(data, qid, wire_name(name), qtype):
+            raise DNSError("Respuesta TCP que no corresponde a la consulta")
+        return data
+
+    async def query(self, name: str, qtype: int = QTYPE_A) -> Answer:
+        """Consulta `name`/`qtype`; rcode "timeout" si ningún intento obtiene respuesta."""
+        name = name.rstrip(".")
+        if self.cache is not None:
+            hit = self.cache.get(name, qtype)
+            if hit is not None:
+                return Answer(name, qtype, hit[0], hit[1], cached=True)
+        last = "timeout"
+        for _ in range(self.retries + 1):
+            server = self.nameservers[self._next_ns % len(self.nameservers)]
+            self._next_ns += 1
+            try:
+                data = await self._query_udp(server, name, qtype)
+                # La pregunta ya se ha comprobado al recibir (_matches)
+                _, flags, _, records, authority = parse_response(data)
+                if flags & 0x0200:
+                    data = await self._query_tcp(server, name, qtype)
+                    _, flags, _, records, authority = parse_response(data)
+            except (asyncio.TimeoutError, OSError, EOFError, asyncio.IncompleteReadError):
+                continue
+            except DNSError:
+                last = "formerr"
+                continue
+            rcode = RCODES.get(flags & 0x000F, f"rcode{flags & 0x000F}")
+            if rcode in ("servfail", "refused"):
+                # Otro servidor puede responder
+                last = rcode
+                continue
+            if self.cache is not None:
+                self.cache.put(name, qtype, rcode, records, authority)
+            return Answer(name, qtype, rcode, records)
+        return Answer(name, qtype, last)
+
+    async def resolve(self, host: str, qtype: int = QTYPE_A) -> List[str]:
+        """Direcciones (A o AAAA) de `host`, siguiendo CNAME si el resolutor no lo hizo."""
+        name = host
+        for _ in range(MAX_CNAME_HOPS):
+            ans = await self.query(name, qtype)
+            addrs = ans.values(qtype)
+            if addrs or ans.rcode != "ok":
+                return addrs
+            cnames = ans.values(QTYPE_CNAME)
+            if not cnames:
+                return []
+            name = cnames[-1]
+        return []
+
+    async def lookup(self, host: str) -> List[str]:
+        """
+        Direcciones de `host` (IPv4 primero, luego IPv6) como lo haría el sistema:
+        fichero hosts, después A y AAAA por DNS (con caché) y, si no hay
+        respuesta, getaddrinfo en un hilo (nsswitch, dominios de búsqueda…).
+        Los nombres de una sola etiqueta ("localhost", "nas") van directos al sistema.
+        """
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+        addrs = hosts_file().get(host.lower().rstrip("."))
+        if addrs:
+            return _ipv4_first(addrs)
+        if "." in host.strip("."):
+            v4, v6 = await asyncio.gather(self.resolve(host, QTYPE_A), self.resolve(host, QTYPE_AAAA))
+            if v4 or v6:
+                return _ipv4_first(v4 + v6)
+        return await asyncio.get_running_loop().run_in_executor(None, system_lookup, host)
+
+    async def reverse(self, ip: str) -> Dict:
+        """PTR de `ip`: {"ip", "ptr", "aliases", "status", "cached"} (ptr None si no hay)."""
+        try:
+            qname = ptr_name(ip)
+        except ValueError:
+            return {"ip": ip, "ptr": None, "aliases": [], "status": "invalid", "cached": False}
+        ans = await self.query(qname, QTYPE_PTR)
+        names = ans.values(QTYPE_PTR)
+        if ans.rcode == "ok" and not names:
+            status = "nodata"
+        else:
+            status = ans.rcode
+        return {"ip": ip, "ptr": names[0] if names else None, "aliases": names[1:], "status": status,
+                "cached": ans.cached}
+
+    async def map(self, fn: Callable[[str], Awaitable[Dict]], items: Iterable[str],
+                  on_result: Callable[[Dict], None]) -> int:
+        """
+        Aplica `fn` a `items` con a lo sumo `concurrency` consultas en vuelo y
+        entrega cada resultado a on_result en cuanto llega. `items` se consume
+        según avanza (no se materializa). Devuelve el número de elementos.
+        """
+        it = iter(items)
+        done = 0
+
+        async def _worker() -> None:
+            nonlocal done
+            for item in it:
+                r = await fn(item)
+                done += 1
+                on_result(r)
+
+        await asyncio.gather(*(_worker() for _ in range(self.concurrency)))
+        return done
+
+    async def reverse_many(self, ips: Iterable[str],
+                           on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """PTR de cada IP; con on_result los resultados se entregan sin acumularse."""
+        out: List[Dict] = []
+        await self.map(self.reverse, ips, on_result or out.append)
+        return out
+
+
+def resolve_host(host: str, nameservers=None, *, timeout: float = TIMEOUT, retries: int = RETRIES,
+                 cache: Optional[DNSCache] = None) -> List[str]:
+    """
+    Versión síncrona para el resto de la app: direcciones de `host` (ver
+    AsyncResolver.lookup; [host] si ya es una IP) usando la caché del proceso.
+    No usar desde dentro de un event loop.
+    """
+    try:
+        ipaddress.ip_address(host)
+        return [host]
+    except ValueError:
+        pass
+
+    async def _go() -> List[str]:
+        async with AsyncResolver(nameservers, timeout=timeout, retries=retries,
+                                 cache=cache or get_dns_cache()) as res:
+            return await res.lookup(host)
+
+    return asyncio.run(_go())
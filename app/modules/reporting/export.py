@@ -4,6 +4,11 @@ from pathlib import Path
 from datetime import datetime
 from jinja2 import Environment, BaseLoader
 
+from app.core.model import ASSET_SOURCES, to_jsonable
+
+# Títulos de las secciones de activos en el informe
+ASSET_LABELS = [(src, {"nmap": "Nmap", "tcp_sweep": "barrido TCP", "nmap_import": "Nmap (importado)"}.get(src, src)) for src in ASSET_SOURCES]
+
 
 JINJA_TEMPLATE = """<!doctype html>
 <html lang="es">
@@ -34,10 +39,11 @@ JINJA_TEMPLATE = """<!doctype html>
     <div><strong>Herramientas</strong></div><div>{{ job.tools|join(", ") }}</div>
   </div>
 
-  {% if job.results.nmap %}
+  {% for src, label in asset_sources %}
+  {% if job.results.get(src) %}
   <div class="card">
-    <h2>Resultados Nmap</h2>
-    {% set assets = job.results.nmap.assets %}
+    <h2>Resultados {{ label }}</h2>
+    {% set assets = job.results.get(src).assets %}
     {% if assets %}
     <table>
       <thead>
@@ -69,10 +75,11 @@ JINJA_TEMPLATE = """<!doctype html>
       </tbody>
     </table>
     {% else %}
-      <p class="muted">Nmap no devolvió activos.</p>
+      <p class="muted">{{ label }} no devolvió activos.</p>
     {% endif %}
   </div>
   {% endif %}
+  {% endfor %}
 
   {% if job.results.local_enum %}
   <div class="card">
@@ -211,7 +218,7 @@ JINJA_TEMPLATE = """<!doctype html>
 {% if include_routes %}
 <script>
   window.APP_ROUTES = {
-    EVENTS_URL: "{{ url_for('main.events') }}",
+    EVENTS_URL: "{{ url_for('main.events', topic='status') }}",
     API_REPORTS_URL: "{{ url_for('main.api_reports') }}",
     API_HARVESTER_URL: "{{ url_for('main.harvester_scan') }}",
     JOB_DETAIL_URL_TMPL: "{{ url_for('main.job_detail', job_id='__ID__') }}",
@@ -264,9 +271,10 @@ def export_to_jsonl(job) -> str:
     with path.open("w", encoding="utf-8") as f:
         results = job.results or {}
 
-        # Hosts de Nmap
-        for h in results.get("nmap", {}).get("assets", []):
-            f.write(json.dumps({"type": "nmap_host", **h}, ensure_ascii=False) + "\n")
+        # Hosts de Nmap / barrido TCP (nmap_host, tcp_sweep_host)
+        for src in ASSET_SOURCES:
+            for h in (results.get(src) or {}).get("assets", []):
+                f.write(json.dumps({"type": f"{src}_host", **h}, ensure_ascii=False, default=to_jsonable) + "\n")
 
         # Hosts de theharvester
         for h in results.get("theharvester", {}).get("hosts", []):
@@ -280,6 +288,20 @@ def export_to_jsonl(job) -> str:
         for s in results.get("theharvester", {}).get("shodan", []):
             f.write(json.dumps({"type": "harvester_shodan", "entry": s}, ensure_ascii=False) + "\n")
 
+        # Shodan: consulta única (resultados en memoria) o lote (volcados ya a disco
+        # por el plugin: se copian línea a línea, sin cargarlos)
+        shodan = results.get("shodan") or {}
+        if shodan.get("results_file"):
+            part = out_dir / shodan["results_file"]
+            if part.exists():
+                with part.open("r", encoding="utf-8") as src:
+                    for line in src:
+                        f.write(line)
+        else:
+            for r in shodan.get("results") or []:
+                f.write(json.dumps({"type": "shodan_result", "query": shodan.get("query"), **r},
+                                   ensure_ascii=False) + "\n")
+
         # Otros módulos locales
         local = results.get("local_enum") or {}
         if local:
@@ -307,10 +329,11 @@ def export_to_html(job) -> str:
 
     # Prepara entorno Jinja (tojson sencillo)
     env = Environment(loader=BaseLoader(), autoescape=False, trim_blocks=True, lstrip_blocks=True)
-    env.filters["tojson"] = lambda v, indent=None: json.dumps(v, ensure_ascii=False, indent=indent)
+    env.filters["tojson"] = lambda v, indent=None: json.dumps(v, ensure_ascii=False, indent=indent, default=to_jsonable)
 
     template = env.from_string(JINJA_TEMPLATE)
-    html = template.render(job=job, generated=datetime.utcnow().isoformat() + "Z")
+    html = template.render(job=job, asset_sources=ASSET_LABELS,
+                           generated=datetime.utcnow().isoformat() + "Z")
 
     out_dir = Path(getattr(job, "report_dir", "reports/output"))
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,77 @@
+# app/modules/shodan/batch.py
+"""
+Búsquedas de Shodan en lote: muchas consultas (por organización, por netblock…)
+con concurrencia acotada y paginación.
+
+Cada consulta recorre sus páginas en orden (`page` = 2, 3… en la petición) hasta
+que el backend devuelve una página vacía, se alcanza el total anunciado
+("total" o "count") o `max_pages`. Cada página se entrega a on_page en cuanto
+llega y no se acumula: quien llama decide si la escribe a disco, la emite o la
+descarta. Las páginas pasan por la caché de consultas (cache.search).
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.modules.shodan import cache as shodan_cache
+
+CONCURRENCY = 4
+MAX_PAGES = 10
+
+
+def iter_pages(query: str, *, max_pages: int = MAX_PAGES, refresh: bool = False) -> Iterator[Tuple[int, Dict, str]]:
+    """(nº de página, datos, origen en caché) de cada página de `query`."""
+    fetched = 0
+    for page in range(1, max(1, max_pages) + 1):
+        # La página 1 va sin parámetro: comparte entrada de caché con la búsqueda normal
+        params = {"page": page} if page > 1 else {}
+        data, source = shodan_cache.search(query, refresh=refresh, **params)
+        results = data.get("results") or []
+        if not results:
+            return
+        yield page, data, source
+        fetched += len(results)
+        total = data.get("total", data.get("count"))
+        if isinstance(total, int) and fetched >= total:
+            return
+
+
+def run_batch(queries: Iterable[str], *, concurrency: int = CONCURRENCY, max_pages: int = MAX_PAGES,
+              refresh: bool = False,
+              on_page: Optional[Callable[[str, int, Dict, str], None]] = None,
+              on_query: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Lanza `queries` (sin vacías ni repetidas) con como mucho `concurrency` a la
+    vez (además del límite global del cliente). on_page(query, página, datos,
+    origen) y on_query(resumen) se llaman serializados. Devuelve un resumen por consulta, en el orden de
+    entrada: {"query", "pages", "results", "total", "cached_pages", "error"}.
+    """
+    queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+    lock = threading.Lock()
+
+    def _one(query: str) -> Dict:
+        summary = {"query": query, "pages": 0, "results": 0, "total": None, "cached_pages": 0, "error": None}
+        try:
+            for page, data, source in iter_pages(query, max_pages=max_pages, refresh=refresh):
+                with lock:
+                    summary["pages"] += 1
+                    summary["results"] += len(data.get("results") or [])
+                    summary["total"] = data.get("total", data.get("count"))
+                    summary["cached_pages"] += source != "miss"
+                    if on_page is not None:
+                        on_page(query, page, data, source)
+        except Exception as ex:   # una consulta fallida no detiene el lote
+            summary["error"] = str(ex)
+        with lock:
+            if on_query is not None:
+                on_query(summary)
+        return summary
+
+    out: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(queries) or 1))) as pool:
+        futures = {pool.submit(_one, q): q for q in queries}
+        for fut in as_completed(futures):
+            out[futures[fut]] = fut.result()
+    return [out[q] for q in queries]
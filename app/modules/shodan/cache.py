@@ -0,0 +1,207 @@
+# app/modules/shodan/cache.py
+"""
+Caché de consultas delante del cliente de Shodan (ver client.py).
+
+- Clave normalizada: espacios colapsados y nombre de filtro en minúsculas
+  ("Product:Apache  port:80" ≡ "product:Apache port:80"). El orden de los
+  términos se respeta: con frases, negaciones u OR dos órdenes distintos pueden
+  ser consultas distintas. Los parámetros extra (página…) forman parte de la clave.
+- TTL y tamaño máximo en memoria con expulsión LRU.
+- Persistencia opcional en SQLite (`path`): sobrevive a reinicios y la comparten
+  los workers del mismo host.
+- Coalescencia: si una consulta idéntica ya está en vuelo, las demás esperan a
+  su resultado en vez de repetirla contra el backend.
+Los errores no se guardan.
+"""
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.modules.shodan.client import get_shodan_client
+
+TTL = 600.0
+MAX_ENTRIES = 1000
+
+_TERMS = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+
+
+def normalize_query(query: str) -> str:
+    terms = []
+    for term in _TERMS.findall(query or ""):
+        name, sep, value = term.partition(":")
+        terms.append(f"{name.lower()}:{value}" if sep and '"' not in name else term)
+    return " ".join(terms)
+
+
+def cache_key(query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    key = normalize_query(query)
+    if params:
+        key += " " + json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return key
+
+
+class ShodanQueryCache:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS shodan_queries (
+        key     TEXT PRIMARY KEY,
+        data    TEXT NOT NULL,
+        stored  REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS shodan_queries_stored ON shodan_queries(stored);
+    """
+
+    def __init__(self, ttl: float = TTL, max_entries: int = MAX_ENTRIES, path: Optional[str] = None) -> None:
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.db: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript(self.SCHEMA)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.backend_calls = 0
+        self.errors = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # ---- almacenamiento (con self.lock tomado) ----
+    def _get(self, key: str, now: float) -> Optional[Dict]:
+        entry = self._data.get(key)
+        if entry is not None:
+            if now - entry[0] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._data[key]
+        if self.db is not None:
+            row = self.db.execute("SELECT data, stored FROM shodan_queries WHERE key = ? AND stored > ?",
+                                  (key, now - self.ttl)).fetchone()
+            if row is not None:
+                data = json.loads(row[0])
+                self._put_memory(key, data, row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return data
+        return None
+
+    def _put_memory(self, key: str, data: Dict, stored: float) -> None:
+        self._data[key] = (stored, data)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _put(self, key: str, data: Dict, now: float) -> None:
+        self._put_memory(key, data, now)
+        if self.db is not None:
+            with self.db:
+                self.db.execute("INSERT OR REPLACE INTO shodan_queries (key, data, stored) VALUES (?, ?, ?)",
+                                (key, json.dumps(data), now))
+                self.db.execute("DELETE FROM shodan_queries WHERE stored < ?", (now - self.ttl,))
+
+    # ---- API ----
+    def fetch(self, key: str, loader: Callable[[], Dict], *, refresh: bool = False) -> Tuple[Dict, str]:
+        """
+        Devuelve (datos, origen) con origen "hit" | "coalesced" | "miss".
+        refresh=True ignora lo guardado (pero no una petición idéntica en vuelo)
+        y guarda el resultado nuevo.
+        """
+        if not self.enabled:
+            with self.lock:
+                self.backend_calls += 1
+            return loader(), "miss"
+        with self.lock:
+            now = time.time()
+            data = None if refresh else self._get(key, now)
+            if data is not None:
+                return data, "hit"
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+                self.backend_calls += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result(), "coalesced"
+        try:
+            data = loader()
+        except BaseException as ex:
+            with self.lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            fut.set_exception(ex)
+            raise
+        with self.lock:
+            self._put(key, data, time.time())
+            self._inflight.pop(key, None)
+        fut.set_result(data)
+        return data, "miss"
+
+    def clear(self) -> None:
+        with self.lock:
+            self._data.clear()
+            if self.db is not None:
+                with self.db:
+                    self.db.execute("DELETE FROM shodan_queries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "persistent": self.db is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "backend_calls": self.backend_calls,
+                "errors": self.errors,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_CACHE = ShodanQueryCache()
+_CACHE_LOCK = threading.Lock()
+
+
+def configure(ttl: float = TTL, max_entries: int = MAX_ENTRIES, path: Optional[str] = None) -> ShodanQueryCache:
+    """(Re)crea la caché del proceso con la configuración de la app."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = ShodanQueryCache(ttl, max_entries, path)
+        return _CACHE
+
+
+def get_query_cache() -> ShodanQueryCache:
+    return _CACHE
+
+
+def search(query: str, *, refresh: bool = False, **params: Any) -> Tuple[Dict, str]:
+    """Búsqueda a través de la caché: (datos, "hit" | "coalesced" | "miss")."""
+    return get_query_cache().fetch(cache_key(query, params),
+                                   lambda: get_shodan_client().search(query, **params), refresh=refresh)
@@ -0,0 +1,105 @@
+# app/modules/shodan/client.py
+"""
+Cliente HTTP del backend de búsqueda de Shodan (SHODAN_SEARCH_URL).
+
+Una sola requests.Session por proceso, compartida por el plugin `shodan` y la
+ruta /shodan/search:
+- pool de conexiones keep-alive (sin TCP/TLS nuevo por consulta),
+- como mucho `max_concurrency` peticiones a la vez contra el backend,
+- reintentos con backoff exponencial en errores de conexión y 429/5xx
+  (respetando Retry-After),
+- timeouts de conexión y de lectura por separado.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SEARCH_URL = os.getenv("SHODAN_SEARCH_URL", "http://localhost:3000/search")
+POOL_SIZE = 10
+MAX_CONCURRENCY = 8
+RETRIES = 3
+BACKOFF = 0.5
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30.0
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class ShodanClient:
+    def __init__(self, url: str = SEARCH_URL, *, pool_size: int = POOL_SIZE,
+                 max_concurrency: int = MAX_CONCURRENCY, retries: int = RETRIES, backoff: float = BACKOFF,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT) -> None:
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=backoff, status_forcelist=RETRY_STATUS,
+            # La búsqueda es idempotente aunque vaya por POST
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, self.max_concurrency),
+                              max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def post(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST JSON al backend; lanza requests.RequestException si falla tras los reintentos."""
+        with self._slots:
+            try:
+                r = self.session.post(self.url, json=payload, timeout=self.timeout)
+                r.raise_for_status()
+                data = r.json()
+            except requests.RequestException:   # incluye JSON inválido (requests.JSONDecodeError)
+                with self._lock:
+                    self.requests += 1
+                    self.errors += 1
+                raise
+        with self._lock:
+            self.requests += 1
+        return data
+
+    def search(self, query: str, **params: Any) -> Dict[str, Any]:
+        return self.post({"query": query, **params})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"url": self.url, "requests": self.requests, "errors": self.errors,
+                    "max_concurrency": self.max_concurrency}
+
+
+_CLIENT: Optional[ShodanClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def configure(url: str = SEARCH_URL, **kwargs: Any) -> ShodanClient:
+    """(Re)crea el cliente del proceso con la configuración de la app."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        old, _CLIENT = _CLIENT, ShodanClient(url, **kwargs)
+    if old is not None:
+        old.close()
+    return _CLIENT
+
+
+def get_shodan_client() -> ShodanClient:
+    """Instancia única del proceso (create_app la configura desde config)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = ShodanClient()
+        return _CLIENT
@@ -1,8 +1,10 @@
 from . import nmap as nmap_plugin
+from . import nmap_import as nmap_import_plugin
 from .local import local_enum as local_enum_plugin
 from . import dns_reverse as dns_reverse_plugin
 from . import shodan as shodan_plugin
 from . import theharvester as theharvester_plugin
+from . import tcp_sweep as tcp_sweep_plugin
 
 
 def get_available_tools():
@@ -15,4 +17,6 @@ def get_available_tools():
         "dns_reverse": lambda target, emit, meta: dns_reverse_plugin.run(target, emit=emit, meta=meta),
         "shodan": lambda target, emit, meta: shodan_plugin.run(target, emit=emit, meta=meta),
         "theharvester": lambda target, emit, meta: theharvester_plugin.run(target, emit=emit, meta=meta),
+        "tcp_sweep": lambda target, emit, meta: tcp_sweep_plugin.run(target, emit=emit, meta=meta),
+        "nmap_import": lambda target, emit, meta: nmap_import_plugin.run(target, emit=emit, meta=meta),
     }
@@ -1,54 +1,75 @@
 from __future__ import annotations
-import ipaddress, socket
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio, time
+from collections import Counter
+from itertools import chain
 
-def _rev(ip: str, timeout: float = 1.5):
-    try:
-        socket.setdefaulttimeout(timeout)
-        name, aliases, _ = socket.gethostbyaddr(ip)
-        return {"ip": ip, "ptr": name, "aliases": aliases}
-    except Exception:
-        return {"ip": ip, "ptr": None, "aliases": []}
-
-def _iter_ips_from_target(target: str, max_hosts: int = 256):
-    target = (target or "").strip()
-    if not target:
-        return []
-    # IP única
-    try:
-        ipaddress.IPv4Address(target)
-        return [target]
-    except Exception:
-        pass
-    # CIDR
-    try:
-        net = ipaddress.ip_network(target, strict=False)
-        hosts = [str(h) for h in net.hosts()]
-        return hosts[:max_hosts]
-    except Exception:
-        pass
-    # Hostname → resolvemos A y lo tratamos como IP única
-    try:
-        return [socket.gethostbyname(target)]
-    except Exception:
-        return []
+from app.core.targets import parse_targets
+from app.modules.dns import resolver as dns
+from app.modules.dns.cache import get_dns_cache
+
+PROGRESS_MIN_SECS = 2.0
+
+def _iter_ips_from_target(target: str, resolvers=None):
+    """(IPs bajo demanda, nº total): IPs, CIDR, rangos, listas y exclusiones sin expandir."""
+    targets = parse_targets(target)
+    # Hostnames → resolvemos A/AAAA (hosts, caché DNS del proceso, sistema) y tratamos cada IP
+    resolved = {}
+    for name in targets.names:
+        try:
+            resolved.update((ip, None) for ip in dns.resolve_host(name, resolvers) if ip not in targets)
+        except Exception:
+            pass
+    return chain(targets.addresses(), resolved), targets.address_count + len(resolved)
+
+async def _reverse_all(ips, opts, on_result):
+    async with dns.AsyncResolver(opts["resolvers"], timeout=opts["timeout"], retries=opts["retries"],
+                                 concurrency=opts["concurrency"], cache=get_dns_cache()) as res:
+        await res.reverse_many(ips, on_result=on_result)
 
 def run(target: str, emit=print, meta=None):
     meta = meta or {}
-    ips = _iter_ips_from_target(target)
-    if not ips:
+    resolvers = dns.parse_nameservers(meta.get("dns_resolvers"))
+    try:
+        ips, total = _iter_ips_from_target(target, resolvers=resolvers)
+    except ValueError as ex:
+        emit({"warn": f"Objetivo no válido: {ex}"})
+        return {"ptrs": [], "count": 0}
+    if not total:
         emit({"warn": "No se han obtenido IPs para DNS inversa"})
         return {"ptrs": [], "count": 0}
 
-    emit({"info": f"PTR sobre {len(ips)} objetivo(s)"})
+    # Consultas PTR por UDP contra los resolutores configurados (asyncio, sin hilos
+    # ni socket.setdefaulttimeout, que afectaba a todo el proceso)
+    opts = {
+        "resolvers": resolvers,
+        "timeout": float(meta.get("dns_timeout") or dns.TIMEOUT),
+        "retries": int(meta.get("dns_retries") if meta.get("dns_retries") is not None else dns.RETRIES),
+        "concurrency": int(meta.get("dns_concurrency") or dns.CONCURRENCY),
+    }
+    servers = ", ".join(f"{h}:{p}" for h, p in opts["resolvers"])
+    emit({"info": f"PTR sobre {total} objetivo(s) vía {servers}"})
     out = []
-    with ThreadPoolExecutor(max_workers=16) as pool:
-        futures = [pool.submit(_rev, ip) for ip in ips]
-        for f in as_completed(futures):
-            r = f.result()
-            if r.get("ptr"):
-                out.append(r)
-                emit({"match": r})
-
-    emit({"summary": f"{len(out)} PTR(s) resueltos"})
-    return {"ptrs": out, "count": len(out)}
+    status = Counter()
+    hits = 0
+    last = {"t": 0.0}
+
+    def _on_result(r):
+        nonlocal hits
+        status[r["status"]] += 1
+        hits += r.pop("cached")
+        if r.get("ptr"):
+            out.append(r)
+            emit({"match": r})
+        done = sum(status.values())
+        now = time.monotonic()
+        if done < total and now - last["t"] < PROGRESS_MIN_SECS:
+            return
+        last["t"] = now
+        emit({"progress": {"percent": round(done * 100.0 / total, 2), "task": "DNS PTR"}})
+
+    asyncio.run(_reverse_all(ips, opts, _on_result))
+    if status.get("timeout"):
+        emit({"warn": f"{status['timeout']} consulta(s) PTR sin respuesta"})
+    emit({"dns_cache": {**get_dns_cache().stats(), "job_hits": hits}})
+    emit({"summary": f"{len(out)} PTR(s) resueltos ({hits} desde caché)"})
+    return {"ptrs": out, "count": len(out), "status": dict(status), "cache_hits": hits}
@@ -1,32 +1,97 @@
-from app.modules.acquisition.nmap_acq import scan_network_or_host
+import time
+from datetime import datetime, timezone
+
+from app.core.targets import parse_targets
+from app.modules.acquisition.fingerprint_cache import get_fingerprint_cache
+from app.modules.acquisition.nmap_acq import (
+    SHARD_MAX_PROCS, SHARD_PREFIX, fingerprint_cacheable, fingerprint_services, quick_scan_options,
+    scan_network_or_host, scan_pipelined, scan_sharded, shard_targets, stream_network_or_host,
+)
+
+# Mínimo entre eventos de progreso (nmap los da cada --stats-every)
+PROGRESS_MIN_SECS = 2.0
+
+
+def _fingerprint_cache(meta):
+    # nmap_fp_cache (ruta SQLite) y nmap_fp_ttl (segundos) llegan de create_app; ttl 0 = sin caché
+    # (por defecto). Opcional: retrasa la emisión de hosts al segundo paso y un cambio de servicio
+    # en un ip:puerto con huella vigente no se ve hasta que caduca (ver README)
+    path, ttl = meta.get("nmap_fp_cache"), float(meta.get("nmap_fp_ttl") or 0)
+    return get_fingerprint_cache(path, ttl) if path and ttl > 0 else None
+
 
 def run(target: str, emit=print, meta=None):
     meta = meta or {}
     extra = meta.get("nmap_opts") or []   # ← llega desde /api/scan
     # por defecto -sV, y añade extras sin duplicar
     opts = ["-sV"] + [o for o in extra if o not in ("-sV",)]
+    # Objetivos normalizados (rangos fusionados, exclusiones "!x" aplicadas) en sintaxis de nmap
+    targets = parse_targets(target, hosts_only=False)
+    if not targets:
+        emit({"warn": "Sin objetivos para nmap"})
+        return {"meta": {"cmd": "", "returncode": 0, "stderr": ""}, "assets": []}
+    target = targets.to_nmap()
     emit({"cmd": f"nmap {' '.join(opts)} {target}".strip()})
-    assets, meta_out = scan_network_or_host(target, opts)
-    out = {
-        "meta": meta_out,
-        "assets": [
-            {
-                "ip": a.get("ip") if isinstance(a, dict) else getattr(a, "ip", None),
-                "hostname": a.get("hostname") if isinstance(a, dict) else getattr(a, "hostname", None),
-                "os": a.get("os") if isinstance(a, dict) else getattr(a, "os", None),
-                "ports": [
-                    {
-                        "port": p.get("port") if isinstance(p, dict) else getattr(p, "port", None),
-                        "state": p.get("state") if isinstance(p, dict) else getattr(p, "state", None),
-                        "proto": p.get("proto") if isinstance(p, dict) else getattr(p, "proto", "tcp"),
-                        "service": p.get("service") if isinstance(p, dict) else getattr(p, "service", None),
-                        "product": p.get("product") if isinstance(p, dict) else getattr(p, "product", None),
-                        "version": p.get("version") if isinstance(p, dict) else getattr(p, "version", None),
-                    } for p in (a.get("ports", []) if isinstance(a, dict) else getattr(a, "ports", []))
-                ],
-            }
-            for a in assets
-        ],
-    }
+
+    if meta.get("nmap_stream", True):
+        # Streaming: cada host llega a la UI en cuanto Nmap lo cierra
+        # Los Asset (slots) se emiten y devuelven tal cual: se serializan al volcarse a JSON
+        def _on_asset(a):
+            emit({"host": a})
+
+        last = {"t": 0.0, "percent": None}
+
+        def _on_progress(p):
+            # Throttle: como mucho un evento cada PROGRESS_MIN_SECS y solo si cambia
+            now = time.monotonic()
+            if p.get("percent") is None or p["percent"] == last["percent"]:
+                return
+            if now - last["t"] < PROGRESS_MIN_SECS and p["percent"] < 100:
+                return
+            last.update(t=now, percent=p["percent"])
+            eta = None
+            if p.get("etc"):
+                eta = datetime.fromtimestamp(p["etc"], tz=timezone.utc).isoformat().replace("+00:00", "Z")
+            emit({"progress": {"percent": p["percent"], "remaining": p.get("remaining"),
+                               "eta": eta, "task": p.get("task")}})
+
+        # Rangos grandes: varios nmap en paralelo (nmap_shard_prefix / nmap_max_procs)
+        max_procs = int(meta.get("nmap_max_procs") or SHARD_MAX_PROCS)
+        prefix = int(meta.get("nmap_shard_prefix") or SHARD_PREFIX)
+        shards = shard_targets(target, prefix)
+
+        def _scan(scan_opts, on_asset):
+            # Varios hosts: primero -sn y -sV solo sobre los vivos (salvo -Pn/-sn explícitos)
+            pipeline = (meta.get("nmap_discovery", True) and not {"-Pn", "-sn"} & set(scan_opts)
+                        and (len(shards) > 1 or targets.count > 1))
+            if pipeline:
+                emit({"pipeline": "descubrimiento (-sn) → escaneo de hosts vivos", "max_procs": max_procs})
+                return scan_pipelined(target, scan_opts, max_procs=max_procs, prefix=prefix,
+                                      on_asset=on_asset, on_progress=_on_progress)
+            if max_procs > 1 and len(shards) > 1:
+                emit({"shards": len(shards), "max_procs": max_procs})
+                # orden determinista (por IP)
+                return scan_sharded(target, scan_opts, shards=shards, max_procs=max_procs,
+                                    on_asset=on_asset, on_progress=_on_progress)
+            return stream_network_or_host(target, scan_opts, on_asset=on_asset, on_progress=_on_progress)
+
+        cache = _fingerprint_cache(meta)
+        if cache is not None and fingerprint_cacheable(opts):
+            # Escaneo rápido de puertos y -sV solo en puertos sin huella vigente
+            quick, quick_meta = _scan(quick_scan_options(opts), None)
+            hosts, fp_meta = fingerprint_services(quick, opts, cache, max_procs=max_procs, on_asset=_on_asset)
+            stats = fp_meta["fingerprint_cache"]
+            emit({"fingerprint_cache": stats})
+            meta_out = {**quick_meta, "service_scan": fp_meta, "fingerprint_cache": stats}
+            if fp_meta.get("returncode"):
+                meta_out["returncode"] = fp_meta["returncode"]
+        else:
+            hosts, meta_out = _scan(opts, _on_asset)
+            if cache is not None and "-sV" in opts:
+                cache.store(hosts)
+    else:
+        hosts, meta_out = scan_network_or_host(target, opts)
+
+    out = {"meta": meta_out, "assets": hosts}
     emit({"summary": f"{len(out['assets'])} host(s) procesados"})
     return out
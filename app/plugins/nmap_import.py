@@ -0,0 +1,42 @@
+import os
+import shutil
+
+from app.modules.acquisition.nmap_import import IMPORT_MAX_PROCS, import_files
+
+
+def run(target: str, emit=print, meta=None):
+    """
+    Importa XML de nmap ya existentes (meta["import_files"], rutas en el servidor).
+    Devuelve lo mismo que el plugin de nmap: {"meta", "assets"}.
+    Los ficheros subidos (meta["import_dir"]) se borran al terminar, haya error o no.
+    """
+    meta = meta or {}
+    try:
+        return _run(emit, meta)
+    finally:
+        if meta.get("import_dir"):
+            shutil.rmtree(meta["import_dir"], ignore_errors=True)
+
+
+def _run(emit, meta):
+    files = list(meta.get("import_files") or [])
+    if not files:
+        emit({"warn": "No hay ficheros XML que importar"})
+        return {"meta": {"cmd": "nmap_import", "returncode": 0, "stderr": "", "files": []}, "assets": []}
+    emit({"cmd": f"nmap_import {len(files)} fichero(s)"})
+
+    done = 0
+
+    def _on_file(path, hosts, error):
+        nonlocal done
+        done += 1
+        msg = {"file": os.path.basename(path), "hosts": hosts}
+        if error:
+            msg["error"] = error
+        emit(msg)
+        emit({"progress": {"percent": round(done * 100.0 / len(files), 2), "task": "Importación XML"}})
+
+    assets, meta_out = import_files(files, max_procs=int(meta.get("import_max_procs") or IMPORT_MAX_PROCS),
+                                    on_file=_on_file)
+    emit({"summary": f"{len(assets)} host(s) importados de {len(files)} fichero(s)"})
+    return {"meta": meta_out, "assets": assets}
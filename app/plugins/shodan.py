@@ -1,13 +1,70 @@
-import os, requests
+import json, os
 
-SEARCH_BACKEND = os.getenv("SHODAN_SEARCH_URL", "http://localhost:3000/search")
+from app.modules.shodan import cache as shodan_cache
+from app.modules.shodan.batch import CONCURRENCY, MAX_PAGES, run_batch
+from app.modules.shodan.client import get_shodan_client
 
 def run(target, emit, meta=None):
-    """target = cadena de consulta (ej. 'product:Apache')"""
-    emit("info", f"Consultando {SEARCH_BACKEND} con query: {target}")
-    r = requests.post(SEARCH_BACKEND, json={"query": target}, timeout=30)
-    r.raise_for_status()
-    data = r.json()
+    """
+    target = cadena de consulta (ej. 'product:Apache').
+    Con meta["shodan_queries"] (lista) se ejecuta en modo lote: ver _run_batch.
+    """
+    meta = meta or {}
+    if meta.get("shodan_queries"):
+        return _run_batch(meta["shodan_queries"], emit, meta)
+    # Caché de consultas + cliente compartido (pool keep-alive, reintentos y timeouts)
+    emit({"info": f"Consultando {get_shodan_client().url} con query: {target}"})
+    data, source = shodan_cache.search(target, refresh=bool(meta.get("shodan_refresh")))
+    if source != "miss":
+        emit({"info": "Resultado desde caché" if source == "hit" else "Resultado de una consulta idéntica en curso"})
     results = data.get("results", [])
-    emit("result", {"query": data.get("query", target), "count": data.get("count", len(results))})
-    return data
\ No newline at end of file
+    emit({"result": {"query": data.get("query", target), "count": data.get("count", len(results))}})
+    return data
+
+def _run_batch(queries, emit, meta):
+    """
+    Varias consultas con concurrencia acotada y paginación. Los resultados de
+    cada página se añaden en cuanto llega a <report_dir>/shodan_<job>.jsonl
+    (export_to_jsonl los copia después al JSONL del job); los eventos del job
+    solo llevan recuentos y la ruta del fichero, no los resultados. El plugin
+    devuelve únicamente el resumen.
+    """
+    if isinstance(queries, str):
+        queries = queries.splitlines()
+    queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))   # mismo criterio que run_batch
+    concurrency = int(meta.get("shodan_concurrency") or CONCURRENCY)
+    max_pages = int(meta.get("shodan_max_pages") or MAX_PAGES)
+    out_dir = meta.get("report_dir") or "reports/output"
+    os.makedirs(out_dir, exist_ok=True)
+    name = f"shodan_{meta.get('job_id') or 'batch'}.jsonl"
+    emit({"info": f"Lote Shodan: {len(queries)} consulta(s), {concurrency} a la vez, hasta {max_pages} página(s)"})
+
+    total = 0
+    done = 0
+    with open(os.path.join(out_dir, name), "w", encoding="utf-8") as fh:
+        def _on_page(query, page, data, source):
+            nonlocal total
+            results = data.get("results") or []
+            for r in results:
+                fh.write(json.dumps({"type": "shodan_result", "query": query, "page": page, **r},
+                                    ensure_ascii=False) + "\n")
+            fh.flush()
+            total += len(results)
+            emit({"page": {"query": query, "page": page, "count": len(results),
+                           "total": data.get("total", data.get("count")), "source": source,
+                           "results_file": name}})
+
+        def _on_query(summary):
+            nonlocal done
+            done += 1
+            if summary["error"]:
+                emit({"warn": f"{summary['query']}: {summary['error']}"})
+            emit({"progress": {"percent": round(done * 100.0 / len(queries), 2),
+                               "task": f"Shodan ({done}/{len(queries)} consultas)"}})
+
+        summaries = run_batch(queries, concurrency=concurrency, max_pages=max_pages,
+                              refresh=bool(meta.get("shodan_refresh")), on_page=_on_page, on_query=_on_query)
+
+    failed = sum(1 for s in summaries if s["error"])
+    emit({"summary": f"{total} resultado(s) de {len(queries)} consulta(s)" + (f", {failed} con error" if failed else "")})
+    return {"batch": True, "queries": summaries, "count": total, "results_file": name}
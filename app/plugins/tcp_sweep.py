@@ -0,0 +1,225 @@
+"""
+Barrido TCP connect asíncrono (pre-escaneo rápido).
+
+Responde a "qué ip:puerto están abiertos" sin lanzar nmap: un único event loop
+con un número acotado de conexiones en vuelo, límite de conexiones simultáneas
+y de ritmo por host, y lista de puertos configurable. Devuelve los activos con
+la misma forma que el plugin de nmap ({"meta", "assets"}), de modo que la
+correlación y los exportadores los tratan igual.
+
+Opciones (meta del job; por defecto las de config vía JobManager.tool_defaults):
+    tcp_sweep_ports        "22,80,443,8000-8010"
+    tcp_sweep_concurrency  sockets en vuelo (total)
+    tcp_sweep_per_host     conexiones simultáneas por host
+    tcp_sweep_host_rate    conexiones por segundo y host (0 = sin límite)
+    tcp_sweep_timeout      segundos por intento de conexión
+"""
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.model import Asset, PortInfo
+from app.core.targets import TargetSet, parse_targets
+from app.modules.dns.cache import get_dns_cache
+from app.modules.dns.resolver import AsyncResolver
+
+DEFAULT_PORTS = "21,22,23,25,53,80,110,111,135,139,143,443,445,993,995,1433,1521,2049,3306,3389,5432,5900,6379,8080,8443,9200"
+CONCURRENCY = 512
+PER_HOST = 16
+HOST_RATE = 0.0
+TIMEOUT = 1.0
+PROGRESS_MIN_SECS = 2.0
+
+
+def parse_ports(spec: str) -> List[int]:
+    """'22,80,8000-8010' → [22, 80, 8000, ..., 8010] (sin duplicados, en orden)."""
+    ports: Dict[int, None] = {}
+    for part in str(spec or "").replace(" ", "").split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        a, b = int(lo), int(hi or lo)
+        if not (0 < a <= b <= 65535):
+            raise ValueError(f"Rango de puertos no válido: {part}")
+        ports.update((p, None) for p in range(a, b + 1))
+    return list(ports)
+
+
+def _iter_hosts(targets: TargetSet, names: Dict[str, Optional[str]]) -> Iterator[Tuple[str, str]]:
+    """(ip, hostname) de cada objetivo, bajo demanda; los hostnames sin resolver se omiten."""
+    for ip in targets.addresses():
+        yield ip, ""
+    for name in targets.names:
+        if names.get(name):
+            yield names[name], name
+
+
+async def _resolve_names(hostnames: List[str], resolvers) -> Dict[str, Optional[str]]:
+    """Una resolución por hostname (caché DNS del proceso) en vez de una por conexión."""
+    names: Dict[str, Optional[str]] = dict.fromkeys(hostnames)
+    if names:
+        async with AsyncResolver(resolvers, cache=get_dns_cache()) as res:
+            for name in names:
+                addrs = await res.lookup(name)
+                names[name] = addrs[0] if addrs else None
+    return names
+
+
+def _service_name(port: int) -> str:
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return ""
+
+
+class _HostLimiter:
+    """Conexiones simultáneas y ritmo (conexiones/s) contra un mismo host."""
+
+    def __init__(self, per_host: int, rate: float) -> None:
+        self.sem = asyncio.Semaphore(max(1, per_host))
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+
+    async def __aenter__(self):
+        await self.sem.acquire()
+        if self.interval:
+            now = time.monotonic()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.sem.release()
+
+
+async def _probe(host: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def sweep(target: str, ports: List[int], *, concurrency: int = CONCURRENCY,
+                per_host: int = PER_HOST, host_rate: float = HOST_RATE, timeout: float = TIMEOUT,
+                resolvers=None, on_host: Optional[Callable[[Asset], None]] = None,
+                on_progress: Optional[Callable[[int, int], None]] = None,
+                on_start: Optional[Callable[[int, List[str]], None]] = None) -> List[Asset]:
+    """
+    Prueba cada host × puerto con connect() y devuelve los hosts con algún puerto
+    abierto. `concurrency` workers fijos consumen un iterador de (host, puerto):
+    los hosts se recorren en bloques de `concurrency` y, dentro de cada bloque,
+    puerto a puerto, así las conexiones en vuelo se reparten entre hosts y el
+    límite por host no acapara el cupo global. Memoria y tareas no dependen de
+    hosts × puertos. on_start(hosts, sin_resolver) se llama tras resolver los
+    hostnames, con el nº real de hosts a sondear.
+    """
+    targets = parse_targets(target)
+    names = await _resolve_names(targets.names, resolvers)
+    n_hosts = targets.address_count + sum(1 for ip in names.values() if ip)
+    if on_start is not None:
+        on_start(n_hosts, [n for n, ip in names.items() if not ip])
+    total = n_hosts * len(ports)
+    done = 0
+    found: List[Asset] = []
+    # Hosts en vuelo: ip → [hostname, limitador, puertos abiertos, sondas pendientes]
+    state: Dict[str, list] = {}
+    hosts = _iter_hosts(targets, names)
+
+    def _probes() -> Iterator[Tuple[str, int]]:
+        while True:
+            chunk = list(islice(hosts, max(1, concurrency)))
+            if not chunk:
+                return
+            block = []
+            for h, hostname in chunk:
+                # Un host repetido (IP y hostname que resuelve a ella) se sondea una vez
+                if h not in state:
+                    state[h] = [hostname, _HostLimiter(per_host, host_rate), [], len(ports)]
+                    block.append(h)
+            for port in ports:
+                for h in block:
+                    yield h, port
+
+    probes = _probes()
+
+    async def _worker() -> None:
+        nonlocal done
+        for host, port in probes:
+            st = state[host]
+            async with st[1]:
+                if await _probe(host, port, timeout):
+                    st[2].append(port)
+            done += 1
+            st[3] -= 1
+            if on_progress is not None:
+                on_progress(done, total)
+            if st[3]:
+                continue
+            del state[host]
+            if st[2]:
+                asset = Asset(ip=host, hostname=st[0],
+                              ports=[PortInfo(port=str(p), state="open", service=_service_name(p))
+                                     for p in sorted(st[2])])
+                found.append(asset)
+                if on_host is not None:
+                    on_host(asset)
+
+    await asyncio.gather(*(_worker() for _ in range(max(1, concurrency))))
+    return found
+
+
+def run(target: str, emit=print, meta=None):
+    meta = meta or {}
+    ports = parse_ports(meta.get("tcp_sweep_ports") or DEFAULT_PORTS)
+    opts = {
+        "concurrency": int(meta.get("tcp_sweep_concurrency") or CONCURRENCY),
+        "per_host": int(meta.get("tcp_sweep_per_host") or PER_HOST),
+        "host_rate": float(meta.get("tcp_sweep_host_rate") or HOST_RATE),
+        "timeout": float(meta.get("tcp_sweep_timeout") or TIMEOUT),
+    }
+    if not parse_targets(target):
+        emit({"warn": "Sin objetivos para el barrido TCP"})
+        return {"meta": {"ports": len(ports), "hosts": 0, **opts}, "assets": []}
+
+    hosts: List[Asset] = []
+    last = {"t": 0.0}
+    counts = {"hosts": 0}
+
+    def _on_start(n_hosts: int, unresolved: List[str]) -> None:
+        # Recuento tras resolver: los hostnames sin dirección no se sondean
+        counts["hosts"] = n_hosts
+        if unresolved:
+            emit({"warn": f"Sin resolver: {', '.join(unresolved)}"})
+        emit({"cmd": f"tcp_sweep {n_hosts} host(s) × {len(ports)} puerto(s)", **opts})
+
+    def _on_host(a: Asset) -> None:
+        hosts.append(a)
+        emit({"host": a})
+
+    def _on_progress(done: int, total: int) -> None:
+        now = time.monotonic()
+        if done < total and now - last["t"] < PROGRESS_MIN_SECS:
+            return
+        last["t"] = now
+        emit({"progress": {"percent": round(done * 100.0 / max(1, total), 2), "task": "TCP connect"}})
+
+    t0 = time.monotonic()
+    asyncio.run(sweep(target, ports, resolvers=meta.get("dns_resolvers"), on_host=_on_host,
+                      on_progress=_on_progress, on_start=_on_start, **opts))
+    n_hosts = counts["hosts"]
+    meta_out = {"ports": len(ports), "hosts": n_hosts, "probes": n_hosts * len(ports),
+                "elapsed": round(time.monotonic() - t0, 2), **opts}
+    emit({"summary": f"{len(hosts)} host(s) con puertos abiertos"})
+    return {"meta": meta_out, "assets": hosts}
@@ -75,7 +75,10 @@
 from __future__ import annotations
 import os
 import json
+import queue
+import re
 import shlex
+import threading
 import time
 import subprocess
 from pathlib import Path
@@ -84,29 +87,122 @@ from typing import Any, Dict, List, Optional
 # === CONFIG ===
 # Ruta al proyecto local de theHarvester (donde está el pyproject.toml)
 HARVESTER_PROJ = Path(os.getenv("FILEPATH_THE_HARVESTER", "")).resolve()
-# Tiempo de espera para que se materialice el JSON si el FS se retrasa (normalmente no hace falta)
-JSON_TIMEOUT_SECS = 10.0
-JSON_POLL_SECS = 0.2
+# Salida en vivo: las líneas se agrupan y se emiten como mucho cada EMIT_MIN_SECS
+# (o antes si se juntan EMIT_MAX_LINES), para no inundar el EventBus
+EMIT_MIN_SECS = 0.5
+EMIT_MAX_LINES = 50
+# Cola de stderr que se conserva para el mensaje de error si el proceso falla
+STDERR_TAIL_CHARS = 4000
+# Fuentes por defecto si el usuario no pasa ninguna
+DEFAULT_SOURCES = ["brave", "censys", "duckduckgo", "otx", "urlscan"]
 
+# "[*] Searching Brave." → fuente en curso (para el progreso)
+_SEARCHING = re.compile(r"Searching\s+(\S+?)\.?\s*$", re.IGNORECASE)
 
-def _wait_for_json(path: Path, timeout: float = JSON_TIMEOUT_SECS, poll: float = JSON_POLL_SECS) -> Dict[str, Any]:
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    """
+    Lee el JSON que theHarvester escribe con -f <base>.
+    Se llama cuando el proceso ya ha terminado: el fichero está completo o no
+    existe, así que no hace falta esperar a que aparezca.
+    """
+    if not path.is_file():
+        raise FileNotFoundError(f"No se generó JSON en {path}")
+    try:
+        with path.open(encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError as ex:
+        raise RuntimeError(f"JSON inválido en {path}: {ex}")
+
+
+def _stream_process(cmd: List[str], emit, *, cwd: str, env: Dict[str, str], sources: List[str]) -> Dict[str, Any]:
     """
-    Espera a que 'path' exista y contenga JSON válido.
-    Normalmente subprocess.run ya garantiza que el fichero está, pero en FS lentos puede tardar milisegundos.
+    Ejecuta `cmd` y reenvía stdout/stderr línea a línea mientras se generan:
+    un hilo por tubería las deja en una cola y este hilo las emite agrupadas
+    ({"stdout": ...} / {"stderr": ...}) con throttle. Las líneas "Searching X"
+    se traducen además en eventos de progreso por fuente.
+    Termina cuando ambas tuberías se cierran y el proceso sale (sin sondeos).
+    :return: {"returncode", "stdout_lines", "stderr_lines", "stderr_tail"}
     """
-    deadline = time.time() + timeout
-    last_exc: Optional[Exception] = None
-    while time.time() < deadline:
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", errors="replace", bufsize=1,
+    )
+    lines: "queue.Queue[Optional[tuple]]" = queue.Queue()
+
+    def _reader(name: str, pipe) -> None:
         try:
-            if path.is_file() and path.stat().st_size > 2:
-                with path.open(encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as ex:  # JSONDecodeError u otros
-            last_exc = ex
-        time.sleep(poll)
-    if last_exc:
-        raise RuntimeError(f"JSON inválido en {path}: {last_exc}")
-    raise FileNotFoundError(f"No se generó JSON en {path} (timeout {timeout}s)")
+            for line in pipe:
+                lines.put((name, line.rstrip("\r\n")))
+        finally:
+            pipe.close()
+            lines.put(None)   # fin de esta tubería
+
+    readers = [threading.Thread(target=_reader, args=(name, pipe), daemon=True)
+               for name, pipe in (("stdout", proc.stdout), ("stderr", proc.stderr))]
+    for t in readers:
+        t.start()
+
+    pending: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+    counts = {"stdout": 0, "stderr": 0}
+    err_tail: List[str] = []
+    seen_sources: List[str] = []
+    last = {"t": time.monotonic()}
+
+    def _flush() -> None:
+        for name, buf in pending.items():
+            if buf:
+                emit({name: "\n".join(buf)})
+                buf.clear()
+        last["t"] = time.monotonic()
+
+    def _on_line(name: str, line: str) -> None:
+        if not line.strip():
+            return
+        counts[name] += 1
+        pending[name].append(line)
+        if name == "stderr":
+            err_tail.append(line)
+            while len(err_tail) > 1 and sum(len(x) for x in err_tail) > STDERR_TAIL_CHARS:
+                err_tail.pop(0)
+        m = _SEARCHING.search(line) if name == "stdout" else None
+        if m and m.group(1).lower() not in seen_sources:
+            seen_sources.append(m.group(1).lower())
+            total = max(len(sources), len(seen_sources))
+            _flush()   # que el log preceda al evento de progreso
+            emit({"progress": {"percent": round(100.0 * (len(seen_sources) - 1) / total, 1),
+                               "task": f"Searching {m.group(1)}"}})
+
+    open_pipes = len(readers)
+    try:
+        while open_pipes:
+            # Bloquea hasta la siguiente línea o hasta que toque vaciar lo acumulado
+            wait = EMIT_MIN_SECS - (time.monotonic() - last["t"])
+            try:
+                item = lines.get(timeout=wait) if wait > 0 else lines.get_nowait()
+            except queue.Empty:
+                _flush()
+                continue
+            if item is None:
+                open_pipes -= 1
+                continue
+            _on_line(*item)
+            if sum(len(b) for b in pending.values()) >= EMIT_MAX_LINES:
+                _flush()
+        _flush()
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        returncode = proc.wait()
+        for t in readers:
+            t.join(timeout=5)
+
+    if sources and returncode == 0:
+        emit({"progress": {"percent": 100.0, "task": "theHarvester"}})
+    return {"returncode": returncode, "stdout_lines": counts["stdout"],
+            "stderr_lines": counts["stderr"], "stderr_tail": "\n".join(err_tail)}
 
 
 def _build_cmd(target: str, out_base: Path, opts: Dict[str, Any]) -> List[str]:
@@ -126,7 +222,7 @@ def _build_cmd(target: str, out_base: Path, opts: Dict[str, Any]) -> List[str]:
         # por defecto puedes poner "all" o una selección razonable
         # cmd += ["-b", "all"]
         # Mejor: deja que el usuario pase sources; si no, usa algunas conocidas:
-        for src in ["brave", "censys", "duckduckgo", "otx", "urlscan"]:
+        for src in DEFAULT_SOURCES:
             cmd += ["-b", src]
 
     # Límites / paginación
@@ -196,34 +292,22 @@ def run(target: str, emit, meta: Optional[Dict[str, Any]] = None) -> Dict[str, A
     env = os.environ.copy()
     # Evitar interferir con el venv de Flask si lo hay
     env.pop("VIRTUAL_ENV", None)
+    # Sin buffer de bloque en la tubería: las líneas llegan según se imprimen
+    env["PYTHONUNBUFFERED"] = "1"
 
-    # Ejecuta theHarvester desde su repo (uv resolverá deps allí)
-    proc = subprocess.run(
-        cmd,
-        cwd=str(HARVESTER_PROJ),
-        env=env,
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-
-    # Logs compactos
-    if proc.stdout:
-        s = proc.stdout
-        emit({"stdout": s[:8000] + ("…" if len(s) > 8000 else "")})
-    if proc.stderr:
-        s = proc.stderr
-        emit({"stderr": s[:4000] + ("…" if len(s) > 4000 else "")})
+    # Ejecuta theHarvester desde su repo (uv resolverá deps allí) con salida en vivo
+    sources = [cmd[i + 1] for i, c in enumerate(cmd[:-1]) if c == "-b"]
+    proc = _stream_process(cmd, emit, cwd=str(HARVESTER_PROJ), env=env, sources=sources)
 
-    if proc.returncode != 0:
-        raise RuntimeError(f"theHarvester returned {proc.returncode}")
+    if proc["returncode"] != 0:
+        tail = proc["stderr_tail"]
+        raise RuntimeError(f"theHarvester returned {proc['returncode']}" + (f": {tail[-500:]}" if tail else ""))
 
-    # Carga el JSON que theHarvester genera automáticamente con -f <base>
+    # El proceso ya ha salido: el JSON de -f <base> está escrito (o no se generó)
     data: Dict[str, Any] = {}
     try:
-        data = _wait_for_json(out_json, timeout=JSON_TIMEOUT_SECS, poll=JSON_POLL_SECS)
+        data = _load_json(out_json)
     except Exception as ex:
-        # Fallback: algunos forks generan JSON como <base>.json después de un pelín de tiempo
         emit({"warn": f"No se pudo leer {out_json}: {ex}"})
 
     # Estructura de retorno que espera tu UI/JobManager
@@ -233,6 +317,8 @@ def run(target: str, emit, meta: Optional[Dict[str, Any]] = None) -> Dict[str, A
             "cmd": " ".join(shlex.quote(c) for c in cmd[2:]) if cmd[:2] == ["uv", "run"] else " ".join(cmd),
             "html": str(out_html),
             "json": str(out_json),
+            "stdout_lines": proc["stdout_lines"],
+            "stderr_lines": proc["stderr_lines"],
         },
     }
 
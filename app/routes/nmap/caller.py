@@ -1,8 +1,27 @@
 import subprocess
 import shlex
+import threading
+
+from app.routes.nmap import parser
 
 # Opciones que requieren root
 ROOT_REQUIRED_FLAGS = {"-sS", "-O", "-A"}
+# Máximo de stderr que se conserva en meta (el resto se descarta)
+STDERR_MAX_CHARS = 8000
+# Intervalo de estadísticas de nmap (<taskprogress>) cuando se pide progreso
+STATS_EVERY = "5s"
+
+
+def _build_cmd(target, extra_args):
+    # Verificar si se requiere root
+    needs_root = any(opt in ROOT_REQUIRED_FLAGS for opt in extra_args)
+
+    # Construir comando (varios objetivos separados por espacio → argumentos aparte)
+    cmd = ["nmap"] + extra_args + ["-oX", "-"] + (target.split() or [target])
+    if needs_root:
+        cmd.insert(0, "sudo")
+    return cmd
+
 
 def run_nmap(target, extra_args=None):
     """
@@ -14,13 +33,7 @@ def run_nmap(target, extra_args=None):
     if extra_args is None:
         extra_args = []
 
-    # Verificar si se requiere root
-    needs_root = any(opt in ROOT_REQUIRED_FLAGS for opt in extra_args)
-
-    # Construir comando
-    cmd = ["nmap"] + extra_args + ["-oX", "-", target]
-    if needs_root:
-        cmd.insert(0, "sudo")
+    cmd = _build_cmd(target, extra_args)
 
     # Ejecutar
     try:
@@ -44,3 +57,56 @@ def run_nmap(target, extra_args=None):
             "stderr": e.stderr.strip() if e.stderr else str(e)
         }
         return "", meta
+
+
+def stream_nmap(target, extra_args=None, on_host=None, on_progress=None, stats_every=STATS_EVERY):
+    """
+    Ejecuta nmap leyendo su XML (-oX -) a medida que se genera.
+    Cada <host> se parsea al cerrarse y se entrega a on_host(dict) sin acumular
+    el documento completo en memoria.
+    Con on_progress se añade --stats-every y se entrega cada <taskprogress>
+    (ver parser.iter_nmap_hosts).
+    :return: meta:dict (mismo formato que run_nmap)
+    """
+    if extra_args is None:
+        extra_args = []
+    if on_progress is not None and "--stats-every" not in extra_args:
+        extra_args = extra_args + ["--stats-every", stats_every]
+
+    cmd = _build_cmd(target, extra_args)
+    meta = {"cmd": " ".join(shlex.quote(c) for c in cmd)}
+
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        meta.update(returncode=-1, stderr=str(e))
+        return meta
+
+    # stderr en un hilo aparte: si se llena la tubería nmap se bloquearía
+    err_chunks = []
+
+    def _drain_stderr():
+        size = 0
+        for line in proc.stderr:
+            if size < STDERR_MAX_CHARS:
+                err_chunks.append(line)
+                size += len(line)
+
+    t = threading.Thread(target=_drain_stderr, daemon=True)
+    t.start()
+
+    try:
+        for host in parser.iter_nmap_hosts(proc.stdout, on_progress=on_progress):
+            if on_host is not None:
+                on_host(host)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+        t.join(timeout=5)
+
+    meta.update(returncode=returncode,
+                stderr=b"".join(err_chunks).decode("utf-8", "replace").strip())
+    return meta
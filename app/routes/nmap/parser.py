@@ -1,6 +1,48 @@
 import xml.etree.ElementTree as ET
+from xml.parsers import expat
 
-def parse_nmap_xml(xml_text):
+try:  # backend opcional, más rápido en ficheros grandes
+    from lxml import etree as LET
+except ImportError:  # pragma: no cover - depende del entorno
+    LET = None
+
+
+# =========================
+# Backends
+# =========================
+# - "lxml":  lxml.etree (C) con XPath precompiladas por host.
+# - "fast":  stdlib, máquina de estados sobre expat (sin árbol ni find/findall).
+# - "etree": stdlib, find/findall por host (implementación original, referencia).
+# Todos producen exactamente la misma salida; "auto" elige lxml si está instalado.
+BACKENDS = ("lxml", "fast", "etree")
+PARSE_ERRORS = (ET.ParseError, expat.ExpatError) + ((LET.XMLSyntaxError,) if LET is not None else ())
+DEFAULT_BACKEND = "auto"
+CHUNK_SIZE = 64 * 1024
+
+
+def available_backends():
+    return [b for b in BACKENDS if b != "lxml" or LET is not None]
+
+
+def resolve_backend(name=None):
+    name = (name or DEFAULT_BACKEND or "auto").lower()
+    if name == "auto":
+        return "lxml" if LET is not None else "fast"
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de parser desconocido: {name}")
+    if name == "lxml" and LET is None:
+        return "fast"
+    return name
+
+
+def set_default_backend(name):
+    """Fija el backend por defecto (create_app lo llama con NMAP_PARSER)."""
+    global DEFAULT_BACKEND
+    resolve_backend(name)
+    DEFAULT_BACKEND = name or "auto"
+
+
+def parse_nmap_xml(xml_text, backend=None):
     """
     Recibe XML de nmap (-oX -) y devuelve una lista de dispositivos:
     [
@@ -15,76 +57,317 @@ def parse_nmap_xml(xml_text):
       },
       ...
     ]
+    backend: "lxml" | "fast" | "etree" | "auto" (por defecto DEFAULT_BACKEND).
     """
     if not xml_text or not xml_text.strip():
         return []
-
+    data = xml_text.encode("utf-8") if isinstance(xml_text, str) else bytes(xml_text)
+    # Por bloques: así el árbol se va liberando host a host también en memoria.
+    # Trozos bytes (no memoryview): XMLPullParser.feed de lxml solo acepta str/bytes
+    chunks = (data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE))
     try:
-        root = ET.fromstring(xml_text)
-    except ET.ParseError:
+        return list(_iter_hosts(chunks, resolve_backend(backend), None))
+    except PARSE_ERRORS:
         # devuelve lista vacía si el XML no es válido
         return []
 
-    hosts_out = []
 
-    for host in root.findall("host"):
-        # incluir solo hosts "up" si viene estado
-        status = host.find("status")
-        if status is not None and status.get("state") not in (None, "up"):
+def iter_nmap_hosts(stream, chunk_size=CHUNK_SIZE, on_progress=None, backend=None, strict=False):
+    """
+    Versión incremental de parse_nmap_xml para un flujo binario (p.ej. proc.stdout
+    de nmap con -oX -, o un fichero abierto en "rb"). Produce cada host (mismo dict
+    que parse_nmap_xml) en cuanto se cierra su <host>, y libera los elementos ya
+    procesados: la memoria no crece con el tamaño del escaneo.
+    Si se pasa on_progress, cada <taskprogress> (nmap --stats-every) se entrega como
+    {"task", "percent", "remaining", "etc"} (remaining en segundos, etc en epoch).
+    Con strict=True un XML inválido o truncado lanza PARSE_ERRORS (tras los hosts leídos).
+    """
+    # read1 devuelve lo que haya disponible en la tubería sin esperar a llenar el
+    # bloque (iterparse usa read(n), que en un pipe espera a tener n bytes)
+    read = getattr(stream, "read1", None) or stream.read
+    chunks = iter(lambda: read(chunk_size), b"")
+    try:
+        yield from _iter_hosts(chunks, resolve_backend(backend), on_progress)
+    except PARSE_ERRORS:
+        # nmap interrumpido o salida truncada: nos quedamos con lo leído
+        if strict:
+            raise
+        return
+
+
+def _iter_hosts(chunks, backend, on_progress):
+    if backend == "fast":
+        machine = _FastHosts(on_progress)
+        for chunk in chunks:
+            yield from machine.feed(chunk)
+        yield from machine.close()
+        return
+    if backend == "lxml":
+        pull = LET.XMLPullParser(events=("end",), tag=("host", "taskprogress"),
+                                 huge_tree=True, resolve_entities=False, no_network=True)
+        gen = _lxml_events(on_progress)
+    else:
+        pull = ET.XMLPullParser(events=("start", "end"))
+        gen = _etree_events(on_progress)
+    next(gen)
+    for chunk in chunks:
+        pull.feed(chunk)
+        yield from gen.send(pull.read_events())
+    pull.close()
+    yield from gen.send(pull.read_events())
+
+
+# ---- etree: find/findall sobre cada <host> completo ----
+def _etree_events(on_progress):
+    root, out = None, []
+    while True:
+        events = yield out
+        out = []
+        for event, elem in events:
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag == "taskprogress":
+                if on_progress is not None:
+                    on_progress(_taskprogress_to_dict(elem))
+                continue
+            if elem.tag != "host":
+                continue
+            item = _host_to_dict(elem)
+            # Suelta el host y todo lo que cuelga de la raíz hasta ahora
+            elem.clear()
+            root.clear()
+            if item is not None:
+                out.append(item)
+
+
+# ---- fast: máquina de estados sobre los callbacks de expat (sin construir árbol) ----
+class _FastHosts:
+    """
+    Recorre el XML con pyexpat guardando solo lo que se usa de cada <host>:
+    no se crean Element ni se acumula nada entre hosts.
+    """
+
+    def __init__(self, on_progress=None):
+        self.on_progress = on_progress
+        self.out = []
+        self.stack = []
+        self.h = None
+        self.port = None
+        self.px = expat.ParserCreate()
+        self.px.buffer_text = True
+        self.px.StartElementHandler = self._start
+        self.px.EndElementHandler = self._end
+
+    def feed(self, chunk):
+        self.px.Parse(bytes(chunk), False)
+        return self._drain()
+
+    def close(self):
+        self.px.Parse(b"", True)
+        return self._drain()
+
+    def _drain(self):
+        out, self.out = self.out, []
+        return out
+
+    def _start(self, tag, a):
+        stack = self.stack
+        parent = stack[-1] if stack else None
+        stack.append(tag)
+        h = self.h
+        if tag == "host":
+            self.h = {"status": None, "ipv4": None, "addr": None, "has_addr": False,
+                      "hostname": None, "os": None, "ports": []}
+        elif h is None:
+            if tag == "taskprogress" and self.on_progress is not None:
+                self.on_progress(_taskprogress_to_dict(a))
+        elif parent == "host":
+            if tag == "status":
+                if h["status"] is None:
+                    h["status"] = (a.get("state"),)
+            elif tag == "address":
+                if not h["has_addr"]:
+                    h["has_addr"] = True
+                    h["addr"] = a.get("addr")
+                if h["ipv4"] is None and a.get("addrtype") == "ipv4":
+                    h["ipv4"] = a.get("addr", "")
+        elif parent == "hostnames":
+            if tag == "hostname" and h["hostname"] is None and stack[-3] == "host":
+                h["hostname"] = a.get("name", "") or ""
+        elif parent == "os":
+            if tag == "osmatch" and h["os"] is None and stack[-3] == "host":
+                h["os"] = (a.get("name"),)
+        elif parent == "ports":
+            if tag == "port" and stack[-3] == "host":
+                self.port = [a.get("portid", ""), a.get("protocol", "tcp"), None, None]
+                h["ports"].append(self.port)
+        elif parent == "port" and self.port is not None:
+            port = self.port
+            if tag == "state" and port[2] is None:
+                port[2] = (a.get("state"),)
+            elif tag == "service" and port[3] is None:
+                port[3] = (a.get("name"), a.get("product"), a.get("version"))
+
+    def _end(self, tag):
+        self.stack.pop()
+        if tag == "host" and self.h is not None:
+            item = _fast_host(self.h)
+            self.h = None
+            if item is not None:
+                self.out.append(item)
+        elif tag == "port":
+            self.port = None
+
+
+def _fast_host(h):
+    if h["status"] is not None and h["status"][0] not in (None, "up"):
+        return None
+    ip = h["ipv4"] or (h["addr"] if h["has_addr"] else "Unknown")
+    ports_out = []
+    for portid, proto, state, svc in h["ports"]:
+        if state is None or state[0] != "open":
             continue
+        service, product, version = svc if svc is not None else ("", "", "")
+        ports_out.append({"port": portid, "proto": proto, "state": "open",
+                          "service": service, "product": product, "version": version})
+    return {"ip": ip, "hostname": h["hostname"] or "",
+            "os": h["os"][0] if h["os"] is not None else None, "ports": ports_out}
+
 
-        # IP (puede haber varias address; priorizamos ipv4)
-        ip = ""
-        for addr in host.findall("address"):
-            if addr.get("addrtype") == "ipv4":
-                ip = addr.get("addr", "")
-                break
-        if not ip:
-            # si no hay ipv4, cogemos la primera address que haya
-            addr = host.find("address")
-            ip = addr.get("addr") if addr is not None else "Unknown"
-
-        # hostname (si existe)
-        hostname = ""
-        hn = host.find("hostnames/hostname")
-        if hn is not None:
-            hostname = hn.get("name", "") or ""
-
-        # OS (si existe fingerprint)
-        os_name = None
-        osmatch = host.find("os/osmatch")
-        if osmatch is not None:
-            os_name = osmatch.get("name")
-
-        # Puertos (solo abiertos)
-        ports_out = []
-        for p in host.findall("ports/port"):
-            portid = p.get("portid", "")
-            proto = p.get("protocol", "tcp")
-            st = p.find("state")
-            state = st.get("state") if st is not None else ""
-            if state != "open":
+# ---- lxml: XPath compiladas sobre cada <host> ----
+if LET is not None:
+    _X_STATUS = LET.XPath("status[1]/@state")
+    _X_HAS_STATUS = LET.XPath("boolean(status)")
+    _X_IPV4 = LET.XPath("address[@addrtype='ipv4'][1]")
+    _X_ADDR = LET.XPath("address[1]")
+    _X_HOSTNAME = LET.XPath("hostnames/hostname[1]")
+    _X_OS = LET.XPath("os/osmatch[1]")
+    _X_PORTS = LET.XPath("ports/port[state[1]/@state='open']")
+    _X_SERVICE = LET.XPath("service[1]")
+
+
+def _lxml_events(on_progress):
+    out = []
+    while True:
+        events = yield out
+        out = []
+        for _, elem in events:
+            if elem.tag == "taskprogress":
+                if on_progress is not None:
+                    on_progress(_taskprogress_to_dict(elem))
                 continue
+            item = _lxml_host(elem)
+            # Libera el host y los hermanos ya procesados
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+            if item is not None:
+                out.append(item)
+
+
+def _lxml_host(host):
+    if _X_HAS_STATUS(host):
+        state = _X_STATUS(host)
+        if (state[0] if state else None) not in (None, "up"):
+            return None
+    ipv4 = _X_IPV4(host)
+    ip = ipv4[0].get("addr", "") if ipv4 else ""
+    if not ip:
+        addr = _X_ADDR(host)
+        ip = addr[0].get("addr") if addr else "Unknown"
+    hn = _X_HOSTNAME(host)
+    osmatch = _X_OS(host)
+    ports_out = []
+    for p in _X_PORTS(host):
+        svc = _X_SERVICE(p)
+        svc = svc[0] if svc else None
+        ports_out.append({
+            "port": p.get("portid", ""),
+            "proto": p.get("protocol", "tcp"),
+            "state": "open",
+            "service": svc.get("name") if svc is not None else "",
+            "product": svc.get("product") if svc is not None else "",
+            "version": svc.get("version") if svc is not None else "",
+        })
+    return {"ip": ip, "hostname": (hn[0].get("name", "") or "") if hn else "",
+            "os": osmatch[0].get("name") if osmatch else None, "ports": ports_out}
+
+
+def _taskprogress_to_dict(elem):
+    def _num(name, cast):
+        try:
+            return cast(elem.get(name))
+        except (TypeError, ValueError):
+            return None
+    return {
+        "task": elem.get("task", ""),
+        "percent": _num("percent", float),
+        "remaining": _num("remaining", int),
+        "etc": _num("etc", int),
+    }
+
+
+def _host_to_dict(host):
+    """Convierte un elemento <host> en el dict normalizado (None si no está 'up')."""
+    # incluir solo hosts "up" si viene estado
+    status = host.find("status")
+    if status is not None and status.get("state") not in (None, "up"):
+        return None
+
+    # IP (puede haber varias address; priorizamos ipv4)
+    ip = ""
+    for addr in host.findall("address"):
+        if addr.get("addrtype") == "ipv4":
+            ip = addr.get("addr", "")
+            break
+    if not ip:
+        # si no hay ipv4, cogemos la primera address que haya
+        addr = host.find("address")
+        ip = addr.get("addr") if addr is not None else "Unknown"
+
+    # hostname (si existe)
+    hostname = ""
+    hn = host.find("hostnames/hostname")
+    if hn is not None:
+        hostname = hn.get("name", "") or ""
+
+    # OS (si existe fingerprint)
+    os_name = None
+    osmatch = host.find("os/osmatch")
+    if osmatch is not None:
+        os_name = osmatch.get("name")
+
+    # Puertos (solo abiertos)
+    ports_out = []
+    for p in host.findall("ports/port"):
+        portid = p.get("portid", "")
+        proto = p.get("protocol", "tcp")
+        st = p.find("state")
+        state = st.get("state") if st is not None else ""
+        if state != "open":
+            continue
+
+        service_node = p.find("service")
+        service = service_node.get("name") if service_node is not None else ""
+        product = service_node.get("product") if service_node is not None else ""
+        version = service_node.get("version") if service_node is not None else ""
 
-            service_node = p.find("service")
-            service = service_node.get("name") if service_node is not None else ""
-            product = service_node.get("product") if service_node is not None else ""
-            version = service_node.get("version") if service_node is not None else ""
-
-            ports_out.append({
-                "port": portid,
-                "proto": proto,
-                "state": state,
-                "service": service,
-                "product": product,
-                "version": version
-            })
-
-        hosts_out.append({
-            "ip": ip,
-            "hostname": hostname,
-            "os": os_name,
-            "ports": ports_out
+        ports_out.append({
+            "port": portid,
+            "proto": proto,
+            "state": state,
+            "service": service,
+            "product": product,
+            "version": version
         })
 
-    return hosts_out
+    return {
+        "ip": ip,
+        "hostname": hostname,
+        "os": os_name,
+        "ports": ports_out
+    }
@@ -1,14 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, Response, jsonify
-import json
-from app.job_manager import EVENT_BUS   # para SSE
+from app.job_manager import EVENT_BUS, QueueFull, SubscriptionClosed, TOPIC_ALL, TOPIC_STATUS, job_topic   # para SSE
 import queue
 from flask import send_from_directory
 from pathlib import Path
-import os, requests
+from werkzeug.utils import secure_filename
+import os, requests, shutil, uuid
+from app.modules.dns.cache import get_dns_cache
+from app.modules.shodan import cache as shodan_cache
 
 
 REPORT_DIR = Path("reports/output")
-SEARCH_BACKEND = os.getenv("SHODAN_SEARCH_URL", "http://localhost:3000/search")
 
 
 main = Blueprint("main", __name__)
@@ -37,7 +38,13 @@ def api_scan():
     # crea + encola el job
     jm  = current_app.jobmanager
     job = jm.create_job(target=target, tools=tools)     # -> objeto Job con id
-    jm.start_job(job)                                   # -> lanza hilos/queue
+    try:
+        jm.start_job(job)                               # -> encola en el planificador
+    except QueueFull as e:
+        if wants_json:
+            return jsonify({"error": str(e), "job_id": job.id}), 503
+        flash(str(e), "error")
+        return redirect(url_for("main.scanning"))
 
     if wants_json:
         # respuesta inmediata para el fetch del front
@@ -58,64 +65,61 @@ def job_detail(job_id):
 
 @main.route("/events")
 def events():
+    # ?job_id=<id> → eventos de ese job; ?topic=status → solo estado/progreso; sin nada → todo
     job_filter = request.args.get("job_id")
+    if job_filter:
+        topic = job_topic(job_filter)
+    else:
+        topic = TOPIC_STATUS if request.args.get("topic") == TOPIC_STATUS else TOPIC_ALL
+
+    # Reanudación: el navegador envía Last-Event-ID (= seq del último evento del job recibido)
+    last_seq = None
+    raw_last = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    if job_filter and raw_last:
+        try:
+            last_seq = int(raw_last)
+        except ValueError:
+            last_seq = None
 
     # Captura referencias antes de crear el Response/generador
     app_obj = current_app._get_current_object()
     jm = app_obj.jobmanager
 
-    def _serialize(ev):
-        """Devuelve (kind, data_json, last_id) listo para enviar por SSE."""
-        kind = getattr(ev, "kind", "message")
-        meta = getattr(ev, "meta", {}) or {}
-        payload = (getattr(ev, "payload", {}) or {}).copy()
-        job_id = meta.get("job_id")
-        # garantiza job_id en payload
-        if job_id and "job_id" not in payload:
-            payload["job_id"] = job_id
-        data = json.dumps(payload, ensure_ascii=False)
-        last_id = job_id or ""  # útil para e.lastEventId en el cliente
-        return kind, data, last_id
-
     def stream():
-        q = EVENT_BUS.subscribe()
+        q = EVENT_BUS.subscribe(topic)
         try:
             # Sugerencia: que el cliente reintente en 3s si se corta
-            yield "retry: 3000\n"
+            yield b"retry: 3000\n"
             # Ping inicial para abrir el flujo en algunos proxies
-            yield ": ping\n\n"
+            yield b": ping\n\n"
 
-            # Replay de últimos eventos del job (si se pide)
+            # Replay del job (si se pide): exactamente lo posterior a Last-Event-ID,
+            # o los últimos 50 eventos en una conexión nueva
+            sent = 0
             if job_filter:
                 job = jm.get(job_filter)
                 if job:
-                    for ev in job.events[-50:]:
-                        kind, data, last_id = _serialize(ev)
-                        yield (f"id: {last_id}\n" if last_id else "")
-                        yield f"event: {kind}\n"
-                        yield f"data: {data}\n\n"
+                    replay = job.events.since(last_seq) if last_seq is not None else job.events.tail(50)
+                    for ev in replay:
+                        yield ev.encode()
+                    sent = replay[-1].seq if replay else (last_seq or 0)
 
-            # Bucle principal
+            # Bucle principal: la trama ya viene serializada desde _emit
             while True:
                 try:
                     ev = q.get(timeout=15)
                 except queue.Empty:
                     # Mantén viva la conexión
-                    yield ": keep-alive\n\n"
+                    yield b": keep-alive\n\n"
                     continue
+                except SubscriptionClosed:
+                    # Cliente demasiado lento (política 'disconnect'): cerramos y que reconecte
+                    break
 
-                # Filtrado por job si procede
-                if job_filter:
-                    if not getattr(ev, "meta", None):
-                        continue
-                    if ev.meta.get("job_id") != job_filter:
-                        continue
-
-                kind, data, last_id = _serialize(ev)
-                if last_id:
-                    yield f"id: {last_id}\n"
-                yield f"event: {kind}\n"
-                yield f"data: {data}\n\n"
+                # Ya suscritos antes del replay: descarta lo que el replay ya cubrió
+                if job_filter and ev.seq is not None and ev.seq <= sent:
+                    continue
+                yield ev.frame or ev.encode()
 
         except GeneratorExit:
             # cliente cerró la conexión
@@ -140,6 +144,75 @@ def events():
 #         return redirect(url_for("main.index"))
 #     return send_from_directory(str(base), f.name)
 
+# Ficheros aceptados por /api/ingest (también dentro de directorios)
+INGEST_SUFFIXES = (".xml", ".xml.gz")
+
+
+def _ingest_paths(raw_paths, base):
+    """Valida rutas del servidor: deben estar dentro de INGEST_DIR. Los directorios se recorren."""
+    if not base:
+        raise ValueError("Importación por ruta desactivada (INGEST_DIR vacío)")
+    root = os.path.realpath(base)
+    out = []
+    for raw in raw_paths:
+        path = os.path.realpath(os.path.join(root, raw))
+        if os.path.commonpath([root, path]) != root or not os.path.exists(path):
+            raise ValueError(f"Ruta no permitida: {raw}")
+        if os.path.isdir(path):
+            for dirpath, _, names in sorted(os.walk(path)):
+                out.extend(os.path.join(dirpath, n) for n in sorted(names) if n.endswith(INGEST_SUFFIXES))
+        else:
+            out.append(path)
+    return out
+
+
+@main.route("/api/ingest", methods=["POST"])
+def api_ingest():
+    """
+    Importa XML de nmap existentes (-oX, también .gz) como un job normal
+    (herramienta nmap_import: resultados, findings e informe).
+    - multipart: campo "files" con uno o varios ficheros
+    - "paths" (form repetido o JSON {"paths": [...]}) relativas a INGEST_DIR
+    """
+    jm = current_app.jobmanager
+    data = request.get_json(silent=True)
+    if data is not None and not isinstance(data, dict):
+        return jsonify({"error": 'Se esperaba un objeto JSON {"paths": [...]}'}), 400
+    raw_paths = (data or {}).get("paths") or request.form.getlist("paths")
+    if isinstance(raw_paths, str):
+        raw_paths = [raw_paths]
+    if not isinstance(raw_paths, list) or not all(isinstance(p, str) for p in raw_paths):
+        return jsonify({"error": '"paths" debe ser una lista de rutas'}), 400
+    try:
+        files = _ingest_paths(raw_paths, current_app.config.get("INGEST_DIR")) if raw_paths else []
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    uploads = [f for f in request.files.getlist("files") if f and f.filename]
+    meta = {}
+    if uploads:
+        dest = Path(jm.report_dir) / "imports" / uuid.uuid4().hex
+        dest.mkdir(parents=True, exist_ok=True)
+        for i, up in enumerate(uploads):
+            name = f"{i:04d}_{secure_filename(up.filename) or 'scan.xml'}"
+            up.save(dest / name)
+            files.append(str(dest / name))
+        # El plugin borra el directorio al terminar; la retención de jobs también (job_files)
+        meta["import_dir"] = str(dest)
+    if not files:
+        return jsonify({"error": "No se han indicado ficheros XML"}), 400
+
+    job = jm.create_job(target=f"importación: {len(files)} fichero(s)", tools=["nmap_import"],
+                        meta={**meta, "import_files": files})
+    try:
+        jm.start_job(job)
+    except QueueFull as e:
+        if meta:
+            shutil.rmtree(meta["import_dir"], ignore_errors=True)
+        return jsonify({"error": str(e), "job_id": job.id}), 503
+    return jsonify({"job_id": job.id, "files": len(files)}), 200
+
+
 @main.route("/api/jobs/<job_id>")
 def api_job(job_id):
     jm = current_app.jobmanager
@@ -148,6 +221,48 @@ def api_job(job_id):
         return {"error": "not found"}, 404
     return job.to_dict()
 
+@main.route("/api/dns/cache")
+def api_dns_cache():
+    """Estadísticas de la caché DNS del proceso (aciertos, fallos, entradas)."""
+    return get_dns_cache().stats()
+
+@main.post("/api/shodan/batch")
+def shodan_batch():
+    """
+    Lanza un job con varias consultas de Shodan (modo lote del plugin):
+    JSON {"queries": [...] | "una\npor\nlínea", "max_pages": N, "concurrency": N, "refresh": bool}.
+    Los resultados se escriben en reports/output/shodan_<job>.jsonl según llegan.
+    """
+    jm = current_app.jobmanager
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": 'Se esperaba un objeto JSON {"queries": [...]}'}), 400
+    queries = data.get("queries") or []
+    if isinstance(queries, str):
+        queries = queries.splitlines()
+    queries = [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+    if not queries:
+        return jsonify({"error": "No se han indicado consultas"}), 400
+    meta = {"shodan_queries": queries, "shodan_refresh": bool(data.get("refresh"))}
+    try:
+        if data.get("max_pages"):
+            meta["shodan_max_pages"] = int(data["max_pages"])
+        if data.get("concurrency"):
+            meta["shodan_concurrency"] = int(data["concurrency"])
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_pages y concurrency deben ser enteros"}), 400
+    job = jm.create_job(target=f"shodan: {len(queries)} consulta(s)", tools=["shodan"], meta=meta)
+    try:
+        jm.start_job(job)
+    except QueueFull as e:
+        return jsonify({"error": str(e), "job_id": job.id}), 503
+    return jsonify({"job_id": job.id, "queries": len(queries)}), 200
+
+@main.route("/api/shodan/cache")
+def api_shodan_cache():
+    """Estadísticas de la caché de consultas de Shodan (aciertos, llamadas al backend)."""
+    return shodan_cache.get_query_cache().stats()
+
 def build_nmap_options(form) -> list[str]:
     """Lee el formulario y construye la lista de flags para Nmap."""
     opts: list[str] = []
@@ -225,9 +340,10 @@ def shodan_page():
 def shodan_search():
     data = request.get_json(force=True) or {}
     try:
-        r = requests.post(SEARCH_BACKEND, json={"query": data.get("query","")}, timeout=30)
-        r.raise_for_status()
-        return jsonify(r.json())
+        result, source = shodan_cache.search(data.get("query",""), refresh=bool(data.get("refresh")))
+        resp = jsonify(result)
+        resp.headers["X-Cache"] = source.upper()   # HIT | COALESCED | MISS
+        return resp
     except requests.RequestException as e:
         return jsonify({"error": str(e)}), 502
 
@@ -270,6 +386,10 @@ def harvester_scan():
     jm = current_app.jobmanager
     # Crear job con meta que incluya job_id y report_dir (JobManager lo añadirá)
     job = jm.create_job(target=domain, tools=["theharvester"], meta={"harvester_opts": opts})
-    jm.start_job(job)
+    try:
+        jm.start_job(job)
+    except QueueFull as e:
+        flash(str(e), "error")
+        return redirect(url_for("main.harvester"))
     # flash("Búsqueda encolada", "success")
     return redirect(url_for("main.harvester", job_id=job.id))
@@ -4,7 +4,7 @@
 
   // === Rutas inyectadas por la plantilla (theHarvester.html) ===
   const R = window.APP_ROUTES || {};
-  const EVENTS_URL       = R.EVENTS_URL;                      // url_for('main.events')
+  const EVENTS_URL       = R.EVENTS_URL;                      // url_for('main.events', topic='status')
   const API_REPORTS_URL  = R.API_REPORTS_URL;                 // url_for('main.api_reports')
   const API_HARVESTER_URL= R.API_HARVESTER_URL;               // url_for('main.harvester_scan')
   const JOB_DETAIL_TMPL  = R.JOB_DETAIL_URL_TMPL;             // url_for('main.job_detail', job_id='__ID__')
@@ -131,8 +131,8 @@
   function getJobId(d, e) {
     if (d && d.job_id) return d.job_id;
     if (d && d.meta && d.meta.job_id) return d.meta.job_id;
-    const id = (e && e.lastEventId) ? String(e.lastEventId).trim() : "";
-    return id || null;
+    // Ojo: e.lastEventId es el nº de secuencia del evento, no el job_id
+    return null;
   }
 
   // Intenta determinar si un evento corresponde a theHarvester
@@ -198,7 +198,7 @@
         if (!isHarvesterEvent(d)) return;
         const jobId = getJobId(d, e);
         if (jobId) {
-          setStatus(jobId, "done");
+          setStatus(jobId, d.status || "done");
           setProgress(jobId, 100);
         }
       } catch (_) {}
@@ -4,7 +4,7 @@
 
   // === Rutas inyectadas por la plantilla (scanning.html) ===
   const R = window.APP_ROUTES || {};
-  const EVENTS_URL       = R.EVENTS_URL;                 // url_for('main.events')
+  const EVENTS_URL       = R.EVENTS_URL;                 // url_for('main.events', topic='status')
   const API_REPORTS_URL  = R.API_REPORTS_URL;            // url_for('main.api_reports')
   const API_SCAN_URL     = R.API_SCAN_URL;               // url_for('main.api_scan')
   const JOB_DETAIL_TMPL  = R.JOB_DETAIL_URL_TMPL;        // url_for('main.job_detail', job_id='__ID__')
@@ -17,11 +17,19 @@
   function reportUrl(name) {
     return (REPORT_URL_TMPL || "").replace("__NAME__", encodeURIComponent(String(name)));
   }
-  function setProgress(jobId, pct) {
+  function setProgress(jobId, pct, remaining) {
     const bar = document.getElementById("bar-" + jobId);
     const txt = document.getElementById("pct-" + jobId);
     if (bar) bar.style.width = (pct | 0) + "%";
-    if (txt) txt.textContent = (pct | 0) + "%";
+    if (txt) {
+      // remaining (segundos) llega con el progreso parcial de nmap (--stats-every)
+      let label = (pct | 0) + "%";
+      if (remaining > 0 && pct < 100) {
+        const m = Math.floor(remaining / 60), s = remaining % 60;
+        label += ` · ETA ${m ? m + "m " : ""}${s}s`;
+      }
+      txt.textContent = label;
+    }
   }
   function setStatus(jobId, status) {
     const el = document.getElementById("status-" + jobId);
@@ -128,8 +136,8 @@
   function getJobId(d, e) {
     if (d && d.job_id) return d.job_id;
     if (d && d.meta && d.meta.job_id) return d.meta.job_id;
-    const id = (e && e.lastEventId) ? String(e.lastEventId).trim() : "";
-    return id || null;
+    // Ojo: e.lastEventId es el nº de secuencia del evento, no el job_id
+    return null;
   }
 
   // ===== SSE global =====
@@ -160,11 +168,11 @@
 
     src.addEventListener("progress", (e) => {
       try {
-        const d = JSON.parse(e.data); // {progress, job_id}
+        const d = JSON.parse(e.data); // {progress, job_id, tool?, tool_progress?, remaining?, eta?}
         const jobId = getJobId(d, e);
         if (!jobId) return;
         ensureRow({ id: jobId, status: "running", progress: d.progress, tools: [] });
-        setProgress(jobId, d.progress);
+        setProgress(jobId, d.progress, d.remaining);
       } catch (_) {}
     });
 
@@ -175,7 +183,7 @@
         const d = JSON.parse(e.data);
         const jobId = getJobId(d, e);
         if (jobId) {
-          setStatus(jobId, "done");
+          setStatus(jobId, d.status || "done");
           setProgress(jobId, 100);
         }
       } catch (_) {}
@@ -0,0 +1,122 @@
+"""
+Benchmark de memoria del resultado de nmap: modelo anterior vs. Asset/PortInfo con slots.
+
+Modelo anterior: dataclasses con __dict__ que el plugin copiaba campo a campo a
+dicts (los dataclasses se descartaban después, pero ambos coexistían durante la
+conversión). Modelo actual: Asset/PortInfo con __slots__ que se devuelven tal
+cual; los consumidores los leen como dicts (get/[]/keys) sin copiarlos.
+
+Se mide con tracemalloc el pico y la memoria retenida al construir N hosts
+sintéticos con P puertos cada uno.
+
+Uso:
+    python benchmarks/bench_asset_memory.py [--hosts 50000] [--ports 4]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.model import Asset, PortInfo  # noqa: E402
+
+
+@dataclass
+class LegacyPortInfo:
+    port: str
+    state: str
+    service: str = ""
+    proto: str = "tcp"
+    product: str = ""
+    version: str = ""
+
+
+@dataclass
+class LegacyAsset:
+    ip: str
+    hostname: str = ""
+    os: Optional[str] = None
+    ports: List[LegacyPortInfo] = field(default_factory=list)
+
+
+def _legacy_to_dict(a):
+    # Conversión que hacía plugins/nmap.run por cada host
+    return {
+        "ip": a.get("ip") if isinstance(a, dict) else getattr(a, "ip", None),
+        "hostname": a.get("hostname") if isinstance(a, dict) else getattr(a, "hostname", None),
+        "os": a.get("os") if isinstance(a, dict) else getattr(a, "os", None),
+        "ports": [
+            {
+                "port": p.get("port") if isinstance(p, dict) else getattr(p, "port", None),
+                "state": p.get("state") if isinstance(p, dict) else getattr(p, "state", None),
+                "proto": p.get("proto") if isinstance(p, dict) else getattr(p, "proto", "tcp"),
+                "service": p.get("service") if isinstance(p, dict) else getattr(p, "service", None),
+                "product": p.get("product") if isinstance(p, dict) else getattr(p, "product", None),
+                "version": p.get("version") if isinstance(p, dict) else getattr(p, "version", None),
+            } for p in (a.get("ports", []) if isinstance(a, dict) else getattr(a, "ports", []))
+        ],
+    }
+
+
+# Valores internados como los que produce el parser (mismas cadenas repetidas)
+SERVICES = [("22", "ssh", "OpenSSH", "8.9"), ("80", "http", "nginx", "1.24"),
+            ("443", "https", "nginx", "1.24"), ("3306", "mysql", "MySQL", "8.0")]
+
+
+def _hosts(n: int, p: int):
+    for i in range(n):
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        yield ip, f"h{i}.example", [SERVICES[j % len(SERVICES)] for j in range(p)]
+
+
+def build_legacy(n: int, p: int):
+    assets = [LegacyAsset(ip=ip, hostname=hn, ports=[
+        LegacyPortInfo(port=port, state="open", service=svc, product=prod, version=ver)
+        for port, svc, prod, ver in ports]) for ip, hn, ports in _hosts(n, p)]
+    out = [_legacy_to_dict(a) for a in assets]
+    return out
+
+
+def build_slots(n: int, p: int):
+    return [Asset(ip=ip, hostname=hn, ports=[
+        PortInfo(port=port, state="open", service=svc, product=prod, version=ver)
+        for port, svc, prod, ver in ports]) for ip, hn, ports in _hosts(n, p)]
+
+
+def measure(fn, n: int, p: int):
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn(n, p)
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak, elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--hosts", type=int, default=50000)
+    ap.add_argument("--ports", type=int, default=4)
+    args = ap.parse_args()
+
+    print(f"{args.hosts} hosts × {args.ports} puertos")
+    rows = [("dataclass + dicts (anterior)", build_legacy), ("slots sin copia (actual)", build_slots)]
+    base = None
+    for name, fn in rows:
+        current, peak, elapsed = measure(fn, args.hosts, args.ports)
+        base = base or current
+        print(f"  {name:30s} retenido {current / 2**20:8.1f} MiB  pico {peak / 2**20:8.1f} MiB  "
+              f"{elapsed:6.2f}s  ({current / base:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark de EventBus: broadcast + filtro (modelo anterior) vs. routing por topic.
+
+Escenario por defecto: 200 páginas de job abiertas repartidas entre 50 jobs en
+ejecución, 10 listados (topic status) y 2 firehoses. Se mide el coste de
+publish() y cuántas entregas acaban en colas de suscriptores.
+
+Uso:
+    python benchmarks/bench_eventbus.py [--jobs 50] [--pages 200] [--events 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import queue
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.job_manager import (  # noqa: E402
+    Event, EventBus, OVERFLOW_DROP_OLDEST, TOPIC_ALL, TOPIC_STATUS, job_topic,
+)
+
+
+class BroadcastBus:
+    """Modelo anterior: todos los suscriptores reciben todo y filtran después."""
+    def __init__(self) -> None:
+        self.subs: list[queue.Queue] = []
+
+    def subscribe(self, topic: str = TOPIC_ALL) -> queue.Queue:
+        q: queue.Queue = queue.Queue()
+        self.subs.append(q)
+        return q
+
+    def publish(self, event: Event) -> None:
+        for q in list(self.subs):
+            q.put(event, block=False)
+
+
+def _drain(queues) -> int:
+    n = 0
+    for q in queues:
+        while True:
+            try:
+                q.get_nowait()
+                n += 1
+            except queue.Empty:
+                break
+    return n
+
+
+def run(bus, jobs: int, pages: int, events: int) -> tuple[float, int]:
+    job_ids = [f"job{i:04d}" for i in range(jobs)]
+    queues = [bus.subscribe(job_topic(job_ids[i % jobs])) for i in range(pages)]
+    queues += [bus.subscribe(TOPIC_STATUS) for _ in range(10)]
+    queues += [bus.subscribe(TOPIC_ALL) for _ in range(2)]
+
+    evs = []
+    for i in range(events):
+        kind = "progress" if i % 10 == 0 else "log"
+        jid = job_ids[i % jobs]
+        evs.append(Event(kind, {"job_id": jid, "i": i}, meta={"job_id": jid}))
+
+    t0 = time.perf_counter()
+    for ev in evs:
+        bus.publish(ev)
+    elapsed = time.perf_counter() - t0
+    return elapsed, _drain(queues)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jobs", type=int, default=50)
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--events", type=int, default=20000)
+    args = ap.parse_args()
+
+    # Colas sin límite efectivo en ambos casos para comparar solo el routing
+    topics_bus = EventBus(maxsize=args.events, policy=OVERFLOW_DROP_OLDEST)
+    for name, bus in (("broadcast", BroadcastBus()), ("topics", topics_bus)):
+        elapsed, delivered = run(bus, args.jobs, args.pages, args.events)
+        print(f"{name:>10}: {elapsed * 1e6 / args.events:8.1f} µs/publish  "
+              f"{delivered / args.events:7.1f} entregas/evento  total {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark de los backends del parser de nmap (app/routes/nmap/parser.py).
+
+Genera XML sintético de nmap (-oX) con N hosts —mezcla de hosts caídos, IPv4 +
+MAC, hostnames, fingerprint de SO, puertos abiertos/cerrados/filtrados, servicios
+con y sin producto, extraports, hostscript y taskprogress— y para cada backend
+disponible (lxml, fast, etree):
+- comprueba que la salida es idéntica a la del backend de referencia (etree),
+- mide hosts/s y MB/s parseando desde fichero (iter_nmap_hosts) y en memoria
+  (parse_nmap_xml).
+
+Uso:
+    python benchmarks/bench_nmap_parser.py [--sizes 1000,10000,100000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.routes.nmap import parser  # noqa: E402
+
+SERVICES = [
+    ("22", "ssh", 'product="OpenSSH" version="8.9p1" extrainfo="Ubuntu"'),
+    ("80", "http", 'product="nginx" version="1.24.0"'),
+    ("443", "https", 'product="Apache httpd"'),
+    ("3306", "mysql", ""),
+    ("3389", "ms-wbt-server", 'product="Microsoft Terminal Services"'),
+    ("5432", "postgresql", 'product="PostgreSQL DB" version="9.6.0 or later"'),
+]
+
+
+def synth_xml(n: int, seed: int = 1) -> bytes:
+    rnd = random.Random(seed)
+    out = io.StringIO()
+    w = out.write
+    w('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE nmaprun>\n')
+    w('<nmaprun scanner="nmap" args="nmap -sV -O -oX - 10.0.0.0/8" start="1700000000" version="7.94">\n')
+    w('<scaninfo type="syn" protocol="tcp" numservices="1000" services="1-1000"/>\n<verbose level="0"/>\n')
+    for i in range(n):
+        ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        if i % 500 == 0:
+            w(f'<taskprogress task="Service scan" time="{1700000000 + i}" percent="{i * 100.0 / n:.2f}" '
+              f'remaining="{n - i}" etc="{1700000000 + n}"/>\n')
+        up = rnd.random() < 0.7
+        w(f'<host starttime="1700000000" endtime="1700000001"><status state="{"up" if up else "down"}" '
+          f'reason="{"syn-ack" if up else "no-response"}" reason_ttl="0"/>\n')
+        w(f'<address addr="{ip}" addrtype="ipv4"/>')
+        if i % 3 == 0:
+            w(f'<address addr="00:11:22:{i % 256:02X}:{(i >> 8) % 256:02X}:AA" addrtype="mac" vendor="Acme"/>')
+        w("\n<hostnames>")
+        if i % 2 == 0:
+            w(f'<hostname name="host{i}.corp.example" type="PTR"/>')
+        w("</hostnames>\n")
+        if up:
+            w('<ports><extraports state="closed" count="990"><extrareasons reason="reset" count="990"/></extraports>\n')
+            for port, name, attrs in rnd.sample(SERVICES, rnd.randint(0, len(SERVICES))):
+                state = rnd.choice(("open", "open", "open", "closed", "filtered"))
+                w(f'<port protocol="tcp" portid="{port}"><state state="{state}" reason="syn-ack" reason_ttl="64"/>')
+                if rnd.random() < 0.9:
+                    w(f'<service name="{name}" {attrs} method="probed" conf="10"><cpe>cpe:/a:x:{name}</cpe></service>')
+                w("</port>\n")
+            w("</ports>\n")
+            if i % 4 == 0:
+                w('<os><portused state="open" proto="tcp" portid="22"/>'
+                  '<osmatch name="Linux 5.0 - 5.14" accuracy="98" line="1"><osclass type="general purpose" '
+                  'vendor="Linux" osfamily="Linux" osgen="5.X" accuracy="98"/></osmatch>'
+                  '<osmatch name="Linux 4.15" accuracy="90" line="2"/></os>\n')
+            if i % 10 == 0:
+                w('<hostscript><script id="smb-os-discovery" output="x"><elem key="os">Windows</elem></script></hostscript>\n')
+        w('<times srtt="100" rttvar="50" to="100000"/></host>\n')
+    w('<runstats><finished time="1700000100" exit="success"/>'
+      f'<hosts up="{n}" down="0" total="{n}"/></runstats>\n</nmaprun>\n')
+    return out.getvalue().encode("utf-8")
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    backends = parser.available_backends()
+    print(f"backends disponibles: {', '.join(backends)} (auto → {parser.resolve_backend('auto')})")
+    for n in (int(x) for x in args.sizes.split(",")):
+        data = synth_xml(n)
+        mb = len(data) / 2**20
+        with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as f:
+            f.write(data)
+            path = f.name
+        try:
+            reference = parser.parse_nmap_xml(data, backend="etree")
+            print(f"\n{n} hosts ({mb:.1f} MiB, {len(reference)} up)")
+            for b in backends:
+                same = parser.parse_nmap_xml(data, backend=b) == reference
+
+                def from_file(b=b):
+                    with open(path, "rb") as fh:
+                        for _ in parser.iter_nmap_hosts(fh, backend=b):
+                            pass
+
+                t_file = _best(from_file, args.repeat)
+                t_mem = _best(lambda b=b: parser.parse_nmap_xml(data, backend=b), args.repeat)
+                print(f"  {b:6s} igual={'sí' if same else 'NO'}  fichero {n / t_file:10.0f} hosts/s "
+                      f"{mb / t_file:6.1f} MiB/s   memoria {n / t_mem:10.0f} hosts/s")
+        finally:
+            os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Test de carga del servidor SSE asíncrono (app/async_events.py).
+
+Abre N conexiones SSE concurrentes desde un único event loop, espera a que el
+servidor las confirme (GET /stats) y cuenta los eventos recibidos durante la
+prueba. Si se indica --publish, además genera eventos en un JobManager local
+(solo útil con --embedded, que levanta el servidor en este mismo proceso).
+
+Uso:
+    # contra un servidor ya arrancado con ASYNC_EVENTS_PORT=5001
+    python benchmarks/sse_loadtest.py --host 127.0.0.1 --port 5001 --connections 5000
+
+    # autónomo: servidor + carga en el mismo proceso
+    python benchmarks/sse_loadtest.py --embedded --connections 5000 --publish 200
+
+Nota: cada conexión es un descriptor de fichero en ambos extremos; el script
+sube el límite blando (RLIMIT_NOFILE) al duro si puede.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _raise_nofile() -> int:
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except Exception:
+        return -1
+
+
+async def _client(host: str, port: int, path: str, counters: dict, stop: asyncio.Event) -> None:
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        counters["failed"] += 1
+        return
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            counters["failed"] += 1
+            return
+        counters["connected"] += 1
+        while not stop.is_set():
+            try:
+                line = await asyncio.wait_for(reader.readline(), timeout=1)
+            except asyncio.TimeoutError:
+                continue
+            if not line:
+                counters["dropped"] += 1
+                return
+            if line.startswith(b"event:"):
+                counters["events"] += 1
+    except (OSError, asyncio.IncompleteReadError):
+        counters["dropped"] += 1
+    finally:
+        writer.close()
+
+
+async def _stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET /stats HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return json.loads(raw.split(b"\r\n\r\n", 1)[1] or b"{}")
+
+
+async def main_async(args) -> None:
+    counters = {"connected": 0, "failed": 0, "dropped": 0, "events": 0}
+    stop = asyncio.Event()
+    path = f"/events?topic={args.topic}" if args.topic else "/events"
+
+    t0 = time.perf_counter()
+    tasks = []
+    for i in range(args.connections):
+        tasks.append(asyncio.create_task(_client(args.host, args.port, path, counters, stop)))
+        if i % 500 == 499:
+            await asyncio.sleep(0)   # deja respirar al accept() del servidor
+    while counters["connected"] + counters["failed"] < args.connections and time.perf_counter() - t0 < 60:
+        await asyncio.sleep(0.1)
+    ramp = time.perf_counter() - t0
+    stats = await _stats(args.host, args.port)
+    print(f"conectadas {counters['connected']}/{args.connections} en {ramp:.2f}s "
+          f"(fallidas {counters['failed']}); servidor informa {stats.get('connections')} conexiones")
+
+    if args.publisher:
+        await asyncio.get_running_loop().run_in_executor(None, args.publisher, args.publish)
+    await asyncio.sleep(args.duration)
+
+    stats = await _stats(args.host, args.port)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"tras {args.duration:.0f}s: servidor {stats.get('connections')} conexiones, "
+          f"{counters['events']} eventos recibidos, {counters['dropped']} cortes")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=5001)
+    ap.add_argument("--connections", type=int, default=2000)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--topic", default="status", help="status | '' (firehose)")
+    ap.add_argument("--embedded", action="store_true", help="levanta el servidor en este proceso")
+    ap.add_argument("--publish", type=int, default=0, help="eventos a publicar (solo --embedded)")
+    args = ap.parse_args()
+    args.publisher = None
+
+    print(f"RLIMIT_NOFILE = {_raise_nofile()}")
+    if args.embedded:
+        from app.async_events import start_async_events
+        from app.job_manager import JobManager
+
+        jm = JobManager(report_dir="/tmp/netarch-loadtest")
+        server = start_async_events(jm, args.host, args.port)
+        if server.error:
+            sys.exit(f"No se pudo arrancar el servidor: {server.error}")
+
+        def publisher(n: int) -> None:
+            job = jm.create_job(target="loadtest", tools=[])
+            for i in range(n):
+                jm._emit(job, "progress", {"progress": int(i * 100 / max(1, n))})
+                time.sleep(0.01)
+
+        args.publisher = publisher if args.publish else None
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
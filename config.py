@@ -7,3 +7,75 @@ class Config:
     FILEPATH_THE_HARVESTER = os.getenv("FILEPATH_THE_HARVESTER", "")
     OUTPUT_PATH_THE_HARVESTER = os.getenv("OUTPUT_PATH_THE_HARVESTER", "")
     SECRET_KEY = os.getenv("SECRET_KEY")
+    # Planificador de jobs
+    JOBS_MAX_RUNNING = int(os.getenv("JOBS_MAX_RUNNING", "2"))     # jobs ejecutándose a la vez
+    JOBS_MAX_QUEUE = int(os.getenv("JOBS_MAX_QUEUE", "100"))       # jobs pendientes en cola
+    JOBS_MAX_TOOLS = int(os.getenv("JOBS_MAX_TOOLS", "4"))         # herramientas a la vez (global)
+    JOBS_TOOL_LIMITS = os.getenv("JOBS_TOOL_LIMITS", "nmap=2,theharvester=1")  # límites por tool
+    # Almacén de jobs
+    JOBS_STORE = os.getenv("JOBS_STORE", "sqlite")                  # "sqlite" | "memory"
+    JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "")                    # por defecto reports/jobs.sqlite3
+    JOBS_HOT_SIZE = int(os.getenv("JOBS_HOT_SIZE", "64"))           # jobs completos en RAM
+    JOBS_RETENTION_DAYS = float(os.getenv("JOBS_RETENTION_DAYS", "30"))    # 0 = sin límite
+    JOBS_RETENTION_COUNT = int(os.getenv("JOBS_RETENTION_COUNT", "1000"))  # 0 = sin límite
+    # Eventos por job (buffer circular en RAM + volcado opcional a disco)
+    JOBS_EVENTS_CAPACITY = int(os.getenv("JOBS_EVENTS_CAPACITY", "500"))
+    JOBS_EVENTS_SPILL = os.getenv("JOBS_EVENTS_SPILL", "0").lower() in ("1", "true", "yes")
+    # Colas SSE por suscriptor: tamaño y política de desbordamiento
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+    EVENTS_OVERFLOW = os.getenv("EVENTS_OVERFLOW", "coalesce")    # drop_oldest | coalesce | disconnect
+    # Servidor SSE asíncrono (asyncio) junto a Flask; 0 = desactivado
+    # Sin autenticación: por defecto solo escucha en local
+    ASYNC_EVENTS_HOST = os.getenv("ASYNC_EVENTS_HOST", "127.0.0.1")
+    ASYNC_EVENTS_PORT = int(os.getenv("ASYNC_EVENTS_PORT", "0"))
+    # Orígenes (p.ej. http://localhost:5000) a los que se permite leer el feed por CORS; vacío = ninguno
+    ASYNC_EVENTS_ORIGINS = os.getenv("ASYNC_EVENTS_ORIGINS", "")
+    # Estado compartido entre procesos (varios workers de gunicorn en el mismo host).
+    # Requiere JOBS_STORE=sqlite: jobs y eventos viajan por la misma base de datos.
+    SHARED_STATE = os.getenv("SHARED_STATE", "0").lower() in ("1", "true", "yes")
+    SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "/tmp/netarch-bus")   # sockets de aviso
+
+    # Nmap: rangos grandes en shards escaneados en paralelo
+    NMAP_MAX_PROCS = int(os.getenv("NMAP_MAX_PROCS", "4"))          # procesos nmap por job (1 = sin shards)
+    NMAP_SHARD_PREFIX = int(os.getenv("NMAP_SHARD_PREFIX", "24"))   # tamaño de shard (/24)
+    NMAP_DISCOVERY = os.getenv("NMAP_DISCOVERY", "1").lower() in ("1", "true", "yes")  # -sn antes de -sV
+    NMAP_PARSER = os.getenv("NMAP_PARSER", "auto")   # auto | lxml | fast | etree
+    NMAP_FP_CACHE_TTL = float(os.getenv("NMAP_FP_CACHE_TTL", "0"))    # horas de validez de huellas -sV (0 = sin caché, por defecto)
+    NMAP_FP_CACHE_PATH = os.getenv("NMAP_FP_CACHE_PATH", "")          # por defecto reports/fingerprints.sqlite3
+
+    # Importación de XML de nmap existentes (/api/ingest)
+    INGEST_DIR = os.getenv("INGEST_DIR", "")                        # rutas permitidas en el servidor (vacío = solo subidas)
+    INGEST_MAX_PROCS = int(os.getenv("INGEST_MAX_PROCS", "4"))     # procesos de parseo por job
+    # Tamaño máximo de una petición (subidas incluidas); Flask responde 413 si se supera
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_UPLOAD_MB", "512")) * 1024 * 1024
+
+    # Barrido TCP connect (plugin tcp_sweep)
+    TCP_SWEEP_PORTS = os.getenv("TCP_SWEEP_PORTS", "")                        # vacío = lista por defecto
+    TCP_SWEEP_CONCURRENCY = int(os.getenv("TCP_SWEEP_CONCURRENCY", "512"))   # sockets en vuelo
+    TCP_SWEEP_PER_HOST = int(os.getenv("TCP_SWEEP_PER_HOST", "16"))          # conexiones simultáneas por host
+    TCP_SWEEP_HOST_RATE = float(os.getenv("TCP_SWEEP_HOST_RATE", "0"))       # conexiones/s por host (0 = sin límite)
+    TCP_SWEEP_TIMEOUT = float(os.getenv("TCP_SWEEP_TIMEOUT", "1.0"))
+
+    # DNS inversa (plugin dns_reverse): consultas PTR asíncronas por UDP
+    DNS_RESOLVERS = os.getenv("DNS_RESOLVERS", "")                 # "1.1.1.1,9.9.9.9:53"; vacío = /etc/resolv.conf
+    DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "1.5"))           # segundos por intento
+    DNS_RETRIES = int(os.getenv("DNS_RETRIES", "2"))               # reintentos (rotando resolutor)
+    DNS_CONCURRENCY = int(os.getenv("DNS_CONCURRENCY", "1000"))    # consultas en vuelo por job
+    # Caché DNS del proceso (PTR y resolución de hostnames)
+    DNS_CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "100000"))    # entradas (LRU)
+    DNS_CACHE_MAX_TTL = float(os.getenv("DNS_CACHE_MAX_TTL", "86400"))   # tope del TTL de los registros (s)
+    DNS_CACHE_NEG_TTL = float(os.getenv("DNS_CACHE_NEG_TTL", "300"))     # tope para NXDOMAIN/sin datos (s)
+
+    # Backend de búsqueda de Shodan (plugin shodan y /shodan/search)
+    SHODAN_SEARCH_URL = os.getenv("SHODAN_SEARCH_URL", "http://localhost:3000/search")
+    SHODAN_POOL_SIZE = int(os.getenv("SHODAN_POOL_SIZE", "10"))               # conexiones keep-alive
+    SHODAN_MAX_CONCURRENCY = int(os.getenv("SHODAN_MAX_CONCURRENCY", "8"))    # peticiones a la vez (proceso)
+    SHODAN_RETRIES = int(os.getenv("SHODAN_RETRIES", "3"))                    # reintentos en 429/5xx y errores de red
+    SHODAN_BACKOFF = float(os.getenv("SHODAN_BACKOFF", "0.5"))                # backoff exponencial (s)
+    SHODAN_CONNECT_TIMEOUT = float(os.getenv("SHODAN_CONNECT_TIMEOUT", "3.05"))
+    SHODAN_READ_TIMEOUT = float(os.getenv("SHODAN_READ_TIMEOUT", "30"))
+    SHODAN_CACHE_TTL = float(os.getenv("SHODAN_CACHE_TTL", "600"))           # segundos (0 = sin caché)
+    SHODAN_CACHE_SIZE = int(os.getenv("SHODAN_CACHE_SIZE", "1000"))           # consultas en memoria (LRU)
+    SHODAN_CACHE_PATH = os.getenv("SHODAN_CACHE_PATH", "")                    # SQLite opcional (vacío = solo memoria)
+    SHODAN_BATCH_CONCURRENCY = int(os.getenv("SHODAN_BATCH_CONCURRENCY", "4"))  # consultas a la vez por lote
+    SHODAN_MAX_PAGES = int(os.getenv("SHODAN_MAX_PAGES", "10"))               # páginas por consulta en lote
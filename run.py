@@ -1,6 +1,9 @@
 from app import create_app
 
-app = create_app()
+# Los procesos de multiprocessing (forkserver/spawn, p.ej. la importación de XML)
+# importan este módulo como __mp_main__: ahí no se crea otra app con sus hilos
+if __name__ != "__mp_main__":
+    app = create_app()
 
 if __name__ == "__main__":
     # app.run(debug=True
@@ -0,0 +1,85 @@
+"""
+Utilidades comunes de los tests: raíz del repo en sys.path y un servidor DNS
+de pruebas (UDP en 127.0.0.1) para los resolutores y plugins que lo usan.
+"""
+from __future__ import annotations
+
+import socket
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.modules.dns.resolver import QTYPE_A, QTYPE_AAAA, encode_name  # noqa: E402
+
+
+def dns_reply(qid: int, qname: str, qtype: int, records: List[Tuple[int, int, str]] = (),
+              rcode: int = 0, truncated: bool = False) -> bytes:
+    """Respuesta DNS mínima: la pregunta tal cual y registros A/AAAA/PTR (tipo, ttl, dato)."""
+    flags = 0x8180 | rcode | (0x0200 if truncated else 0)
+    out = struct.pack("!HHHHHH", qid, flags, 1, len(records), 0, 0)
+    out += encode_name(qname) + struct.pack("!HH", qtype, 1)
+    for rtype, ttl, data in records:
+        if rtype == QTYPE_A:
+            rdata = socket.inet_aton(data)
+        elif rtype == QTYPE_AAAA:
+            rdata = socket.inet_pton(socket.AF_INET6, data)
+        else:
+            rdata = encode_name(data)
+        out += b"\xc0\x0c" + struct.pack("!HHIH", rtype, 1, ttl, len(rdata)) + rdata
+    return out
+
+
+class DNSStub:
+    """
+    Servidor DNS UDP en un hilo. `handler(qid, qname, qtype)` devuelve los bytes
+    a responder o None para no contestar (timeout). `queries` guarda
+    (puerto origen, qid, qname, qtype) de cada consulta recibida.
+    """
+
+    def __init__(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.addr = self.sock.getsockname()
+        self.handler: Callable[[int, str, int], Optional[bytes]] = lambda qid, name, qtype: dns_reply(
+            qid, name, qtype, rcode=3)
+        self.queries: List[Tuple[int, int, str, int]] = []
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    @property
+    def spec(self) -> str:
+        return f"{self.addr[0]}:{self.addr[1]}"
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                data, peer = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            qid = struct.unpack_from("!H", data)[0]
+            labels, pos = [], 12
+            while data[pos]:
+                labels.append(data[pos + 1:pos + 1 + data[pos]].decode())
+                pos += 1 + data[pos]
+            qtype = struct.unpack_from("!H", data, pos + 1)[0]
+            name = ".".join(labels)
+            self.queries.append((peer[1], qid, name, qtype))
+            reply = self.handler(qid, name, qtype)
+            if reply is not None:
+                self.sock.sendto(reply, peer)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+@pytest.fixture
+def dns_stub():
+    stub = DNSStub()
+    yield stub
+    stub.close()
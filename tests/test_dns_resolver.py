@@ -0,0 +1,165 @@
+import asyncio
+
+from app.modules.dns import resolver as dns
+from app.modules.dns.resolver import QTYPE_A, QTYPE_PTR, AsyncResolver
+from conftest import dns_reply
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _query(stub, name, qtype=QTYPE_A, **kwargs):
+    kwargs.setdefault("timeout", 0.3)
+    kwargs.setdefault("retries", 0)
+    async with AsyncResolver(stub.spec, **kwargs) as res:
+        return await res.query(name, qtype)
+
+
+def test_parse_nameservers():
+    assert dns.parse_nameservers("1.1.1.1, 9.9.9.9:5353 [::1]:54") == [
+        ("1.1.1.1", 53), ("9.9.9.9", 5353), ("::1", 54)]
+
+
+def test_answer(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(qid, name, qtype, [(QTYPE_A, 300, "192.0.2.7")])
+    ans = _run(_query(dns_stub, "www.example.test"))
+    assert (ans.rcode, ans.values()) == ("ok", ["192.0.2.7"])
+
+
+def test_nxdomain(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(qid, name, qtype, rcode=3)
+    ans = _run(_query(dns_stub, "missing.example.test", retries=2))
+    assert ans.rcode == "nxdomain"
+    assert ans.values() == []
+    assert len(dns_stub.queries) == 1      # NXDOMAIN es definitivo: sin reintentos
+
+
+def test_timeout_then_retry(dns_stub):
+    seen = []
+
+    def handler(qid, name, qtype):
+        seen.append(qid)
+        if len(seen) < 3:
+            return None                    # los dos primeros intentos se pierden
+        return dns_reply(qid, name, qtype, [(QTYPE_A, 60, "192.0.2.8")])
+
+    dns_stub.handler = handler
+    ans = _run(_query(dns_stub, "slow.example.test", timeout=0.2, retries=2))
+    assert (ans.rcode, ans.values()) == ("ok", ["192.0.2.8"])
+    assert len(seen) == 3
+    assert len(set(seen)) == 3             # id nuevo en cada intento
+
+
+def test_timeout_exhausted(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: None
+    ans = _run(_query(dns_stub, "dead.example.test", timeout=0.1, retries=1))
+    assert ans.rcode == "timeout"
+    assert len(dns_stub.queries) == 2
+
+
+def test_mismatched_id_is_ignored(dns_stub):
+    def handler(qid, name, qtype):
+        # Primero una respuesta falsa con otro id; la buena llega después
+        dns_stub.sock.sendto(dns_reply(qid ^ 0xFFFF, name, qtype, [(QTYPE_A, 60, "203.0.113.66")]),
+                             ("127.0.0.1", dns_stub.queries[-1][0]))
+        return dns_reply(qid, name, qtype, [(QTYPE_A, 60, "192.0.2.9")])
+
+    dns_stub.handler = handler
+    ans = _run(_query(dns_stub, "target.example.test"))
+    assert ans.values() == ["192.0.2.9"]
+
+
+def test_mismatched_question_is_ignored(dns_stub):
+    def handler(qid, name, qtype):
+        # Mismo id, otra pregunta: no se acepta y la consulta espera a la buena
+        dns_stub.sock.sendto(dns_reply(qid, "evil.example.test", qtype, [(QTYPE_A, 60, "203.0.113.66")]),
+                             ("127.0.0.1", dns_stub.queries[-1][0]))
+        dns_stub.sock.sendto(dns_reply(qid, name, QTYPE_PTR, [(QTYPE_PTR, 60, "evil.example.test")]),
+                             ("127.0.0.1", dns_stub.queries[-1][0]))
+        return dns_reply(qid, name, qtype, [(QTYPE_A, 60, "192.0.2.10")])
+
+    dns_stub.handler = handler
+    ans = _run(_query(dns_stub, "Target.Example.test"))
+    assert ans.values() == ["192.0.2.10"]
+
+
+def test_only_mismatched_answers_time_out(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(qid ^ 1, name, qtype, [(QTYPE_A, 60, "203.0.113.66")])
+    ans = _run(_query(dns_stub, "spoofed.example.test", timeout=0.2))
+    assert ans.rcode == "timeout"
+
+
+def test_source_port_rotates(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(qid, name, qtype, [(QTYPE_A, 60, "192.0.2.1")])
+    n = dns.CHANNEL_MAX_QUERIES * 4
+
+    async def _go():
+        async with AsyncResolver(dns_stub.spec, timeout=1.0, retries=0, concurrency=8) as res:
+            await res.map(lambda name: res.query(name), (f"h{i}.example.test" for i in range(n)),
+                          lambda ans: None)
+            return len(res._open)
+
+    still_open = _run(_go())
+    ports = {port for port, _, _, _ in dns_stub.queries}
+    assert len(dns_stub.queries) == n
+    assert len(ports) >= 4
+    assert still_open <= 2                 # los sockets retirados se cierran al vaciarse
+
+
+def test_reverse(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(qid, name, qtype, [(QTYPE_PTR, 60, "host.example.test")])
+
+    async def _go():
+        async with AsyncResolver(dns_stub.spec, timeout=0.5) as res:
+            return await res.reverse("192.0.2.1")
+
+    out = _run(_go())
+    assert out["ptr"] == "host.example.test"
+    assert out["status"] == "ok"
+    assert dns_stub.queries[0][2] == "1.2.0.192.in-addr.arpa"
+
+
+def _lookup(stub, host):
+    async def _go():
+        async with AsyncResolver(stub.spec, timeout=0.3, retries=0) as res:
+            return await res.lookup(host)
+    return _run(_go())
+
+
+def test_lookup_a_and_aaaa(dns_stub):
+    def handler(qid, name, qtype):
+        if qtype == QTYPE_A:
+            return dns_reply(qid, name, qtype, [(QTYPE_A, 60, "192.0.2.20")])
+        return dns_reply(qid, name, qtype, [(dns.QTYPE_AAAA, 60, "2001:db8::20")])
+
+    dns_stub.handler = handler
+    assert _lookup(dns_stub, "dual.example.test") == ["192.0.2.20", "2001:db8::20"]
+
+
+def test_lookup_ipv6_only(dns_stub):
+    dns_stub.handler = lambda qid, name, qtype: dns_reply(
+        qid, name, qtype, [(dns.QTYPE_AAAA, 60, "2001:db8::21")] if qtype == dns.QTYPE_AAAA else [])
+    assert _lookup(dns_stub, "v6.example.test") == ["2001:db8::21"]
+
+
+def test_lookup_hosts_file_first(dns_stub, tmp_path, monkeypatch):
+    hosts = tmp_path / "hosts"
+    hosts.write_text("# comentario\n10.9.8.7  pinned.example.test pinned\nfd00::7 pinned.example.test\n")
+    monkeypatch.setattr(dns, "HOSTS_FILE", str(hosts))
+    assert _lookup(dns_stub, "Pinned.Example.Test") == ["10.9.8.7", "fd00::7"]
+    assert _lookup(dns_stub, "pinned") == ["10.9.8.7"]
+    assert dns_stub.queries == []
+
+
+def test_lookup_falls_back_to_system(dns_stub, monkeypatch):
+    # El DNS no conoce el nombre (NXDOMAIN): decide el resolutor del sistema
+    monkeypatch.setattr(dns, "HOSTS_FILE", "/nonexistent/hosts")
+    monkeypatch.setattr(dns, "system_lookup", lambda host: ["198.51.100.4"] if host == "corp.example.test" else [])
+    assert _lookup(dns_stub, "corp.example.test") == ["198.51.100.4"]
+    assert {q[3] for q in dns_stub.queries} == {QTYPE_A, dns.QTYPE_AAAA}
+
+
+def test_lookup_localhost(dns_stub):
+    assert "127.0.0.1" in _lookup(dns_stub, "localhost")
+    assert dns_stub.queries == []          # nombre de una etiqueta: directo al sistema
@@ -0,0 +1,42 @@
+import logging
+import time
+
+from app.job_manager import JobManager
+
+
+def _wait_status(jm, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jm.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.02)
+    return jm.get(job_id)
+
+
+def test_unhandled_runner_error_marks_job_failed(tmp_path, caplog):
+    jm = JobManager(report_dir=str(tmp_path))
+
+    def boom(job):
+        raise RuntimeError("fallo antes de arrancar")
+
+    jm.scheduler.runner = boom
+    with caplog.at_level(logging.ERROR, logger="app.job_manager"):
+        job = jm.create_job(target="10.0.0.1", tools=["nmap"])
+        jm.start_job(job)
+        job = _wait_status(jm, job.id, {"error"})
+    assert job.status == "error"
+    assert job.errors == {"job": "fallo antes de arrancar"}
+    kinds = [e.kind for e in job.events.tail(10)]
+    assert kinds[-2:] == ["status", "finished"]
+    assert any("fallo antes de arrancar" in (r.exc_text or "") for r in caplog.records)
+
+    # El hilo sigue vivo y atiende el siguiente job
+    ok = []
+    jm.scheduler.runner = lambda j: ok.append(j.id)
+    nxt = jm.create_job(target="10.0.0.2", tools=["nmap"])
+    jm.start_job(nxt)
+    deadline = time.monotonic() + 5
+    while not ok and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert ok == [nxt.id]
@@ -0,0 +1,44 @@
+import shutil
+from pathlib import Path
+
+from app.job_manager import JobManager
+from app.job_store import SQLiteJobStore
+from app.modules.acquisition.nmap_import import import_files
+from app.plugins import nmap_import
+
+SAMPLE = Path(__file__).parent / "data" / "nmap_sample.xml"
+
+
+def test_import_files_in_worker_processes(tmp_path):
+    copy = tmp_path / "b.xml"
+    shutil.copy(SAMPLE, copy)
+    assets, meta = import_files([str(SAMPLE), str(copy)], max_procs=2)
+    assert assets
+    assert meta["returncode"] == 0
+    assert [f["hosts"] for f in meta["files"]] == [len(assets), len(assets)]
+
+
+def test_uploaded_files_removed_after_import(tmp_path):
+    upload = tmp_path / "imports" / "abc"
+    upload.mkdir(parents=True)
+    shutil.copy(SAMPLE, upload / "0000_scan.xml")
+    (upload / "0001_broken.xml").write_text("<nmaprun><host>")
+    out = nmap_import.run("", emit=lambda m: None,
+                          meta={"import_dir": str(upload),
+                                "import_files": [str(upload / "0000_scan.xml"), str(upload / "0001_broken.xml")]})
+    assert out["assets"]
+    assert not upload.exists()
+
+
+def test_prune_removes_upload_dir(tmp_path):
+    jm = JobManager(report_dir=str(tmp_path), store=SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), max_count=1))
+    upload = tmp_path / "imports" / "old"
+    upload.mkdir(parents=True)
+    (upload / "scan.xml").write_text("<nmaprun/>")
+    old = jm.create_job(target="importación", tools=["nmap_import"], meta={"import_dir": str(upload)})
+    assert str(upload) in jm.job_files(old.to_record())
+    for job in (old, jm.create_job(target="otro", tools=["nmap"])):
+        job.status = "done"
+        jm.jobs.save(job)
+    assert jm.get(old.id) is None
+    assert not upload.exists()
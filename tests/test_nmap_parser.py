@@ -0,0 +1,79 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from app.routes.nmap import parser
+
+SAMPLE = Path(__file__).parent / "data" / "nmap_sample.xml"
+
+EXPECTED = [
+    {"ip": "192.0.2.1", "hostname": "gw.example.test", "os": "Linux 5.0 - 5.14", "ports": [
+        {"port": "22", "proto": "tcp", "state": "open", "service": "ssh", "product": "OpenSSH",
+         "version": "9.2p1"},
+        {"port": "80", "proto": "tcp", "state": "open", "service": "http", "product": "nginx",
+         "version": None},
+        {"port": "161", "proto": "udp", "state": "open", "service": "", "product": "", "version": ""},
+    ]},
+    {"ip": "2001:db8::5", "hostname": "", "os": None, "ports": [
+        {"port": "443", "proto": "tcp", "state": "open", "service": "https", "product": "Caddy «edge»",
+         "version": "2.7"},
+    ]},
+    {"ip": "192.0.2.3", "hostname": "", "os": None, "ports": [
+        {"port": "25", "proto": "tcp", "state": "open", "service": "smtp", "product": "Postfix smtpd",
+         "version": None},
+    ]},
+    {"ip": "Unknown", "hostname": "noaddr.example.test", "os": None, "ports": []},
+]
+
+# "auto" se prueba aparte; lxml solo si está instalado (si no, resolve_backend cae a "fast")
+BACKENDS = [b for b in parser.BACKENDS if b in parser.available_backends()]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+
+def test_parse_text(backend):
+    assert parser.parse_nmap_xml(SAMPLE.read_text(encoding="utf-8"), backend=backend) == EXPECTED
+
+
+def test_parse_bytes(backend):
+    assert parser.parse_nmap_xml(SAMPLE.read_bytes(), backend=backend) == EXPECTED
+
+
+def test_parse_small_chunks(backend, monkeypatch):
+    # Trozos que parten etiquetas y caracteres UTF-8 multibyte
+    monkeypatch.setattr(parser, "CHUNK_SIZE", 7)
+    assert parser.parse_nmap_xml(SAMPLE.read_bytes(), backend=backend) == EXPECTED
+
+
+def test_stream_with_progress(backend):
+    progress = []
+    hosts = list(parser.iter_nmap_hosts(io.BytesIO(SAMPLE.read_bytes()), chunk_size=100,
+                                        on_progress=progress.append, backend=backend))
+    assert hosts == EXPECTED
+    assert progress == [
+        {"task": "SYN Stealth Scan", "percent": 42.5, "remaining": 12, "etc": 1700000017},
+        {"task": "Service scan", "percent": 75.0, "remaining": 5, "etc": 1700000025},
+    ]
+
+
+def test_invalid_xml_returns_empty(backend):
+    assert parser.parse_nmap_xml("<nmaprun><host>", backend=backend) == []
+    assert parser.parse_nmap_xml("", backend=backend) == []
+
+
+def test_truncated_stream_keeps_complete_hosts(backend):
+    data = SAMPLE.read_bytes()
+    cut = data[:data.index(b"<host><status state=\"down\"")]
+    assert list(parser.iter_nmap_hosts(io.BytesIO(cut), backend=backend)) == EXPECTED[:1]
+    with pytest.raises(parser.PARSE_ERRORS):
+        list(parser.iter_nmap_hosts(io.BytesIO(cut), backend=backend, strict=True))
+
+
+def test_auto_backend_matches_reference():
+    expected = parser.parse_nmap_xml(SAMPLE.read_bytes(), backend="etree")
+    assert parser.parse_nmap_xml(SAMPLE.read_bytes(), backend="auto") == expected
+    assert parser.resolve_backend("auto") == ("lxml" if parser.LET is not None else "fast")
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from app.event_relay import SQLiteEventRelay
+from app.job_manager import EVENT_BUS, JobManager
+from app.job_store import SQLiteJobStore
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """Dos JobManagers (como dos workers) sobre la misma base de datos + relay."""
+    db = str(tmp_path / "jobs.sqlite3")
+    relay = SQLiteEventRelay(db, str(tmp_path / "bus"), poll_interval=0.05).start()
+    owner = JobManager(report_dir=str(tmp_path), store=SQLiteJobStore(db, shared=True))
+    other = JobManager(report_dir=str(tmp_path), store=SQLiteJobStore(db, shared=True))
+    yield owner, other, relay
+    relay.stop()
+
+
+def _wait_written(relay, job_id, n):
+    deadline = time.monotonic() + 5
+    while len(relay.events(job_id)) < n and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+
+def test_running_job_events_replay_on_other_worker(shared):
+    owner, other, relay = shared
+    job = owner.create_job(target="10.0.0.1", tools=["nmap"])
+    job.status = "running"
+    owner._emit(job, "status", {"status": "running"})
+    for i in range(5):
+        owner._emit(job, "log", {"tool": "nmap", "msg": f"linea {i}"})
+    _wait_written(relay, job.id, 6)
+
+    seen = other.get(job.id)
+    assert seen is not job
+    assert seen.status == "running"
+    assert seen.events.last_seq == 6
+    assert [e.seq for e in seen.events.since(3)] == [4, 5, 6]
+    assert [e.payload["msg"] for e in seen.events.tail(2)] == ["linea 3", "linea 4"]
+    assert seen.to_dict()["events_seq"] == 6
+    assert seen.events.since(3)[0].encode().startswith(b"id: 4\n")
+
+
+def test_finished_job_uses_persisted_record(shared):
+    owner, other, relay = shared
+    job = owner.create_job(target="10.0.0.1", tools=["nmap"])
+    owner._emit(job, "log", {"tool": "nmap", "msg": "hola"})
+    job.status = "done"
+    owner.jobs.save(job)
+    seen = other.get(job.id)
+    assert seen.status == "done"
+    assert [e.payload["msg"] for e in seen.events.tail(10)] == ["hola"]
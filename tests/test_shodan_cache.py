@@ -0,0 +1,17 @@
+from app.modules.shodan.cache import cache_key, normalize_query
+
+
+def test_normalize_whitespace_and_filter_case():
+    assert normalize_query("  Product:Apache \t port:80 ") == "product:Apache port:80"
+    assert normalize_query('Title:"Index Of"  nginx') == 'title:"Index Of" nginx'
+
+
+def test_term_order_is_kept():
+    assert normalize_query("apache -port:80") != normalize_query("-port:80 apache")
+    assert normalize_query("nginx OR apache country:ES") != normalize_query("apache OR country:ES nginx")
+    assert cache_key("a b") != cache_key("b a")
+
+
+def test_params_are_part_of_the_key():
+    assert cache_key("port:22", {"page": 2}) != cache_key("port:22")
+    assert cache_key("port:22", {"page": 2, "x": 1}) == cache_key("Port:22", {"x": 1, "page": 2})
@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.modules.shodan.client import ShodanClient
+
+
+class SearchStub:
+    """Backend de búsqueda falso: responde según `script` (lista de (status, headers, body, delay))."""
+
+    def __init__(self):
+        self.script = []
+        self.seen = []      # (puerto del cliente, cuerpo JSON)
+        self.active = self.max_active = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.seen.append((self.client_address[1], json.loads(body or b"null")))
+                status, headers, payload, delay = stub.script.pop(0) if stub.script else (200, {}, {"matches": []}, 0)
+                with lock:
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                if delay:
+                    time.sleep(delay)
+                with lock:
+                    stub.active -= 1
+                raw = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    for k, v in headers.items():
+                        self.send_header(k, v)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(raw)))
+                    self.end_headers()
+                    self.wfile.write(raw)
+                except OSError:     # el cliente ya cerró por timeout
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    s = SearchStub()
+    yield s
+    s.close()
+
+
+def _client(stub, **kwargs):
+    kwargs.setdefault("backoff", 0.01)
+    kwargs.setdefault("read_timeout", 5.0)
+    return ShodanClient(stub.url, **kwargs)
+
+
+def test_search_posts_query(stub):
+    stub.script = [(200, {}, {"matches": [{"ip_str": "192.0.2.1"}]}, 0)]
+    client = _client(stub)
+    assert client.search("port:22", page=2) == {"matches": [{"ip_str": "192.0.2.1"}]}
+    assert stub.seen[0][1] == {"query": "port:22", "page": 2}
+    assert client.stats()["requests"] == 1 and client.stats()["errors"] == 0
+
+
+def test_retries_5xx_then_succeeds(stub):
+    stub.script = [(503, {}, {}, 0), (502, {}, {}, 0), (200, {}, {"total": 7}, 0)]
+    client = _client(stub, retries=3)
+    assert client.search("q") == {"total": 7}
+    assert len(stub.seen) == 3
+    assert client.stats() == {"url": stub.url, "requests": 1, "errors": 0, "max_concurrency": 8}
+
+
+def test_gives_up_after_retries(stub):
+    stub.script = [(500, {}, {}, 0)] * 3
+    client = _client(stub, retries=2)
+    with pytest.raises(requests.HTTPError):
+        client.search("q")
+    assert len(stub.seen) == 3
+    assert client.stats()["errors"] == 1
+
+
+def test_429_respects_retry_after(stub):
+    stub.script = [(429, {"Retry-After": "1"}, {}, 0), (200, {}, {"ok": True}, 0)]
+    client = _client(stub)
+    t0 = time.monotonic()
+    assert client.search("q") == {"ok": True}
+    assert time.monotonic() - t0 >= 0.9
+    assert len(stub.seen) == 2
+
+
+def test_read_timeout_retried_then_raises(stub):
+    stub.script = [(200, {}, {}, 0.5)] * 2
+    client = _client(stub, retries=1, read_timeout=0.1)
+    with pytest.raises(requests.RequestException):
+        client.search("q")
+    deadline = time.monotonic() + 2
+    while len(stub.seen) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(stub.seen) == 2
+    assert client.stats()["errors"] == 1
+
+
+def test_invalid_json_counts_as_error(stub):
+    stub.script = [(200, {}, b"<html>", 0)]
+    client = _client(stub)
+    with pytest.raises(requests.RequestException):
+        client.search("q")
+    assert client.stats()["errors"] == 1
+
+
+def test_pooled_connection_is_reused(stub):
+    client = _client(stub)
+    for i in range(5):
+        client.search(f"q{i}")
+    assert len({port for port, _ in stub.seen}) == 1
+
+
+def test_max_concurrency_bounds_inflight(stub):
+    stub.script = [(200, {}, {}, 0.1)] * 6
+    client = _client(stub, max_concurrency=2)
+    threads = [threading.Thread(target=client.search, args=("q",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(stub.seen) == 6
+    assert stub.max_active == 2
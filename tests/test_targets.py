@@ -0,0 +1,77 @@
+import pytest
+
+from app.core.targets import parse_targets
+from app.modules.dns.resolver import ptr_name
+
+
+def test_cidr_hosts_only():
+    t = parse_targets("10.0.0.0/30")
+    assert list(t) == ["10.0.0.1", "10.0.0.2"]
+    t = parse_targets("10.0.0.0/30", hosts_only=False)
+    assert list(t) == ["10.0.0.0", "10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert parse_targets("10.0.0.0/31").count == 2
+
+
+def test_octet_ranges():
+    t = parse_targets("10.0.1-2.1-3")
+    assert list(t) == ["10.0.1.1", "10.0.1.2", "10.0.1.3", "10.0.2.1", "10.0.2.2", "10.0.2.3"]
+    t = parse_targets("10.*.*.*")
+    assert t.v4 == [(10 << 24, (11 << 24) - 1)]
+    assert t.count == 1 << 24
+
+
+def test_full_ranges():
+    assert list(parse_targets("10.0.0.254-10.0.1.1")) == ["10.0.0.254", "10.0.0.255", "10.0.1.0", "10.0.1.1"]
+    assert list(parse_targets("2001:db8::1-2001:db8::3")) == ["2001:db8::1", "2001:db8::2", "2001:db8::3"]
+
+
+def test_merge_and_exclusions():
+    t = parse_targets("10.0.0.1-10.0.0.10, 10.0.0.5-10.0.0.20 !10.0.0.8", exclude="10.0.0.15-10.0.0.30 host.example")
+    assert t.v4 == [(167772161, 167772167), (167772169, 167772174)]
+    assert t.count == 13
+    assert "10.0.0.7" in t and "10.0.0.8" not in t and "10.0.0.15" not in t
+    t = parse_targets("Host.Example other.example", exclude="host.example")
+    assert t.names == ["other.example"]
+
+
+def test_to_nmap_chunks_shards():
+    t = parse_targets("10.0.0.0/24 10.0.1.5 host.example", hosts_only=False)
+    assert t.to_nmap() == "10.0.0.0/24 10.0.1.5 host.example"
+    chunks = list(t.chunks(100))
+    assert [len(c) for c in chunks] == [100, 100, 58]
+    assert chunks[-1][-1] == "host.example"
+    assert list(t.shards(prefix=24)) == ["10.0.0.0/24", "10.0.1.5", "host.example"]
+
+
+def test_hostname_with_prefix_passes_through():
+    t = parse_targets("host.example/24 10.0.0.1")
+    assert t.names == ["host.example/24"]
+    assert t.to_nmap() == "10.0.0.1 host.example/24"
+    with pytest.raises(ValueError):
+        parse_targets("host.example/abc")
+
+
+@pytest.mark.parametrize("spec", [
+    "10.0.0.1-10.0.0.300",
+    "10.0.0.300",
+    "10.0.300",
+    "10.0.0.0/33",
+    "10.0.0.5-10.0.0.1",
+    "10.0.0.1-2001:db8::1",
+    "gggg::1",
+    "10.0.0.1-300",
+])
+def test_invalid_ip_like_raises(spec):
+    with pytest.raises(ValueError):
+        parse_targets(spec)
+
+
+def test_scoped_ipv6_kept_literal():
+    t = parse_targets("fe80::1%eth0 fe80::%eth0/64 2001:db8::1")
+    assert t.names == ["fe80::1%eth0", "fe80::%eth0/64"]
+    assert t.address_count == 1
+    assert "fe80::1%eth0" in t
+    assert "fe80::1" not in t
+    assert "fe80::1%eth0" in t.to_nmap()
+    assert parse_targets("fe80::1%eth0", exclude="fe80::1%ETH0").count == 0
+    assert ptr_name("fe80::1%eth0") == ptr_name("fe80::1")
@@ -0,0 +1,92 @@
+import asyncio
+import socket
+
+import pytest
+
+from app.modules.dns.cache import get_dns_cache
+from app.plugins import tcp_sweep
+
+
+@pytest.fixture
+def listener():
+    """Puerto TCP abierto en localhost (el kernel acepta la conexión sin accept())."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture(autouse=True)
+def _clean_dns_cache():
+    get_dns_cache().clear()
+    yield
+    get_dns_cache().clear()
+
+
+def test_parse_ports():
+    assert tcp_sweep.parse_ports("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    with pytest.raises(ValueError):
+        tcp_sweep.parse_ports("70000")
+
+
+def test_sweep_finds_open_port_only(listener, closed_port):
+    found = asyncio.run(tcp_sweep.sweep("127.0.0.1", [closed_port, listener], timeout=1.0))
+    assert len(found) == 1
+    assert found[0].ip == "127.0.0.1"
+    assert [p.port for p in found[0].ports] == [str(listener)]
+
+
+def test_sweep_task_count_is_bounded(listener):
+    # 4 hosts × 301 puertos con concurrency=8: un pool fijo, no una tarea por sonda
+    ports = list(range(20000, 20300)) + [listener]
+    created = []
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+
+        def _factory(loop, coro, **kwargs):
+            created.append(getattr(coro, "__qualname__", ""))
+            return asyncio.Task(coro, loop=loop, **kwargs)
+
+        loop.set_task_factory(_factory)
+        return await tcp_sweep.sweep("127.0.0.1-127.0.0.4", ports, concurrency=8, timeout=0.5)
+
+    found = asyncio.run(_main())
+    assert sum(1 for name in created if name.startswith("sweep.")) <= 8
+    assert "127.0.0.1" in {a.ip for a in found}
+
+
+def test_sweep_emits_each_host_once(listener):
+    seen = []
+    asyncio.run(tcp_sweep.sweep("127.0.0.1 127.0.0.1/32", [listener], on_host=seen.append))
+    assert [a.ip for a in seen] == ["127.0.0.1"]
+
+
+def test_run_counts_only_resolved_hosts(listener, dns_stub):
+    events = []
+    out = tcp_sweep.run("127.0.0.1 nohost.invalid", events.append, {
+        "tcp_sweep_ports": str(listener), "dns_resolvers": dns_stub.spec,
+    })
+    assert out["meta"]["hosts"] == 1
+    assert out["meta"]["probes"] == 1
+    assert [a.ip for a in out["assets"]] == ["127.0.0.1"]
+    assert any("nohost.invalid" in str(e.get("warn", "")) for e in events)
+
+
+def test_run_resolves_localhost(listener, dns_stub):
+    # Nombres del fichero hosts / nsswitch: no dependen del servidor DNS configurado
+    out = tcp_sweep.run("localhost", lambda e: None, {
+        "tcp_sweep_ports": str(listener), "dns_resolvers": dns_stub.spec,
+    })
+    assert out["meta"]["hosts"] == 1
+    assert [(a.ip, a.hostname) for a in out["assets"]] == [("127.0.0.1", "localhost")]